@@ -0,0 +1,93 @@
+"""
+Benchmark of the git diff engine in `generate_diff_files_async` against the difflib based `generate_diff`.
+
+Run from the repository root:
+    python -m benchmarks.diff_benchmark
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import tempfile
+import time
+
+from src.utils.diff_utils import generate_diff, generate_diff_files_async
+
+DEFAULT_LINE_COUNTS = [1_000, 10_000, 100_000]
+
+
+def _generate_file_pair(line_count: int, change_ratio: float, seed: int) -> tuple[str, str]:
+    rng = random.Random(seed)
+    old_lines = [f"line {i}: {rng.getrandbits(64):016x}" for i in range(line_count)]
+    new_lines = []
+    for line in old_lines:
+        roll = rng.random()
+        if roll < change_ratio / 3:
+            continue
+        elif roll < 2 * change_ratio / 3:
+            new_lines.append(f"{line} (modified)")
+        elif roll < change_ratio:
+            new_lines.append(line)
+            new_lines.append(f"inserted {rng.getrandbits(32):08x}")
+        else:
+            new_lines.append(line)
+    return "\n".join(old_lines) + "\n", "\n".join(new_lines) + "\n"
+
+
+def _git(repo_directory: str, *args: str) -> str:
+    return subprocess.check_output(["git", *args], cwd=repo_directory, text=True).strip()
+
+
+def _commit_file(repo_directory: str, content: str, message: str) -> str:
+    with open(f"{repo_directory}/generated.txt", "w", encoding="utf-8") as file:
+        file.write(content)
+    _git(repo_directory, "add", "generated.txt")
+    _git(repo_directory, "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-m", message)
+    return _git(repo_directory, "rev-parse", "HEAD")
+
+
+def _run_benchmark(line_count: int, change_ratio: float, repeat: int) -> tuple[float, float]:
+    old_content, new_content = _generate_file_pair(line_count, change_ratio, seed=line_count)
+    with tempfile.TemporaryDirectory() as repo_directory:
+        _git(repo_directory, "init", "-q")
+        base_commit = _commit_file(repo_directory, old_content, "base")
+        head_commit = _commit_file(repo_directory, new_content, "head")
+
+        difflib_seconds = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            difflib_body = generate_diff(old_content, new_content)
+            difflib_seconds = min(difflib_seconds, time.perf_counter() - start)
+
+        git_seconds = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            diff_files = asyncio.run(generate_diff_files_async(repo_directory, head_commit, base_commit))
+            git_seconds = min(git_seconds, time.perf_counter() - start)
+
+        # both engines may pick different but equally valid alignments, so only compare the resulting file
+        git_body = diff_files[0].body
+        assert _apply(git_body) == _apply(difflib_body) == new_content.splitlines()
+    return difflib_seconds, git_seconds
+
+
+def _apply(diff_body: str) -> list[str]:
+    return [line[1:] if line.startswith("+") else line for line in diff_body.splitlines() if not line.startswith("-")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=DEFAULT_LINE_COUNTS)
+    parser.add_argument("--change-ratio", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'difflib (s)':>12} {'git diff (s)':>13} {'speedup':>8}")
+    for line_count in args.lines:
+        difflib_seconds, git_seconds = _run_benchmark(line_count, args.change_ratio, args.repeat)
+        print(f"{line_count:>10} {difflib_seconds:>12.3f} {git_seconds:>13.3f} {difflib_seconds / git_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
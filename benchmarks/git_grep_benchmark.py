@@ -0,0 +1,115 @@
+"""
+Benchmark of trigram index backed searches in `git_grep_async` against plain `git grep`.
+
+Run from the repository root, on a generated repository or on a clone of a large repository:
+    python -m benchmarks.git_grep_benchmark
+    python -m benchmarks.git_grep_benchmark --repo /path/to/linux --patterns "spin_lock_irqsave" "struct page \\*"
+
+Smaller repositories are only indexed with a lower threshold, e.g. to find where the index starts to pay off:
+    GIT_GREP_INDEX_MIN_FILES=0 python -m benchmarks.git_grep_benchmark --files 3000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import tempfile
+import time
+
+from src.utils import index_executor, trigram_index
+from src.utils.code_search import git_grep_async
+from src.utils.git_utils import run_git_async
+
+DEFAULT_PATTERNS = ["ratelimitbucket", "def get_[a-z]*_async", "todo: remove", "x_request_id", "zzz_not_found"]
+
+# groups made optional by a quantifier, whose literals must not narrow the searched files
+REGRESSION_PATTERNS = ["\\(hello\\)\\?world", "x\\(abc\\)*y = ", "\\(foobar\\)\\{0,1\\}limit_only"]
+
+# enough to return every match, so both searches can be compared
+MAX_RESULTS = 1_000_000
+
+WORDS = ["async", "client", "request", "handler", "value", "index", "result", "config", "token", "buffer", "worker"]
+
+
+def _generate_repository(repo_directory: str, file_count: int, lines_per_file: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(file_count):
+        lines = []
+        for _ in range(lines_per_file):
+            words = rng.choices(WORDS, k=4)
+            lines.append(f"def get_{words[0]}_{words[1]}_async({words[2]}, {words[3]}_{rng.getrandbits(24):06x}):")
+        if i % 500 == 0:
+            lines.append("    bucket = RateLimitBucket()  # TODO: remove")
+        if i % 97 == 0:
+            lines.append(f"    headers['X_Request_Id'] = '{rng.getrandbits(32):08x}'")
+        if i % 1000 == 0:
+            lines.extend(["    # world only here", "    xy = 1", "    limit_only = 2"])
+        path = f"{repo_directory}/pkg{i % 50}/module{i}.py"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+    subprocess.run(["git", "init", "-q"], cwd=repo_directory, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=repo_directory, check=True)
+    subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-m", "generated"],
+        cwd=repo_directory,
+        check=True,
+    )
+
+
+async def _run_benchmark_async(repo_directory: str, patterns: list[str], repeat: int):
+    commit = (await run_git_async(repo_directory, "rev-parse", "HEAD")).decode().strip()
+    start = time.perf_counter()
+    index = await trigram_index.build_trigram_index_async(repo_directory, commit)
+    if index is None:
+        print(f"Repository has fewer than {trigram_index.GIT_GREP_INDEX_MIN_FILES} files and is not indexed")
+        return
+    print(
+        f"Indexed {len(index.file_paths)} files with {len(index.postings)} trigrams in {time.perf_counter() - start:.2f}s"
+    )
+    trigram_index._add_loaded_index(index)
+    await index_executor.close_index_executor_async()
+
+    print(f"{'pattern':<30} {'matches':>8} {'git grep (s)':>13} {'indexed (s)':>12} {'speedup':>8}")
+    for pattern in patterns:
+        git_grep_seconds = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            expected, _ = await git_grep_async(repo_directory, pattern, MAX_RESULTS, use_index=False)
+            git_grep_seconds = min(git_grep_seconds, time.perf_counter() - start)
+
+        indexed_seconds = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            actual, _ = await git_grep_async(repo_directory, pattern, MAX_RESULTS)
+            indexed_seconds = min(indexed_seconds, time.perf_counter() - start)
+
+        assert sorted(actual) == sorted(expected), f"Indexed search of {pattern!r} differs from git grep"
+        print(
+            f"{pattern[:30]:<30} {len(expected):>8} {git_grep_seconds:>13.3f} {indexed_seconds:>12.3f} "
+            f"{git_grep_seconds / indexed_seconds:>7.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", help="Repository to search, a repository is generated when omitted")
+    parser.add_argument("--patterns", nargs="+", default=DEFAULT_PATTERNS + REGRESSION_PATTERNS)
+    parser.add_argument("--files", type=int, default=40_000, help="Number of files of the generated repository")
+    parser.add_argument("--lines", type=int, default=50, help="Lines per file of the generated repository")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.repo:
+        asyncio.run(_run_benchmark_async(args.repo, args.patterns, args.repeat))
+        return
+
+    with tempfile.TemporaryDirectory() as repo_directory:
+        _generate_repository(repo_directory, args.files, args.lines, seed=args.files)
+        asyncio.run(_run_benchmark_async(repo_directory, args.patterns, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark of the cold start of the Cloud Run jobs, fails when it regresses past a budget.
+
+Each job module is imported in a fresh interpreter with `-X importtime`. The import time of a job is the cumulative time
+of the modules its import loads, leaving out the modules the interpreter loads on its own. The slowest packages are
+listed, and the job fails when it imports an SDK it has no use for, e.g. Stripe or the model SDK of another agent.
+
+Run from the repository root, with the job dependencies installed:
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --runs 10 --budget-ms 1500 --jobs src.execute_task
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+JOB_MODULES = ["src.index_project", "src.research_task", "src.execute_task", "src.revise_task"]
+
+# median import time above which a job fails the benchmark
+DEFAULT_BUDGET_MS = 2500
+
+# clients and models no job uses, they are only imported by the server
+FORBIDDEN_MODULES = [
+    "gcloud.aio.storage",
+    "google.cloud.run_v2",
+    "google.cloud.secretmanager",
+    "langchain_google_genai",
+    "langchain_openai",
+    "openai",
+    "resend",
+    "stripe",
+]
+
+# per job, the modules only some jobs use
+JOB_FORBIDDEN_MODULES = {
+    "src.execute_task": ["langchain_core", "langgraph"],
+    "src.revise_task": ["langchain_core", "langgraph"],
+}
+
+
+def _import_times(statement: str) -> tuple[list[tuple[int, str, int, int]], float]:
+    """
+    Runs the statement in a fresh interpreter and returns its imports as (level, module, self us, cumulative us), with
+    the wall time of the whole process in seconds.
+    """
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True)
+    wall_time = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{process.stderr[-2000:]}")
+
+    imports = []
+    for line in process.stderr.splitlines():
+        # "import time:       123 |        456 |     module", nested imports are indented by two spaces per level
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_time, cumulative_time, module = line.removeprefix("import time:").split("|", 2)
+        level = (len(module) - len(module.lstrip()) - 1) // 2
+        imports.append((level, module.strip(), int(self_time), int(cumulative_time)))
+    return imports, wall_time
+
+
+def _measure_job(module: str, baseline_modules: set[str]) -> tuple[float, float, Counter, set[str]]:
+    """
+    Returns the import time of the job in ms, the wall time of the process in ms, the self time of every top-level
+    package in ms and the imported modules.
+    """
+    imports, wall_time = _import_times(f"import {module}")
+    import_us = sum(
+        cumulative_time for level, name, _, cumulative_time in imports if level == 0 and name not in baseline_modules
+    )
+    packages: Counter = Counter()
+    for _, name, self_time, _ in imports:
+        if name not in baseline_modules:
+            packages[name.split(".")[0]] += self_time / 1000
+    return import_us / 1000, wall_time * 1000, packages, {name for _, name, _, _ in imports}
+
+
+def _is_imported(module: str, imported_modules: set[str]) -> bool:
+    return any(name == module or name.startswith(f"{module}.") for name in imported_modules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", nargs="+", default=JOB_MODULES, help="Job modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Imports per job, the median is compared to the budget")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Import time budget per job")
+    parser.add_argument("--top", type=int, default=8, help="Slowest packages listed per job")
+    args = parser.parse_args()
+
+    # modules the interpreter imports before running anything
+    baseline_imports, _ = _import_times("pass")
+    baseline_modules = {name for _, name, _, _ in baseline_imports}
+
+    failures = []
+    print(f"{'job':<20} {'import (ms)':>12} {'process (ms)':>13} {'budget (ms)':>12}")
+    for module in args.jobs:
+        # the first import compiles the bytecode, which the job images ship with
+        _measure_job(module, baseline_modules)
+        runs = [_measure_job(module, baseline_modules) for _ in range(args.runs)]
+        import_ms = statistics.median(run[0] for run in runs)
+        wall_ms = statistics.median(run[1] for run in runs)
+        print(f"{module:<20} {import_ms:>12.0f} {wall_ms:>13.0f} {args.budget_ms:>12.0f}")
+
+        packages: Counter = Counter()
+        for run in runs:
+            packages.update({package: ms / len(runs) for package, ms in run[2].items()})
+        print("    " + ", ".join(f"{package} {ms:.0f}" for package, ms in packages.most_common(args.top)))
+
+        if import_ms > args.budget_ms:
+            failures.append(f"{module} imports in {import_ms:.0f}ms, over the budget of {args.budget_ms:.0f}ms")
+        for forbidden_module in FORBIDDEN_MODULES + JOB_FORBIDDEN_MODULES.get(module, []):
+            if _is_imported(forbidden_module, runs[0][3]):
+                failures.append(f"{module} imports {forbidden_module}, which it does not use")
+
+    if failures:
+        print("\n".join(["", "Startup regressed:"] + [f"- {failure}" for failure in failures]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark of the tool calls an agent makes to locate definitions, with and without the symbol index.
+
+Without the index, a lookup is replayed the way agents search: `git_grep` for the name, a second `git_grep` for its
+declaration when the definition is not among the first results, then `read_file` on the file. With the index, a lookup
+is a `find_symbol` call followed by the same `read_file`. Tool calls and characters returned to the model are counted
+per task of several lookups.
+
+Run from the repository root, on this repository or on a clone of a larger one:
+    python -m benchmarks.symbol_index_benchmark
+    python -m benchmarks.symbol_index_benchmark --repo /path/to/django --tasks 50 --lookups 8
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from src.utils import index_executor, symbol_index
+from src.utils.code_search import git_grep_async
+from src.utils.git_utils import run_git_async
+
+# the git_grep tool's default number of output lines
+GREP_MAX_RESULTS = 200
+
+
+async def _lookup_without_index_async(repo_directory: str, name: str, path: str, line_number: int) -> tuple[int, int]:
+    lines, _ = await git_grep_async(repo_directory, name, GREP_MAX_RESULTS)
+    calls, characters = 1, sum(len(line) + 1 for line in lines)
+    if not any(line.startswith(f"{path}:{line_number}:") for line in lines):
+        lines, _ = await git_grep_async(
+            repo_directory, f"\\(def\\|class\\|function\\|func\\|fn\\) {name}", GREP_MAX_RESULTS
+        )
+        calls, characters = calls + 1, characters + sum(len(line) + 1 for line in lines)
+    return calls, characters
+
+
+def _lookup_with_index(index: symbol_index.SymbolIndex, name: str) -> tuple[int, int]:
+    definitions = index.find_definitions(name)
+    lines = [f"{path}:{line}: {kind} {qualified_name}" for path, line, kind, qualified_name in definitions]
+    return 1, sum(len(line) + 1 for line in lines)
+
+
+async def _run_benchmark_async(repo_directory: str, task_count: int, lookup_count: int, seed: int):
+    commit = (await run_git_async(repo_directory, "rev-parse", "HEAD")).decode().strip()
+    start = time.perf_counter()
+    index = await symbol_index.build_symbol_index_async(repo_directory, commit)
+    print(
+        f"Indexed {len(index.definitions)} names in {index.file_count} files with "
+        f"{index_executor.INDEX_WORKERS} workers in {time.perf_counter() - start:.2f}s"
+    )
+    await index_executor.close_index_executor_async()
+
+    # lookups of classes and functions, which agents look for most
+    candidates = sorted(
+        (name, definitions[0])
+        for name, definitions in index.definitions.items()
+        if len(name) > 3
+        and any(kind not in ("variable", "const", "let", "var", "val") for _, _, kind, _ in definitions)
+    )
+    if not candidates:
+        print("No symbols to look up")
+        return
+    rng = random.Random(seed)
+
+    totals = {"without": [0, 0, 0.0], "with": [0, 0, 0.0]}
+    for _ in range(task_count):
+        for name, (path, line_number, _, _) in rng.choices(candidates, k=lookup_count):
+            start = time.perf_counter()
+            calls, characters = await _lookup_without_index_async(repo_directory, name, path, line_number)
+            # both strategies end with reading the file of the definition
+            totals["without"][0] += calls + 1
+            totals["without"][1] += characters
+            totals["without"][2] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            calls, characters = _lookup_with_index(index, name)
+            totals["with"][0] += calls + 1
+            totals["with"][1] += characters
+            totals["with"][2] += time.perf_counter() - start
+
+    print(f"{task_count} tasks of {lookup_count} lookups")
+    print(f"{'':<14} {'calls/task':>11} {'chars/task':>11} {'lookup (ms)':>12}")
+    for strategy, (calls, characters, seconds) in totals.items():
+        print(
+            f"{strategy + ' index':<14} {calls / task_count:>11.1f} {characters / task_count:>11.0f} "
+            f"{seconds * 1000 / (task_count * lookup_count):>12.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", default=".", help="Repository to look up symbols in")
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=5, help="Definitions looked up per task")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(_run_benchmark_async(args.repo, args.tasks, args.lookups, args.seed))
+
+
+if __name__ == "__main__":
+    main()
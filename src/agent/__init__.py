@@ -1,9 +1,30 @@
-from src.agent.analyzer_agent_metadata import AnalyzerAgentMetadata
-from src.agent.chat_agent_metadata import ChatAgentMetadata
-from src.agent.claude_code_agent import ClaudeCodeAgent
-from src.agent.output_formatter import OutputFormatter
-from src.agent.research_agent_metadata import ResearchAgentMetadata
-from src.agent.summary_agent_metadata import SummaryAgentMetadata
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.agent.analyzer_agent_metadata import AnalyzerAgentMetadata
+    from src.agent.chat_agent_metadata import ChatAgentMetadata
+    from src.agent.claude_code_agent import ClaudeCodeAgent
+    from src.agent.output_formatter import OutputFormatter
+    from src.agent.research_agent_metadata import ResearchAgentMetadata
+    from src.agent.summary_agent_metadata import SummaryAgentMetadata
+
+# agents are imported on first use, so a job does not import the model SDKs of the agents it does not run
+_MODULES = {
+    "AnalyzerAgentMetadata": "src.agent.analyzer_agent_metadata",
+    "ChatAgentMetadata": "src.agent.chat_agent_metadata",
+    "ClaudeCodeAgent": "src.agent.claude_code_agent",
+    "OutputFormatter": "src.agent.output_formatter",
+    "ResearchAgentMetadata": "src.agent.research_agent_metadata",
+    "SummaryAgentMetadata": "src.agent.summary_agent_metadata",
+}
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_MODULES[name]), name)
+
 
 __all__ = [
     "AnalyzerAgentMetadata",
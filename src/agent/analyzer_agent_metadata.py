@@ -2,12 +2,12 @@ from typing import Callable, Optional, Sequence, Union
 
 from langchain_core.language_models import LanguageModelLike
 from langchain_core.tools import BaseTool
-from langchain_openai import ChatOpenAI
 from langgraph.prebuilt.chat_agent_executor import StructuredResponseSchema
 from langgraph.prebuilt.tool_node import ToolNode
 
 from src.agent.agent_metadata import AgentMetadata
 from src.prompt.analyze_project_prompt import ANALYZE_PROJECT_PROMPT
+from src.tools.code import FindSymbol
 from src.tools.filesystem import ListFiles, ReadFile
 from src.tools.git import GitGrep
 
@@ -31,13 +31,15 @@ class AnalyzerAgentMetadata(AgentMetadata):
         return "analyzer-agent"
 
     def _get_model(self) -> LanguageModelLike:
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(model="gpt-5", reasoning_effort="high")
 
     def _get_system_prompt(self) -> str:
         return ANALYZE_PROJECT_PROMPT
 
     def _get_tools(self) -> Union[Sequence[Union[BaseTool, Callable]], ToolNode]:
-        return [ReadFile(), ListFiles(), GitGrep()]
+        return [ReadFile(), ListFiles(), GitGrep(), FindSymbol()]
 
     def _get_response_format(self) -> Optional[StructuredResponseSchema]:
         return None
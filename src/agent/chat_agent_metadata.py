@@ -2,12 +2,12 @@ from typing import Callable, Optional, Sequence, Union
 
 from langchain_core.language_models import LanguageModelLike
 from langchain_core.tools import BaseTool
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.prebuilt.chat_agent_executor import StructuredResponseSchema
 from langgraph.prebuilt.tool_node import ToolNode
 
 from src.agent.agent_metadata import AgentMetadata
 from src.prompt.chat_prompt import CHAT_PROMPT
+from src.tools.code import FindSymbol
 from src.tools.filesystem import ListFiles, ReadFile
 from src.tools.git import GitGrep
 
@@ -33,13 +33,15 @@ class ChatAgentMetadata(AgentMetadata):
         return "chat-agent"
 
     def _get_model(self) -> LanguageModelLike:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         return ChatGoogleGenerativeAI(model="gemini-2.5-flash")
 
     def _get_system_prompt(self) -> str:
         return CHAT_PROMPT
 
     def _get_tools(self) -> Union[Sequence[Union[BaseTool, Callable]], ToolNode]:
-        return [ListFiles(), ReadFile(), GitGrep()]
+        return [ListFiles(), ReadFile(), GitGrep(), FindSymbol()]
 
     def _get_response_format(self) -> Optional[StructuredResponseSchema]:
         return None
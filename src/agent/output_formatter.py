@@ -1,7 +1,5 @@
 from typing import Type, TypeVar
 
-from openai import AsyncOpenAI
-
 T = TypeVar("T")
 
 
@@ -11,6 +9,8 @@ class OutputFormatter:
     """
 
     def __init__(self, model: str = "gpt-4.1"):
+        from openai import AsyncOpenAI
+
         self.client = AsyncOpenAI()
         self.model = model
 
@@ -2,7 +2,6 @@ from typing import Callable, Optional, Sequence, Union
 
 from langchain_core.language_models import LanguageModelLike
 from langchain_core.tools import BaseTool
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.prebuilt.chat_agent_executor import StructuredResponseSchema
 from langgraph.prebuilt.tool_node import ToolNode
 
@@ -25,6 +24,8 @@ class SummaryAgentMetadata(AgentMetadata):
         return "summary-agent"
 
     def _get_model(self) -> LanguageModelLike:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         return ChatGoogleGenerativeAI(model="gemini-2.5-flash")
 
     def _get_system_prompt(self) -> str:
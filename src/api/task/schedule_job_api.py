@@ -37,4 +37,4 @@ ScheduleJobRequest = Union[IndexProjectJobRequest, ResearchTaskJobRequest, Execu
 
 
 class ScheduleJobResponse(BaseModel):
-    pass
+    job_id: str
@@ -1,9 +1,14 @@
-import httpcore
+import asyncio
+import logging
+
 import httpx
 from pydantic import BaseModel
 
 from src.api.task import ExecuteTaskJobRequest, IndexProjectJobRequest, ReviseTaskJobRequest
-from src.async_module.async_constants import LOCAL_URL, PROD_URL
+from src.async_module.async_constants import INVOKE_MAX_ATTEMPTS, INVOKE_RETRY_BACKOFF_SECONDS, LOCAL_URL, PROD_URL
+from src.model import generate_id
+
+logger = logging.getLogger(__name__)
 
 
 class AsyncClient:
@@ -24,18 +29,33 @@ class AsyncClient:
         return await self._invoke_async("task/schedule-job", payload, is_dev)
 
     async def _invoke_async(self, route: str, payload: BaseModel, is_dev: bool = False) -> dict:
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.post(url=f"{self._get_base_url(is_dev)}/{route}", json=payload.model_dump())
-                if response.status_code != 200:
-                    raise httpx.HTTPStatusError(
-                        message=f"Failed to invoke {route}: {response.text}",
-                        request=response.request,
-                        response=response,
+        """
+        Post the payload, retrying timeouts and server errors under the same idempotency key so the endpoint acts
+        on it only once.
+        """
+        headers = {"Idempotency-Key": generate_id()}
+        for attempt in range(INVOKE_MAX_ATTEMPTS):
+            try:
+                async with httpx.AsyncClient(timeout=5.0) as client:
+                    response = await client.post(
+                        url=f"{self._get_base_url(is_dev)}/{route}", json=payload.model_dump(), headers=headers
                     )
-                return response.json()
-        except (httpcore.ReadTimeout, httpcore.ConnectTimeout, httpx.TimeoutException):
-            pass
+                if response.status_code == 200:
+                    return response.json()
+                error = httpx.HTTPStatusError(
+                    message=f"Failed to invoke {route}: {response.text}",
+                    request=response.request,
+                    response=response,
+                )
+                if response.status_code < 500:
+                    raise error
+            except httpx.TransportError as e:
+                error = e
+
+            logger.warning(f"Failed to invoke {route} (attempt {attempt + 1}/{INVOKE_MAX_ATTEMPTS}): {error}")
+            if attempt + 1 < INVOKE_MAX_ATTEMPTS:
+                await asyncio.sleep(INVOKE_RETRY_BACKOFF_SECONDS * 2**attempt)
+        raise error
 
     def _get_base_url(self, is_dev: bool) -> str:
         if is_dev:
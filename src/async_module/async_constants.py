@@ -1,2 +1,5 @@
 LOCAL_URL = "http://127.0.0.1:8000"
 PROD_URL = "https://<your-prod-server-url>"
+
+INVOKE_MAX_ATTEMPTS = 3
+INVOKE_RETRY_BACKOFF_SECONDS = 1.0
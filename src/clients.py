@@ -1,95 +1,198 @@
 """
 Module initializing clients that are used globally in the app.
+
+Clients are created on first use, and their SDKs imported then, so a job only pays for the clients it uses.
 """
 
-from typing import Optional
-
-from src.async_module import AsyncClient
-from src.email import EmailClient
-from src.firebase import FirestoreClient, StorageClient
-from src.github import GithubClient
-from src.google import GcrClient, SecretClient
-from src.payment import StripeClient
-
-async_client: Optional[AsyncClient] = None
-email_client: Optional[EmailClient] = None
-firestore_client: Optional[FirestoreClient] = None
-gcr_client: Optional[GcrClient] = None
-github_client: Optional[GithubClient] = None
-secret_client: Optional[SecretClient] = None
-storage_client: Optional[StorageClient] = None
-stripe_client: Optional[StripeClient] = None
-
-
-async def initialize_clients_async():
-    global \
-        async_client, \
-        email_client, \
-        firestore_client, \
-        gcr_client, \
-        github_client, \
-        secret_client, \
-        storage_client, \
-        stripe_client
-
-    async_client = AsyncClient()
-    email_client = EmailClient()
-    firestore_client = FirestoreClient()
-    gcr_client = GcrClient()
-    secret_client = SecretClient()
-    storage_client = StorageClient()
-    github_client = GithubClient()
-    stripe_client = StripeClient()
+import os
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from psycopg_pool import AsyncConnectionPool
+
+    from src.async_module import AsyncClient
+    from src.email import EmailClient
+    from src.firebase import FirestoreClient, StorageClient
+    from src.github import GithubClient
+    from src.google import GcrClient, SecretClient
+    from src.job import JobQueue, JobQueueBackend
+    from src.payment import StripeClient
+
+async_client: Optional["AsyncClient"] = None
+db_pool: Optional["AsyncConnectionPool"] = None
+email_client: Optional["EmailClient"] = None
+firestore_client: Optional["FirestoreClient"] = None
+gcr_client: Optional["GcrClient"] = None
+github_client: Optional["GithubClient"] = None
+job_queue: Optional["JobQueue"] = None
+secret_client: Optional["SecretClient"] = None
+storage_client: Optional["StorageClient"] = None
+stripe_client: Optional["StripeClient"] = None
+
+clients_initialized = False
+firestore_cache_enabled = False
+
+
+async def initialize_clients_async(enable_firestore_cache: bool = False):
+    """
+    Allow the clients to be created. Each client is created by its getter the first time it is used.
+    """
+    global clients_initialized, firestore_cache_enabled
+
+    clients_initialized = True
+    firestore_cache_enabled = enable_firestore_cache
+
+
+async def initialize_db_pool_async(min_size: int, max_size: int, timeout: float):
+    """
+    Open the process-wide Postgres connection pool used by the LangGraph checkpointers.
+    """
+    global db_pool
+
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+
+    db_pool = AsyncConnectionPool(
+        conninfo=os.getenv("DB_URI"),
+        min_size=min_size,
+        max_size=max_size,
+        timeout=timeout,
+        kwargs={"autocommit": True, "prepare_threshold": None, "row_factory": dict_row},
+        check=AsyncConnectionPool.check_connection,
+        open=False,
+    )
+    await db_pool.open()
+
+
+def initialize_job_queue(backend: "JobQueueBackend"):
+    """
+    Create the job queue shared by the endpoints scheduling jobs and the job dispatcher.
+    """
+    global job_queue
+
+    from src.job import FirestoreJobQueue, JobQueueBackend, SqliteJobQueue
+
+    if backend == JobQueueBackend.SQLITE:
+        job_queue = SqliteJobQueue(os.getenv("JOB_QUEUE_SQLITE_PATH", ":memory:"))
+    else:
+        job_queue = FirestoreJobQueue(get_firestore_client())
 
 
 async def cleanup_clients_async():
     if github_client:
         await github_client.close_async()
+    if db_pool:
+        await db_pool.close()
+
 
+def get_async_client() -> "AsyncClient":
+    global async_client
 
-def get_async_client() -> AsyncClient:
     if async_client is None:
-        raise RuntimeError("Clients not initialized. Call init_clients() first.")
+        _check_clients_initialized()
+        from src.async_module import AsyncClient
+
+        async_client = AsyncClient()
     return async_client
 
 
-def get_email_client() -> EmailClient:
+def get_db_pool() -> "AsyncConnectionPool":
+    if db_pool is None:
+        raise RuntimeError("Database pool not initialized. Call initialize_db_pool_async() first.")
+    return db_pool
+
+
+def get_email_client() -> "EmailClient":
+    global email_client
+
     if email_client is None:
-        raise RuntimeError("Clients not initialized. Call init_clients() first.")
+        _check_clients_initialized()
+        from src.email import EmailClient
+
+        email_client = EmailClient()
     return email_client
 
 
-def get_firestore_client() -> FirestoreClient:
+def get_firestore_client() -> "FirestoreClient":
+    global firestore_client
+
     if firestore_client is None:
-        raise RuntimeError("Clients not initialized. Call init_clients() first.")
+        _check_clients_initialized()
+        from src.firebase import FirestoreClient
+
+        firestore_client = (
+            FirestoreClient.with_entity_cache(
+                max_size=int(os.getenv("FIRESTORE_CACHE_MAX_SIZE", "1024")),
+                ttl_seconds=float(os.getenv("FIRESTORE_CACHE_TTL_SECONDS", "300")),
+                max_listeners=int(os.getenv("FIRESTORE_CACHE_MAX_LISTENERS", "64")),
+            )
+            if firestore_cache_enabled
+            else FirestoreClient()
+        )
     return firestore_client
 
 
-def get_gcr_client() -> GcrClient:
+def get_gcr_client() -> "GcrClient":
+    global gcr_client
+
     if gcr_client is None:
-        raise RuntimeError("Clients not initialized. Call init_clients() first.")
+        _check_clients_initialized()
+        from src.google import GcrClient
+
+        gcr_client = GcrClient()
     return gcr_client
 
 
-def get_github_client() -> GithubClient:
+def get_github_client() -> "GithubClient":
+    global github_client
+
     if github_client is None:
-        raise RuntimeError("Clients not initialized. Call init_clients() first.")
+        _check_clients_initialized()
+        from src.github import GithubClient
+
+        github_client = GithubClient()
     return github_client
 
 
-def get_secret_client() -> SecretClient:
+def get_job_queue() -> "JobQueue":
+    if job_queue is None:
+        raise RuntimeError("Job queue not initialized. Call initialize_job_queue() first.")
+    return job_queue
+
+
+def get_secret_client() -> "SecretClient":
+    global secret_client
+
     if secret_client is None:
-        raise RuntimeError("Clients not initialized. Call init_clients() first.")
+        _check_clients_initialized()
+        from src.google import SecretClient
+
+        secret_client = SecretClient()
     return secret_client
 
 
-def get_storage_client() -> StorageClient:
+def get_storage_client() -> "StorageClient":
+    global storage_client
+
     if storage_client is None:
-        raise RuntimeError("Clients not initialized. Call init_clients() first.")
+        _check_clients_initialized()
+        from src.firebase import StorageClient
+
+        storage_client = StorageClient()
     return storage_client
 
 
-def get_stripe_client() -> StripeClient:
+def get_stripe_client() -> "StripeClient":
+    global stripe_client
+
     if stripe_client is None:
-        raise RuntimeError("Clients not initialized. Call init_clients() first.")
+        _check_clients_initialized()
+        from src.payment import StripeClient
+
+        stripe_client = StripeClient()
     return stripe_client
+
+
+def _check_clients_initialized():
+    if not clients_initialized:
+        raise RuntimeError("Clients not initialized. Call init_clients() first.")
@@ -9,6 +9,8 @@ import aiofiles
 
 from src.agent import ClaudeCodeAgent, OutputFormatter
 from src.clients import get_firestore_client, get_github_client
+from src.firebase.firestore_batch import FirestoreBatch
+from src.github import ClonePolicy
 from src.model.agent.response import GeneratedSubtasks
 from src.model.app import Org
 from src.model.app.project import Project
@@ -17,7 +19,6 @@ from src.prompt.execute_task_prompt import EXECUTE_TASK_PROMPT, EXECUTE_TASK_SYS
 from src.prompt.generate_subtasks_prompt import GENERATE_SUBTASKS_PROMPT
 from src.utils.bootstrap_utils import bootstrap_application_async, create_bootstrap_config
 from src.utils.diff_utils import generate_diff_files_async
-from src.utils.filesystem_utils import cleanup_directory_async
 from src.utils.git_utils import (
     add_and_commit_changes,
     create_and_checkout_branch,
@@ -25,7 +26,7 @@ from src.utils.git_utils import (
     get_current_commit,
     get_parent_commit,
 )
-from src.utils.setup_utils import setup_ephemeral_repo_async
+from src.utils.workspace_pool import acquire_workspace_async, release_workspace_async
 
 logger = logging.getLogger(__name__)
 
@@ -39,18 +40,17 @@ async def execute_task_async(org_id: str, task_id: str, is_dev: bool):
         )
 
         # clone repo
-        org = await firestore_client.get_org_async(org_id)
-        task = await firestore_client.get_task_async(org_id, task_id)
-        project = await firestore_client.get_project_async(org_id, task.project_id)
-        task_directory, repo_directory = await setup_ephemeral_repo_async(org.github_installation_id, project.repo)
+        org, task, project, _ = await firestore_client.load_task_async(org_id, task_id)
+        task_directory, repo_directory = await acquire_workspace_async(
+            org.github_installation_id, project.repo, ClonePolicy.SHALLOW
+        )
         await _generate_claude_md_async(repo_directory, is_dev)
 
-        # record base commit
+        # generate tasks, written together with the base commit
         base_commit = get_current_commit(repo_directory)
-        await firestore_client.update_task_async(org_id, task_id, base_commit=base_commit)
-
-        # generate tasks
-        await _generate_subtasks_async(org_id, task, repo_directory, is_dev)
+        async with firestore_client.batch_async() as batch:
+            batch.update_task(org_id, task_id, base_commit=base_commit)
+            await _generate_subtasks_async(batch, org_id, task, repo_directory, is_dev)
 
         # execute the tasks
         branch_name = generate_branch_name(task.title)
@@ -60,18 +60,18 @@ async def execute_task_async(org_id: str, task_id: str, is_dev: bool):
 
         # raise a PR
         pull_request = await _raise_pull_request_async(org, project, task, subtasks, branch_name)
-        await firestore_client.create_pull_request_async(pull_request)
-
         diff_files = await generate_diff_files_async(repo_directory, subtasks[-1].pull_request_commit, base_commit)
-        await get_firestore_client().update_task_async(
-            org_id,
-            task.id,
-            diff_files=[diff_file.model_dump() for diff_file in diff_files],
-            pull_request_url=pull_request.pull_request_url,
-            pull_request_branch=branch_name,
-            status=TaskStatus.PENDING_REVIEW,
-            last_updated=datetime.now(timezone.utc),
-        )
+        async with firestore_client.batch_async() as batch:
+            batch.create_pull_request(pull_request)
+            batch.update_task(
+                org_id,
+                task.id,
+                diff_files=[diff_file.model_dump() for diff_file in diff_files],
+                pull_request_url=pull_request.pull_request_url,
+                pull_request_branch=branch_name,
+                status=TaskStatus.PENDING_REVIEW,
+                last_updated=datetime.now(timezone.utc),
+            )
 
         logger.info(f"Finished executing task: {task_id}")
     except Exception:
@@ -81,7 +81,7 @@ async def execute_task_async(org_id: str, task_id: str, is_dev: bool):
         )
         sys.exit(1)
     finally:
-        await cleanup_directory_async(task_directory)
+        await release_workspace_async(task_directory)
 
 
 async def _generate_claude_md_async(repo_directory: str, is_dev: bool):
@@ -93,7 +93,7 @@ async def _generate_claude_md_async(repo_directory: str, is_dev: bool):
         raise
 
 
-async def _generate_subtasks_async(org_id: str, task: Task, repo_directory: str, is_dev: bool) -> list[str]:
+async def _generate_subtasks_async(batch: FirestoreBatch, org_id: str, task: Task, repo_directory: str, is_dev: bool):
     try:
         agent = ClaudeCodeAgent(
             repo_directory,
@@ -108,14 +108,13 @@ async def _generate_subtasks_async(org_id: str, task: Task, repo_directory: str,
             output = await file.read()
             result = await formatter.format_output_async(output, GeneratedSubtasks)
 
-        firestore_client = get_firestore_client()
         for i, generated_subtask in enumerate(result.subtasks):
             subtask = Subtask(
                 order=i + 1,
                 title=generated_subtask.title,
                 steps=generated_subtask.steps,
             )
-            await firestore_client.create_subtask_async(org_id, task.id, subtask)
+            batch.create_subtask(org_id, task.id, subtask)
     except Exception as e:
         logger.error(f"Failed to generate tasks: {e}")
         raise
@@ -141,15 +140,19 @@ async def _execute_subtasks_async(
     firestore_client = get_firestore_client()
     agent = ClaudeCodeAgent(repo_directory, append_system_prompt=EXECUTE_TASK_SYSTEM_PROMPT, verbose=is_dev)
     subtasks = await firestore_client.get_subtasks_async(org.id, task.id)
+
+    # the completion of a subtask is committed together with the start of the next one
+    batch = firestore_client.batch()
     for i, subtask in enumerate(subtasks):
         try:
-            await firestore_client.update_subtask_async(
-                org_id=org.id,
-                task_id=task.id,
-                subtask_id=subtask.id,
+            batch.update_subtask(
+                org.id,
+                task.id,
+                subtask.id,
                 status=SubtaskStatus.IN_PROGRESS,
                 last_updated=datetime.now(timezone.utc),
             )
+            await firestore_client.commit_batch_async(batch)
             await agent.run_async(prompt=_get_execute_task_prompt(task, subtask, i + 1, completed_commits))
             await agent.run_async(prompt=REMOVE_COMMENTS_PROMPT)
 
@@ -157,39 +160,46 @@ async def _execute_subtasks_async(
             if commit_hash:
                 completed_commits.append(commit_hash)
                 await _push_changes_async(org.github_installation_id, project.repo, repo_directory, branch_name)
-            await _complete_subtask_async(org.id, task, subtask, repo_directory, commit_hash)
+            await _complete_subtask_async(batch, org.id, task, subtask, repo_directory, commit_hash)
 
             logger.info(f"Finished executing subtask: {subtask.id}")
         except Exception as e:
             logger.error(f"Failed to execute subtask {subtask.id}: {e}")
-            await firestore_client.update_subtask_async(
-                org_id=org.id,
-                task_id=task.id,
-                subtask_id=subtask.id,
+            batch.update_subtask(
+                org.id,
+                task.id,
+                subtask.id,
                 status=SubtaskStatus.FAILED,
                 last_updated=datetime.now(timezone.utc),
             )
+            await firestore_client.commit_batch_async(batch)
             raise
 
-    return await firestore_client.get_subtasks_async(org.id, task.id)
+    await firestore_client.commit_batch_async(batch)
+    return subtasks
 
 
 async def _complete_subtask_async(
-    org_id: str, task: Task, subtask: Subtask, repo_directory: str, commit_hash: str | None
+    batch: FirestoreBatch, org_id: str, task: Task, subtask: Subtask, repo_directory: str, commit_hash: str | None
 ):
     diff_files = []
     if commit_hash:
         base_commit = get_parent_commit(repo_directory, commit_hash)
         diff_files = await generate_diff_files_async(repo_directory, commit_hash, base_commit)
 
-    await get_firestore_client().update_subtask_async(
-        org_id=org_id,
-        task_id=task.id,
-        subtask_id=subtask.id,
-        pull_request_commit=commit_hash or "",
+    # the local copy is kept in sync instead of reading the subtasks back after execution
+    subtask.pull_request_commit = commit_hash or ""
+    subtask.diff_files = diff_files
+    subtask.status = SubtaskStatus.COMPLETED
+    subtask.last_updated = datetime.now(timezone.utc)
+    batch.update_subtask(
+        org_id,
+        task.id,
+        subtask.id,
+        pull_request_commit=subtask.pull_request_commit,
         diff_files=[diff_file.model_dump() for diff_file in diff_files],
-        status=SubtaskStatus.COMPLETED,
-        last_updated=datetime.now(timezone.utc),
+        status=subtask.status,
+        last_updated=subtask.last_updated,
     )
 
 
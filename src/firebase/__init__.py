@@ -1,5 +1,22 @@
-from src.firebase.firestore_client import FirestoreClient
-from src.firebase.storage_client import StorageClient
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.firebase.firestore_client import FirestoreClient
+    from src.firebase.storage_client import StorageClient
+
+# each client imports its SDK, which is only imported when the client is first used
+_MODULES = {
+    "FirestoreClient": "src.firebase.firestore_client",
+    "StorageClient": "src.firebase.storage_client",
+}
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_MODULES[name]), name)
+
 
 __all__ = [
     "FirestoreClient",
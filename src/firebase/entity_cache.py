@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+Unsubscribe = Callable[[], None]
+
+logger = logging.getLogger(__name__)
+
+
+class EntityCache:
+    """
+    Size-bounded LRU cache of Firestore document data keyed by document path, with a TTL per entry.
+
+    The cache is thread-safe because Firestore snapshot listeners refresh entries from their own threads.
+    When a `watch` function is given, it is called for newly cached paths to subscribe to external changes, and the
+    returned unsubscribe function is called when the path is evicted. Only the `max_listeners` most recently cached
+    paths are watched, each listener being a stream of its own. Entries that lose their listener expire after at most
+    `unwatched_ttl_seconds`. Listeners are (un)subscribed on a background thread, since subscribing blocks.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 300.0,
+        watch: Optional[Callable[[str], Unsubscribe]] = None,
+        max_listeners: int = 64,
+        unwatched_ttl_seconds: float = 5.0,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.watch = watch
+        self.max_listeners = max_listeners
+        self.unwatched_ttl_seconds = unwatched_ttl_seconds
+        self.entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        # watched paths, least recently cached first
+        self.unsubscribes: OrderedDict[str, Unsubscribe] = OrderedDict()
+        self.listener_executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="entity-cache-listeners") if watch else None
+        )
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str) -> Optional[dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, path: str, data: dict[str, Any]):
+        unsubscribes = []
+        now = time.monotonic()
+        with self.lock:
+            self.entries[path] = (now + self.ttl_seconds, data)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_size:
+                evicted_path, _ = self.entries.popitem(last=False)
+                self.evictions += 1
+                if evicted_path in self.unsubscribes:
+                    unsubscribes.append(self.unsubscribes.pop(evicted_path))
+
+            should_watch = self.watch is not None and path not in self.unsubscribes
+            if should_watch:
+                # reserve the slot so concurrent puts of the same path subscribe only once
+                self.unsubscribes[path] = _noop
+            if path in self.unsubscribes:
+                self.unsubscribes.move_to_end(path)
+            while len(self.unsubscribes) > self.max_listeners:
+                unwatched_path, unsubscribe = self.unsubscribes.popitem(last=False)
+                unsubscribes.append(unsubscribe)
+                # external changes to it are no longer seen, so it is only served for a short while
+                entry = self.entries.get(unwatched_path)
+                if entry:
+                    self.entries[unwatched_path] = (min(entry[0], now + self.unwatched_ttl_seconds), entry[1])
+
+        if self.listener_executor and (unsubscribes or should_watch):
+            self.listener_executor.submit(self._update_listeners, unsubscribes, path if should_watch else None)
+
+    def refresh(self, path: str, data: Optional[dict[str, Any]]):
+        """
+        Replace the data of a cached path after an external change. Paths that are no longer cached are ignored.
+        """
+        with self.lock:
+            if path not in self.entries:
+                return
+            if data is None:
+                self.entries[path] = (0.0, {})
+            else:
+                self.entries[path] = (time.monotonic() + self.ttl_seconds, data)
+
+    def invalidate(self, path: str):
+        # the entry is expired rather than removed, so its listener is still released on LRU eviction
+        with self.lock:
+            if path in self.entries:
+                self.entries[path] = (0.0, {})
+
+    def _update_listeners(self, unsubscribes: list[Unsubscribe], path: Optional[str]):
+        # listeners are (un)subscribed outside the lock, their callbacks need it
+        for unsubscribe in unsubscribes:
+            try:
+                unsubscribe()
+            except Exception as e:
+                logger.warning(f"Failed to unsubscribe cache listener: {e}")
+        if path is None:
+            return
+
+        try:
+            unsubscribe = self.watch(path)
+        except Exception as e:
+            logger.warning(f"Failed to subscribe cache listener of {path}: {e}")
+            with self.lock:
+                if self.unsubscribes.get(path) is _noop:
+                    del self.unsubscribes[path]
+            return
+        with self.lock:
+            # the reservation is gone or taken over when the path lost its listener in the meantime
+            is_watched = self.unsubscribes.get(path) is _noop
+            if is_watched:
+                self.unsubscribes[path] = unsubscribe
+        if not is_watched:
+            unsubscribe()
+
+    def get_stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "listeners": len(self.unsubscribes),
+            }
+
+
+def _noop():
+    pass
@@ -0,0 +1,66 @@
+from typing import Any
+
+from src.model.app.task import Message, PullRequest, Subtask, Task
+
+
+class FirestoreBatch:
+    """
+    Unit of work that collects document writes until they are committed by `FirestoreClient.commit_batch_async`.
+
+    Updates to the same document are merged into a single write where later values win, and updates to a
+    document created in the same batch are folded into its creation. Field names are top-level fields, not
+    dotted field paths.
+    """
+
+    def __init__(self):
+        self.sets: dict[str, dict[str, Any]] = {}
+        self.updates: dict[str, dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.sets) + len(self.updates)
+
+    def set(self, path: str, data: dict[str, Any]):
+        self.sets[path] = data
+        self.updates.pop(path, None)
+
+    def update(self, path: str, **kwargs):
+        if path in self.sets:
+            self.sets[path].update(kwargs)
+        else:
+            self.updates.setdefault(path, {}).update(kwargs)
+
+    def clear(self):
+        self.sets = {}
+        self.updates = {}
+
+    # ========================================
+    # ENTITY OPERATIONS
+    # ========================================
+
+    def update_user(self, user_id: str, **kwargs):
+        self.update(f"users/{user_id}", **kwargs)
+
+    def create_task(self, org_id: str, task: Task) -> Task:
+        self.set(f"orgs/{org_id}/tasks/{task.id}", task.model_dump())
+        return task
+
+    def update_task(self, org_id: str, task_id: str, **kwargs):
+        self.update(f"orgs/{org_id}/tasks/{task_id}", **kwargs)
+
+    def create_subtask(self, org_id: str, task_id: str, subtask: Subtask) -> Subtask:
+        self.set(f"orgs/{org_id}/tasks/{task_id}/subtasks/{subtask.id}", subtask.model_dump())
+        return subtask
+
+    def update_subtask(self, org_id: str, task_id: str, subtask_id: str, **kwargs):
+        self.update(f"orgs/{org_id}/tasks/{task_id}/subtasks/{subtask_id}", **kwargs)
+
+    def update_message(self, org_id: str, task_id: str, message_id: str, **kwargs):
+        self.update(f"orgs/{org_id}/tasks/{task_id}/messages/{message_id}", **kwargs)
+
+    def create_message(self, org_id: str, task_id: str, message: Message) -> Message:
+        self.set(f"orgs/{org_id}/tasks/{task_id}/messages/{message.id}", message.model_dump())
+        return message
+
+    def create_pull_request(self, pull_request: PullRequest) -> PullRequest:
+        self.set(f"prs/{pull_request.id}", pull_request.model_dump())
+        return pull_request
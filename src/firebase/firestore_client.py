@@ -1,19 +1,29 @@
-from typing import Optional
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
 
 from firebase_admin import firestore, firestore_async
 
 from google.api_core import retry
-from google.api_core.exceptions import Unknown
+from google.api_core.exceptions import AlreadyExists, Unknown
+from google.cloud.firestore_v1.async_document import AsyncDocumentReference
+from google.cloud.firestore_v1.async_transaction import AsyncTransaction, async_transactional
+from src.firebase.entity_cache import EntityCache, Unsubscribe
+from src.firebase.firestore_batch import FirestoreBatch
 from src.model.app import Org, Profile, User
 from src.model.app.project import Project, Repository
 from src.model.app.task import Message, MessageEvent, PullRequest, Subtask, Task
 from src.model.auth import EmailCode, Invite
+from src.model.job import Job, JobStatus
 from src.model.payment import StripeCustomer
 from src.model.slack import SlackCustomer
 from src.model.support import Lead
 
 firestore_retry = retry.AsyncRetry(predicate=retry.if_exception_type(Unknown))
 
+# Firestore rejects write batches with more writes than this
+MAX_WRITES_PER_BATCH = 500
+
 
 class FirestoreClient:
     """
@@ -21,8 +31,116 @@ class FirestoreClient:
     Provides CRUD operations for all application entities with consistent error handling.
     """
 
-    def __init__(self):
+    def __init__(self, entity_cache: Optional[EntityCache] = None):
         self.client = firestore_async.client()
+        self.entity_cache = entity_cache
+
+    @classmethod
+    def with_entity_cache(
+        cls, max_size: int = 1024, ttl_seconds: float = 300.0, max_listeners: int = 64
+    ) -> "FirestoreClient":
+        """
+        Create a client that caches org, project and task reads in process.
+
+        Cached documents are invalidated by this client's own writes and refreshed by snapshot listeners on
+        external writes, for the `max_listeners` most recently read documents. Snapshot listeners are only available
+        on the synchronous client.
+        """
+        watch_client = firestore.client()
+
+        def watch(path: str) -> Unsubscribe:
+            def on_snapshot(doc_snapshots, changes, read_time):
+                for doc_snapshot in doc_snapshots:
+                    entity_cache.refresh(path, doc_snapshot.to_dict() if doc_snapshot.exists else None)
+
+            return watch_client.document(path).on_snapshot(on_snapshot).unsubscribe
+
+        entity_cache = EntityCache(max_size=max_size, ttl_seconds=ttl_seconds, watch=watch, max_listeners=max_listeners)
+        return cls(entity_cache)
+
+    def get_cache_stats(self) -> dict[str, int]:
+        if not self.entity_cache:
+            return {}
+        return self.entity_cache.get_stats()
+
+    # ========================================
+    # BATCH OPERATIONS
+    # ========================================
+
+    def batch(self) -> FirestoreBatch:
+        return FirestoreBatch()
+
+    @asynccontextmanager
+    async def batch_async(self) -> AsyncIterator[FirestoreBatch]:
+        """
+        Collect writes in a batch that is committed when the block exits without an exception.
+        """
+        batch = self.batch()
+        yield batch
+        await self.commit_batch_async(batch)
+
+    async def commit_batch_async(self, batch: FirestoreBatch) -> int:
+        """
+        Commit the pending writes of the batch in as few write batches as possible and clear it.
+
+        Writes within a write batch are atomic, but a batch with more than `MAX_WRITES_PER_BATCH` writes is
+        committed in several write batches. Returns the number of committed writes.
+        """
+        writes = [(path, data, True) for path, data in batch.sets.items()]
+        writes += [(path, fields, False) for path, fields in batch.updates.items()]
+        for start in range(0, len(writes), MAX_WRITES_PER_BATCH):
+            await self._commit_writes_async(writes[start : start + MAX_WRITES_PER_BATCH])
+
+        # cleared only once committed, so a failed batch can still be retried with more writes folded in
+        batch.clear()
+        return len(writes)
+
+    # ========================================
+    # LOADER OPERATIONS
+    # ========================================
+
+    @firestore_retry
+    async def get_all_async(self, paths: list[str]) -> dict[str, Optional[dict[str, Any]]]:
+        """
+        Read the documents at the given paths in a single `get_all` round trip, reading cached documents from the
+        entity cache instead. Returns the data of every path, None for missing documents.
+        """
+        documents: dict[str, Optional[dict[str, Any]]] = {}
+        doc_refs = []
+        for path in dict.fromkeys(paths):
+            data = self.entity_cache.get(path) if self.entity_cache else None
+            if data is not None:
+                documents[path] = data
+            else:
+                doc_refs.append(self.client.document(path))
+
+        if doc_refs:
+            async for doc in self.client.get_all(doc_refs):
+                data = doc.to_dict() if doc.exists else None
+                documents[doc.reference.path] = data
+                if self.entity_cache and data is not None:
+                    self.entity_cache.put(doc.reference.path, data)
+        return documents
+
+    async def load_task_async(
+        self, org_id: str, task_id: str, include_subtasks: bool = False
+    ) -> tuple[Org, Task, Project, list[Subtask]]:
+        """
+        Load a task with its org, project and, optionally, its subtasks in two round trips: the org and task are read
+        together while the subtasks are queried, then the project the task belongs to.
+        """
+        org_path = f"orgs/{org_id}"
+        task_path = f"orgs/{org_id}/tasks/{task_id}"
+        if include_subtasks:
+            documents, subtasks = await asyncio.gather(
+                self.get_all_async([org_path, task_path]), self.get_subtasks_async(org_id, task_id)
+            )
+        else:
+            documents, subtasks = await self.get_all_async([org_path, task_path]), []
+        org = Org(**documents[org_path])
+        task = Task(**documents[task_path])
+        project = await self.get_project_async(org_id, task.project_id)
+        return org, task, project, subtasks
 
     # ========================================
     # USER OPERATIONS
@@ -43,10 +161,15 @@ class FirestoreClient:
         return User(**user_doc.to_dict())
 
     @firestore_retry
-    async def update_user_async(self, user_id: str, **kwargs) -> User:
+    async def update_user_async(self, user_id: str, read_back: bool = True, **kwargs) -> Optional[User]:
+        """
+        Update the user and return the updated user, or None without `read_back` to skip reading it again.
+        """
         user_col_ref = self.client.collection("users")
         user_doc_ref = user_col_ref.document(user_id)
         await user_doc_ref.update(kwargs)
+        if not read_back:
+            return None
         updated_user_doc = await user_doc_ref.get()
         return User(**updated_user_doc.to_dict())
 
@@ -81,6 +204,7 @@ class FirestoreClient:
         org_col_ref = self.client.collection("orgs")
         org_doc_ref = org_col_ref.document(org.id)
         await org_doc_ref.set(org.model_dump())
+        self._invalidate_cache(org_doc_ref)
         return org
 
     @firestore_retry
@@ -88,13 +212,13 @@ class FirestoreClient:
         org_col_ref = self.client.collection("orgs")
         org_doc_ref = org_col_ref.document(org_id)
         await org_doc_ref.update(kwargs)
+        self._invalidate_cache(org_doc_ref)
 
     @firestore_retry
     async def get_org_async(self, org_id: str) -> Org:
         org_col_ref = self.client.collection("orgs")
         org_doc_ref = org_col_ref.document(org_id)
-        org_doc = await org_doc_ref.get()
-        return Org(**org_doc.to_dict())
+        return Org(**await self._get_cached_async(org_doc_ref))
 
     # ========================================
     # PROJECT OPERATIONS
@@ -105,14 +229,14 @@ class FirestoreClient:
         project_col_ref = self.client.collection(f"orgs/{org_id}/projects")
         project_doc_ref = project_col_ref.document(project.id)
         await project_doc_ref.set(project.model_dump())
+        self._invalidate_cache(project_doc_ref)
         return project
 
     @firestore_retry
     async def get_project_async(self, org_id: str, project_id: str) -> Project:
         proj_col_ref = self.client.collection(f"orgs/{org_id}/projects")
         proj_doc_ref = proj_col_ref.document(project_id)
-        proj_doc = await proj_doc_ref.get()
-        return Project(**proj_doc.to_dict())
+        return Project(**await self._get_cached_async(proj_doc_ref))
 
     @firestore_retry
     async def get_projects_async(self, org_id: str) -> list[Project]:
@@ -125,6 +249,7 @@ class FirestoreClient:
         proj_col_ref = self.client.collection(f"orgs/{org_id}/projects")
         proj_doc_ref = proj_col_ref.document(project_id)
         await proj_doc_ref.update(kwargs)
+        self._invalidate_cache(proj_doc_ref)
 
     # ========================================
     # TASK OPERATIONS
@@ -135,20 +260,21 @@ class FirestoreClient:
         task_col_ref = self.client.collection(f"orgs/{org_id}/tasks")
         task_doc_ref = task_col_ref.document(task.id)
         await task_doc_ref.set(task.model_dump())
+        self._invalidate_cache(task_doc_ref)
         return task
 
     @firestore_retry
     async def get_task_async(self, org_id: str, task_id: str) -> Task:
         task_col_ref = self.client.collection(f"orgs/{org_id}/tasks")
         task_doc_ref = task_col_ref.document(task_id)
-        task_doc = await task_doc_ref.get()
-        return Task(**task_doc.to_dict())
+        return Task(**await self._get_cached_async(task_doc_ref))
 
     @firestore_retry
     async def update_task_async(self, org_id: str, task_id: str, **kwargs) -> None:
         task_col_ref = self.client.collection(f"orgs/{org_id}/tasks")
         task_doc_ref = task_col_ref.document(task_id)
         await task_doc_ref.update(kwargs)
+        self._invalidate_cache(task_doc_ref)
 
     # ========================================
     # SUBTASK OPERATIONS
@@ -383,3 +509,92 @@ class FirestoreClient:
         if not slack_customer_doc.exists:
             return None
         return SlackCustomer(**slack_customer_doc.to_dict())
+
+    # ========================================
+    # JOB OPERATIONS
+    # ========================================
+
+    @firestore_retry
+    async def create_job_async(self, job: Job) -> tuple[Job, bool]:
+        """
+        Create the job unless a job with the same ID exists. Returns the stored job and whether it was created.
+        """
+        job_col_ref = self.client.collection("jobs")
+        job_doc_ref = job_col_ref.document(job.id)
+        try:
+            await job_doc_ref.create(job.model_dump())
+            return job, True
+        except AlreadyExists:
+            job_doc = await job_doc_ref.get()
+            return Job(**job_doc.to_dict()), False
+
+    @firestore_retry
+    async def get_job_async(self, job_id: str) -> Optional[Job]:
+        job_col_ref = self.client.collection("jobs")
+        job_doc = await job_col_ref.document(job_id).get()
+        if not job_doc.exists:
+            return None
+        return Job(**job_doc.to_dict())
+
+    @firestore_retry
+    async def get_jobs_async(self, status: JobStatus) -> list[Job]:
+        job_col_ref = self.client.collection("jobs")
+        job_docs = await job_col_ref.where(filter=firestore.FieldFilter("status", "==", status)).get()
+        return [Job(**job_doc.to_dict()) for job_doc in job_docs]
+
+    @firestore_retry
+    async def update_job_async(self, job_id: str, **kwargs) -> None:
+        job_col_ref = self.client.collection("jobs")
+        await job_col_ref.document(job_id).update(kwargs)
+
+    @firestore_retry
+    async def transition_job_async(self, job_id: str, from_status: JobStatus, **kwargs) -> Optional[Job]:
+        """
+        Update the job only if it is still in the given status, so concurrent dispatchers never both claim it.
+        Returns the updated job, or None when its status changed in the meantime.
+        """
+        job_doc_ref = self.client.collection("jobs").document(job_id)
+
+        @async_transactional
+        async def transition_async(transaction: AsyncTransaction) -> Optional[Job]:
+            job_doc = await job_doc_ref.get(transaction=transaction)
+            if not job_doc.exists or job_doc.get("status") != from_status:
+                return None
+            transaction.update(job_doc_ref, kwargs)
+            return Job(**{**job_doc.to_dict(), **kwargs})
+
+        return await transition_async(self.client.transaction())
+
+    # ========================================
+    # PRIVATE METHODS
+    # ========================================
+
+    async def _get_cached_async(self, doc_ref: AsyncDocumentReference) -> dict[str, Any]:
+        if self.entity_cache:
+            data = self.entity_cache.get(doc_ref.path)
+            if data is not None:
+                return data
+
+        doc = await doc_ref.get()
+        data = doc.to_dict()
+        if self.entity_cache and data is not None:
+            self.entity_cache.put(doc_ref.path, data)
+        return data
+
+    @firestore_retry
+    async def _commit_writes_async(self, writes: list[tuple[str, dict[str, Any], bool]]):
+        write_batch = self.client.batch()
+        for path, data, is_set in writes:
+            doc_ref = self.client.document(path)
+            if is_set:
+                write_batch.set(doc_ref, data)
+            else:
+                write_batch.update(doc_ref, data)
+        await write_batch.commit()
+        for path, _, _ in writes:
+            if self.entity_cache:
+                self.entity_cache.invalidate(path)
+
+    def _invalidate_cache(self, doc_ref: AsyncDocumentReference):
+        if self.entity_cache:
+            self.entity_cache.invalidate(doc_ref.path)
@@ -1,3 +1,9 @@
+from src.github.clone_policy import ClonePolicy
 from src.github.github_client import GithubClient
+from src.github.request_priority import RequestPriority
 
-__all__ = ["GithubClient"]
+__all__ = [
+    "ClonePolicy",
+    "GithubClient",
+    "RequestPriority",
+]
@@ -0,0 +1,24 @@
+from enum import Enum
+
+
+class ClonePolicy(str, Enum):
+    """
+    How much of a repository is cloned into a task workspace
+    """
+
+    FULL = "full"
+    """
+    Full history with every blob
+    """
+
+    SHALLOW = "shallow"
+    """
+    Only the tip commit, for jobs that only diff the commits they create on top of it
+    """
+
+    def get_clone_args(self) -> list[str]:
+        match self:
+            case ClonePolicy.SHALLOW:
+                return ["--depth", "1"]
+            case _:
+                return []
@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+
+
+class ETagCache:
+    """
+    Size-bounded LRU cache of GitHub GET responses that carry an ETag, keyed by request.
+
+    Cached responses are revalidated with `If-None-Match`. A 304 answer does not count against the rate limit, and
+    the cached response is served in its place.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, tuple[str, httpx.Headers, bytes]] = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_etag(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry[0] if entry else None
+
+    def put(self, key: str, response: httpx.Response):
+        etag = response.headers.get("etag")
+        if not etag or len(response.content) > self.max_bytes:
+            return
+
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (etag, response.headers, response.content)
+            self.size += len(response.content)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def get_not_modified_response(self, key: str, response: httpx.Response) -> Optional[httpx.Response]:
+        """
+        Rebuild the cached response for a 304 answer, with the rate limit headers of the 304 answer.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+        _, headers, content = entry
+        headers = httpx.Headers(headers)
+        # the cached content is already decoded
+        for name in ("content-encoding", "content-length", "transfer-encoding"):
+            headers.pop(name, None)
+        for name, value in response.headers.items():
+            if name.startswith("x-ratelimit-"):
+                headers[name] = value
+        return httpx.Response(200, headers=headers, content=content, request=response.request)
+
+    def get_stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.size -= len(entry[2])
@@ -37,7 +37,7 @@ async def _handle_issue_opened_async(event: IssuesEvent):
             continue
 
         user.subscribed_tasks.append(task.id)
-        await firestore_client.update_user_async(user.id, subscribed_tasks=user.subscribed_tasks)
+        await firestore_client.update_user_async(user.id, read_back=False, subscribed_tasks=user.subscribed_tasks)
 
 
 def _is_created_by_user(user: User, issue: Issue) -> bool:
@@ -8,9 +8,8 @@ from src.model import compute_pull_request_doc_id
 from src.model.app.task import PullRequest, Subtask, SubtaskStatus, TaskStatus
 from src.model.github import PullRequestEvent, PullRequestEventAction
 from src.utils.diff_utils import generate_diff_files_async
-from src.utils.filesystem_utils import cleanup_directory_async
 from src.utils.git_utils import checkout_branch, get_commit_message, get_parent_commit
-from src.utils.setup_utils import setup_ephemeral_repo_async
+from src.utils.workspace_pool import acquire_workspace_async, release_workspace_async
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +48,7 @@ async def _handle_synchronize_async(pull_request: PullRequest, commit_hash: str)
         firestore_client = get_firestore_client()
         org = await firestore_client.get_org_async(pull_request.org_id)
         project = await firestore_client.get_project_async(pull_request.org_id, pull_request.project_id)
-        task_directory, repo_directory = await setup_ephemeral_repo_async(org.github_installation_id, project.repo)
+        task_directory, repo_directory = await acquire_workspace_async(org.github_installation_id, project.repo)
 
         task = await firestore_client.get_task_async(pull_request.org_id, pull_request.task_id)
         checkout_branch(repo_directory, task.pull_request_branch)
@@ -65,21 +64,21 @@ async def _handle_synchronize_async(pull_request: PullRequest, commit_hash: str)
             pull_request_commit=commit_hash,
             status=SubtaskStatus.COMPLETED,
         )
-        await firestore_client.create_subtask_async(pull_request.org_id, pull_request.task_id, subtask)
-
         diff_files = await generate_diff_files_async(repo_directory, commit_hash, task.base_commit)
-        await firestore_client.update_task_async(
-            org_id=pull_request.org_id,
-            task_id=pull_request.task_id,
-            diff_files=[diff_file.model_dump() for diff_file in diff_files],
-            last_updated=datetime.now(timezone.utc),
-        )
+        async with firestore_client.batch_async() as batch:
+            batch.create_subtask(pull_request.org_id, pull_request.task_id, subtask)
+            batch.update_task(
+                pull_request.org_id,
+                pull_request.task_id,
+                diff_files=[diff_file.model_dump() for diff_file in diff_files],
+                last_updated=datetime.now(timezone.utc),
+            )
     except Exception:
         logger.error(f"Failed to handle pull_request::synchronize for: {pull_request}")
         traceback.print_exc()
         raise
     finally:
-        await cleanup_directory_async(task_directory)
+        await release_workspace_async(task_directory)
 
 
 async def _handle_closed_async(
@@ -1,42 +1,95 @@
+import asyncio
 import logging
 import traceback
+from typing import Optional
 
-from src.clients import get_firestore_client
+from src.clients import get_firestore_client, get_github_client
 from src.model import compute_repository_doc_id
+from src.model.app import Org
+from src.model.app.project import Project
 from src.model.github import PushEvent
-from src.utils.filesystem_utils import generate_project_tree_async
-from src.utils.setup_utils import setup_repo_async
+from src.utils.git_utils import is_ancestor_async
+from src.utils.mirror_utils import get_mirror_async
+from src.utils.project_tree_index import (
+    ProjectTreeIndex,
+    build_project_tree_index_async,
+    get_project_tree_index,
+    put_project_tree_index,
+)
+from src.utils.workspace_pool import schedule_refill_workspaces
 
 logger = logging.getLogger(__name__)
 
+# one lock per repository, so its pushes update the project tree one at a time
+_push_locks: dict[str, asyncio.Lock] = {}
+
 
 async def handle_push_async(event: PushEvent):
     """
     Triggered when a commit is pushed to a Github repository.
 
-    When it is pushed to the repository's default branch (e.g. main), we update project's tree.
+    When it is pushed to the repository's default branch (e.g. main), we update project's tree and refill the
+    project's workspace pool with the new commit.
     """
 
-    if event.ref != f"refs/heads/{event.repository.default_branch}":
+    if event.ref != f"refs/heads/{event.repository.default_branch}" or event.deleted:
         # ignore push to non default branch
         return
 
     firestore_client = get_firestore_client()
-    repository = await firestore_client.get_repository_async(compute_repository_doc_id(event.repository.full_name))
+    repository_id = compute_repository_doc_id(event.repository.full_name)
+    repository = await firestore_client.get_repository_async(repository_id)
     if not repository:
         return
 
     try:
-        firestore_client = get_firestore_client()
-        org = await firestore_client.get_org_async(repository.org_id)
-        project = await firestore_client.get_project_async(repository.org_id, repository.project_id)
-        repo_directory = await setup_repo_async(org, project)
-
-        updated_project_tree = await generate_project_tree_async(repo_directory)
-        if project.tree == updated_project_tree:
-            return
-        await firestore_client.update_project_async(repository.org_id, repository.project_id, tree=updated_project_tree)
+        async with _get_push_lock(repository_id):
+            firestore_client = get_firestore_client()
+            org = await firestore_client.get_org_async(repository.org_id)
+            project = await firestore_client.get_project_async(repository.org_id, repository.project_id)
+            schedule_refill_workspaces(org.github_installation_id, project.repo)
+
+            index, updated_project_tree = await _get_updated_project_tree_async(repository_id, event, org, project)
+            if index is None:
+                return
+            if updated_project_tree is not None and project.tree != updated_project_tree:
+                await firestore_client.update_project_async(
+                    repository.org_id, repository.project_id, tree=updated_project_tree
+                )
+            # only once the tree is stored, so the next push rebuilds the index when storing it failed
+            put_project_tree_index(repository_id, index)
     except Exception:
         logger.error(f"Failed to handle push for: {repository}")
         traceback.print_exc()
         raise
+
+
+async def _get_updated_project_tree_async(
+    repository_id: str, event: PushEvent, org: Org, project: Project
+) -> tuple[Optional[ProjectTreeIndex], Optional[str]]:
+    """
+    Returns the tree index at the pushed commit and the project tree, which is None when the push did not add or
+    remove files. The index is None when the push is older than the index, e.g. delivered after a later push.
+
+    The tree index of the repository is updated from the pushed commits when it is at the commit the push started
+    from, and rebuilt from the repository mirror otherwise.
+    """
+    index = get_project_tree_index(repository_id)
+    if index and not event.forced and index.can_apply(event.before, event.commits):
+        index, changed = index.apply(event.after, event.commits)
+        return index, index.render(event.repository.name) if changed else None
+
+    access_token = await get_github_client().generate_app_access_token_async(org.github_installation_id)
+    mirror_directory = await get_mirror_async(access_token, project.repo)
+    if index and not event.forced and await is_ancestor_async(mirror_directory, event.after, index.commit):
+        logger.info(f"Ignoring push of {event.after} to {project.repo}, the tree is already at {index.commit}")
+        return None, None
+
+    index = await build_project_tree_index_async(mirror_directory, event.after)
+    return index, index.render(event.repository.name)
+
+
+def _get_push_lock(repository_id: str) -> asyncio.Lock:
+    if repository_id not in _push_locks:
+        _push_locks[repository_id] = asyncio.Lock()
+    return _push_locks[repository_id]
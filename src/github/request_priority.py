@@ -0,0 +1,34 @@
+from enum import Enum
+
+
+class RequestPriority(str, Enum):
+    """
+    Priority of a GitHub API request when the rate limit of its access token runs low
+    """
+
+    INTERACTIVE = "interactive"
+    """
+    A user is waiting for the response, may use the whole rate limit
+    """
+
+    DEFAULT = "default"
+    """
+    Leaves a small share of the rate limit to interactive requests
+    """
+
+    BACKGROUND = "background"
+    """
+    Bulk work such as imports, leaves a large share of the rate limit to other requests
+    """
+
+    def get_reserve_ratio(self) -> float:
+        """
+        Share of the rate limit that requests of this priority leave untouched
+        """
+        match self:
+            case RequestPriority.DEFAULT:
+                return 0.05
+            case RequestPriority.BACKGROUND:
+                return 0.25
+            case _:
+                return 0.0
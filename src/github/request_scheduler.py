@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import httpx
+
+from src.github.etag_cache import ETagCache
+from src.github.request_priority import RequestPriority
+
+GITHUB_MAX_CONCURRENT_REQUESTS = int(os.getenv("GITHUB_MAX_CONCURRENT_REQUESTS", "10"))
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+GITHUB_ETAG_CACHE_MAX_BYTES = int(os.getenv("GITHUB_ETAG_CACHE_MAX_BYTES", str(64 * 2**20)))
+
+# secondary rate limits without a Retry-After header are retried after this, doubled on every attempt
+SECONDARY_RATE_LIMIT_BACKOFF_SECONDS = 60
+
+# rate limited requests that would have to wait longer than this fail instead
+MAX_RETRY_WAIT_SECONDS = 15 * 60
+
+# rate limit state is kept for this many access tokens, installation tokens rotate every hour
+MAX_BUCKETS = 1024
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBucket:
+    """
+    Request budget of one access token, refilled from GitHub's `X-RateLimit-*` response headers.
+
+    Requests in flight are counted against the last known remaining budget, so concurrent requests never overdraw it.
+    Until the first response arrives, the budget is unknown and requests are not held back.
+    """
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire_async(self, priority: RequestPriority):
+        async with self.condition:
+            while not self._has_budget(priority):
+                wait_seconds = max(self.reset_at - time.time(), 1.0)
+                logger.info(
+                    f"GitHub rate limit budget exhausted for {priority.value} requests, waiting {wait_seconds:.0f}s"
+                )
+                try:
+                    await asyncio.wait_for(self.condition.wait(), timeout=wait_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            self.in_flight += 1
+
+    async def release_async(self, response: Optional[httpx.Response]):
+        async with self.condition:
+            self.in_flight -= 1
+            if response is not None:
+                self._update(response.headers)
+            self.condition.notify_all()
+
+    def _has_budget(self, priority: RequestPriority) -> bool:
+        if self.remaining is None:
+            return True
+        if time.time() >= self.reset_at:
+            self.remaining = self.limit
+        reserve = int(self.limit * priority.get_reserve_ratio())
+        return self.remaining - self.in_flight > reserve
+
+    def _update(self, headers: httpx.Headers):
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset_at = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+
+        if self.remaining is None or reset_at > self.reset_at:
+            self.remaining = remaining
+        else:
+            # responses of the same window may arrive out of order, the lowest count is the most recent
+            self.remaining = min(self.remaining, remaining)
+        self.limit = limit
+        self.reset_at = max(self.reset_at, reset_at)
+
+
+class RequestScheduler:
+    """
+    Sends GitHub API requests within the rate limit of their access token.
+
+    Requests wait for budget in their token's bucket, where lower priorities leave a share of the budget to higher
+    ones, and the number of concurrent requests is bounded. Rate limited responses are retried after the time GitHub
+    asks for. GET responses with an ETag are cached and revalidated with conditional requests.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        max_concurrent_requests: int = GITHUB_MAX_CONCURRENT_REQUESTS,
+        max_retries: int = GITHUB_MAX_RETRIES,
+        etag_cache_max_bytes: int = GITHUB_ETAG_CACHE_MAX_BYTES,
+    ):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.max_retries = max_retries
+        self.etag_cache = ETagCache(etag_cache_max_bytes) if etag_cache_max_bytes > 0 else None
+        self.buckets: OrderedDict[str, RateLimitBucket] = OrderedDict()
+
+    async def request_async(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        priority: RequestPriority = RequestPriority.DEFAULT,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        token_key = self._get_token_key(headers)
+        bucket = self._get_bucket(token_key)
+        cache_key = f"{token_key}:{headers.get('Accept', '')}:{url}" if method == "GET" and self.etag_cache else None
+
+        for attempt in range(self.max_retries + 1):
+            request_headers = dict(headers)
+            etag = self.etag_cache.get_etag(cache_key) if cache_key else None
+            if etag:
+                request_headers["If-None-Match"] = etag
+
+            await bucket.acquire_async(priority)
+            response = None
+            try:
+                async with self.semaphore:
+                    response = await self.client.request(method, url, headers=request_headers, **kwargs)
+            finally:
+                await bucket.release_async(response)
+
+            if response.status_code == 304 and etag:
+                cached_response = self.etag_cache.get_not_modified_response(cache_key, response)
+                if cached_response:
+                    return cached_response
+                # evicted since the request was sent, ask again without the ETag
+                continue
+
+            retry_after = self._get_retry_after(response, attempt)
+            if retry_after is None or attempt == self.max_retries or retry_after > MAX_RETRY_WAIT_SECONDS:
+                if cache_key and response.status_code == 200:
+                    self.etag_cache.put(cache_key, response)
+                return response
+
+            logger.warning(
+                f"GitHub rate limited {method} {url} with {response.status_code}, retrying in {retry_after:.0f}s"
+            )
+            await asyncio.sleep(retry_after)
+        return response
+
+    def get_cache_stats(self) -> dict[str, int]:
+        if not self.etag_cache:
+            return {}
+        return self.etag_cache.get_stats()
+
+    def _get_bucket(self, token_key: str) -> RateLimitBucket:
+        if token_key not in self.buckets:
+            self.buckets[token_key] = RateLimitBucket()
+            while len(self.buckets) > MAX_BUCKETS:
+                self.buckets.popitem(last=False)
+        self.buckets.move_to_end(token_key)
+        return self.buckets[token_key]
+
+    def _get_token_key(self, headers: dict[str, str]) -> str:
+        authorization = headers.get("Authorization", "")
+        return hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:16]
+
+    def _get_retry_after(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """
+        Returns how long to wait before retrying a rate limited response, or None when it is not rate limited.
+        """
+        if response.status_code not in (403, 429):
+            return None
+
+        retry_after = response.headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+
+        # primary rate limit, wait for the window to reset
+        if response.headers.get("x-ratelimit-remaining") == "0":
+            reset_at = float(response.headers.get("x-ratelimit-reset", "0"))
+            return max(reset_at - time.time(), 0.0) + 1.0
+
+        if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+            return SECONDARY_RATE_LIMIT_BACKOFF_SECONDS * 2**attempt
+        return None
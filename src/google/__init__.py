@@ -1,6 +1,24 @@
-from src.google.gcr_client import GcrClient
-from src.google.secret_client import SecretClient
-from src.google.storage_client import StorageClient
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.google.gcr_client import GcrClient
+    from src.google.secret_client import SecretClient
+    from src.google.storage_client import StorageClient
+
+# each client imports its SDK, which is only imported when the client is first used
+_MODULES = {
+    "GcrClient": "src.google.gcr_client",
+    "SecretClient": "src.google.secret_client",
+    "StorageClient": "src.google.storage_client",
+}
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_MODULES[name]), name)
+
 
 __all__ = [
     "GcrClient",
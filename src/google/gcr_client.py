@@ -56,6 +56,8 @@ class GcrClient:
                             EnvVar(name="ORG_ID", value=request.org_id),
                             EnvVar(name="PROJECT_ID", value=request.project_id),
                             EnvVar(name="IS_DEV", value=str(request.is_dev)),
+                            # an execution never outlives its job, so a workspace pool would never be used
+                            EnvVar(name="WORKSPACE_POOL_SIZE", value="0"),
                         ]
                     )
                 ]
@@ -75,6 +77,8 @@ class GcrClient:
                             EnvVar(name="ORG_ID", value=request.org_id),
                             EnvVar(name="TASK_ID", value=request.task_id),
                             EnvVar(name="IS_DEV", value=str(request.is_dev)),
+                            # an execution never outlives its job, so a workspace pool would never be used
+                            EnvVar(name="WORKSPACE_POOL_SIZE", value="0"),
                         ]
                     )
                 ]
@@ -92,6 +96,8 @@ class GcrClient:
                             EnvVar(name="ORG_ID", value=request.org_id),
                             EnvVar(name="TASK_ID", value=request.task_id),
                             EnvVar(name="IS_DEV", value=str(request.is_dev)),
+                            # an execution never outlives its job, so a workspace pool would never be used
+                            EnvVar(name="WORKSPACE_POOL_SIZE", value="0"),
                         ]
                     )
                 ]
@@ -109,6 +115,8 @@ class GcrClient:
                             EnvVar(name="ORG_ID", value=request.org_id),
                             EnvVar(name="TASK_ID", value=request.task_id),
                             EnvVar(name="IS_DEV", value=str(request.is_dev)),
+                            # an execution never outlives its job, so a workspace pool would never be used
+                            EnvVar(name="WORKSPACE_POOL_SIZE", value="0"),
                         ]
                     )
                 ]
@@ -6,11 +6,14 @@ import traceback
 
 from src.agent import AnalyzerAgentMetadata
 from src.clients import get_firestore_client, get_github_client
+from src.github import ClonePolicy
 from src.model.agent import AsyncConfig
 from src.model.app.project import Language, Project
+from src.tools.tool_result_cache import log_tool_result_cache_stats
 from src.utils.bootstrap_utils import bootstrap_application_async, create_bootstrap_config
-from src.utils.filesystem_utils import cleanup_directory_async, generate_project_tree_async
-from src.utils.setup_utils import setup_ephemeral_repo_async
+from src.utils.filesystem_utils import generate_project_tree_async
+from src.utils.symbol_index import schedule_symbol_index_build
+from src.utils.workspace_pool import acquire_workspace_async, release_workspace_async
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +24,10 @@ async def index_project_async(org_id: str, project_id: str, is_dev: bool):
         firestore_client = get_firestore_client()
         org = await firestore_client.get_org_async(org_id)
         project = await firestore_client.get_project_async(org_id, project_id)
-        task_directory, repo_directory = await setup_ephemeral_repo_async(org.github_installation_id, project.repo)
+        task_directory, repo_directory = await acquire_workspace_async(
+            org.github_installation_id, project.repo, ClonePolicy.SHALLOW
+        )
+        schedule_symbol_index_build(repo_directory)
 
         # these operations are fast
         project.tree = await generate_project_tree_async(repo_directory)
@@ -37,7 +43,7 @@ async def index_project_async(org_id: str, project_id: str, is_dev: bool):
         traceback.print_exc()
         sys.exit(1)
     finally:
-        await cleanup_directory_async(task_directory)
+        await release_workspace_async(task_directory)
 
 
 async def _generate_project_overview_async(project: Project, repo_directory: str) -> str:
@@ -52,6 +58,7 @@ async def _generate_project_overview_async(project: Project, repo_directory: str
         input={"messages": agent_metadata.get_input_message()},
         config={"configurable": config, "recursion_limit": 500},
     )
+    log_tool_result_cache_stats(config["thread_id"])
     if not response["messages"] or not response["messages"][-1].content:
         raise ValueError("Analzyer agent failed to generate overview")
     return response["messages"][-1].content
@@ -0,0 +1,11 @@
+from src.job.job_executor import JobExecutor, JobExecutorBackend
+from src.job.job_queue import FirestoreJobQueue, JobQueue, JobQueueBackend, SqliteJobQueue
+
+__all__ = [
+    "FirestoreJobQueue",
+    "JobExecutor",
+    "JobExecutorBackend",
+    "JobQueue",
+    "JobQueueBackend",
+    "SqliteJobQueue",
+]
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from src.api.task import ScheduleJobRequest
+from src.clients import get_firestore_client, get_gcr_client
+from src.job.job_executor import JobExecutor
+from src.model.app.project import Project
+from src.model.job import Job, JobStatus
+
+# executions are polled for completion at most this often
+EXECUTION_POLL_SECONDS = 30
+
+
+class GcrJobExecutor(JobExecutor):
+    """
+    Runs every job as an execution of the Cloud Run job matching the project's languages.
+    """
+
+    def __init__(self):
+        self.polled_at: dict[str, datetime] = {}
+
+    async def launch_async(self, job: Job, request: ScheduleJobRequest) -> str:
+        project = await _get_project_async(request)
+        return await get_gcr_client().run_job_async(request, project.languages)
+
+    def is_tracking(self, job: Job) -> bool:
+        return bool(job.execution_id) and not job.execution_id.startswith("local:")
+
+    async def poll_async(self, job: Job) -> Optional[tuple[JobStatus, str]]:
+        now = datetime.now(timezone.utc)
+        polled_at = self.polled_at.get(job.id)
+        if polled_at and polled_at > now - timedelta(seconds=EXECUTION_POLL_SECONDS):
+            return None
+        self.polled_at[job.id] = now
+
+        execution = await get_gcr_client().get_execution_async(job.execution_id)
+        if not execution.completion_time:
+            return None
+
+        self.polled_at.pop(job.id, None)
+        if execution.succeeded_count > 0:
+            return JobStatus.SUCCEEDED, ""
+        return JobStatus.FAILED, f"Execution {job.execution_id} failed"
+
+
+async def _get_project_async(request: ScheduleJobRequest) -> Project:
+    firestore_client = get_firestore_client()
+    if hasattr(request, "project_id") and request.project_id:
+        return await firestore_client.get_project_async(request.org_id, request.project_id)
+
+    task = await firestore_client.get_task_async(request.org_id, request.task_id)
+    return await firestore_client.get_project_async(request.org_id, task.project_id)
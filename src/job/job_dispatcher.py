@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from src.job.gcr_job_executor import GcrJobExecutor
+from src.job.job_executor import JobExecutor, JobExecutorBackend
+from src.job.job_queue import JobQueue
+from src.job.job_runner import parse_job_request
+from src.job.local_job_executor import LocalJobExecutor
+from src.model import generate_id
+from src.model.job import Job, JobStatus
+
+JOB_MAX_RUNNING = int(os.getenv("JOB_MAX_RUNNING", "20"))
+JOB_MAX_RUNNING_PER_ORG = int(os.getenv("JOB_MAX_RUNNING_PER_ORG", "3"))
+JOB_DISPATCH_INTERVAL_SECONDS = float(os.getenv("JOB_DISPATCH_INTERVAL_SECONDS", "2"))
+
+# jobs that could not be launched are retried after this, doubled on every attempt
+JOB_RETRY_BACKOFF_SECONDS = 10
+
+# a job whose dispatcher has not reported for this long while it was running locally is considered lost and retried
+JOB_LEASE_SECONDS = 120
+
+logger = logging.getLogger(__name__)
+
+
+class JobDispatcher:
+    """
+    Background loop that launches queued jobs on a job executor and tracks them until they finish.
+
+    Jobs are launched within a global and a per-org limit of running jobs and the capacity of the executor. Jobs that
+    fail to launch, or whose local execution disappeared with its dispatcher, are retried with exponential backoff.
+    Jobs that ran and failed are not retried, since they already recorded their failure on their task.
+    """
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        job_executor: JobExecutor,
+        max_running: int = JOB_MAX_RUNNING,
+        max_running_per_org: int = JOB_MAX_RUNNING_PER_ORG,
+        interval_seconds: float = JOB_DISPATCH_INTERVAL_SECONDS,
+    ):
+        self.job_queue = job_queue
+        self.job_executor = job_executor
+        self.max_running = max_running
+        self.max_running_per_org = max_running_per_org
+        self.interval_seconds = interval_seconds
+        self.worker_id = generate_id()
+        self.loop_task: asyncio.Task | None = None
+
+    def start(self):
+        self.loop_task = asyncio.create_task(self._run_async())
+
+    async def stop_async(self):
+        """
+        Stop dispatching and close the executor. Jobs that do not finish in time are stopped by the executor and queued
+        again.
+        """
+        if self.loop_task:
+            self.loop_task.cancel()
+        await self.job_executor.close_async()
+
+        for job in await self.job_queue.get_jobs_async(JobStatus.RUNNING):
+            if not self.job_executor.is_tracking(job) or not self.job_executor.needs_heartbeat:
+                continue
+            result = await self.job_executor.poll_async(job)
+            if result:
+                await self._finish_async(job, *result)
+            else:
+                await self.job_queue.transition_job_async(
+                    job.id, JobStatus.RUNNING, status=JobStatus.QUEUED, execution_id="", worker_id="", updated_at=_now()
+                )
+
+    async def _run_async(self):
+        while True:
+            self.job_queue.enqueued.clear()
+            try:
+                running_jobs = await self._reconcile_async()
+                await self._dispatch_async(running_jobs)
+            except Exception as e:
+                logger.error(f"Failed to dispatch jobs: {e}")
+
+            try:
+                await asyncio.wait_for(self.job_queue.enqueued.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _reconcile_async(self) -> list[Job]:
+        """
+        Refresh the state of running jobs and returns the ones still running.
+        """
+        now = _now()
+        running_jobs = []
+        for job in await self.job_queue.get_jobs_async(JobStatus.RUNNING):
+            if self.job_executor.is_tracking(job):
+                result = await self.job_executor.poll_async(job)
+                if result:
+                    await self._finish_async(job, *result)
+                    continue
+                if self.job_executor.needs_heartbeat and (
+                    not job.heartbeat_at or job.heartbeat_at < now - timedelta(seconds=JOB_LEASE_SECONDS / 4)
+                ):
+                    await self.job_queue.update_job_async(job.id, heartbeat_at=now)
+            elif not job.heartbeat_at or job.heartbeat_at < now - timedelta(seconds=JOB_LEASE_SECONDS):
+                await self._retry_or_fail_async(job, "Job was lost by its dispatcher")
+                continue
+            running_jobs.append(job)
+        return running_jobs
+
+    async def _dispatch_async(self, running_jobs: list[Job]):
+        now = _now()
+        running_count = len(running_jobs)
+        org_running_counts = Counter(job.org_id for job in running_jobs)
+
+        queued_jobs = await self.job_queue.get_jobs_async(JobStatus.QUEUED)
+        due_jobs = sorted((job for job in queued_jobs if job.next_attempt_at <= now), key=lambda job: job.created_at)
+        for job in due_jobs:
+            if running_count >= self.max_running or not self.job_executor.has_capacity(running_count):
+                break
+            if org_running_counts[job.org_id] >= self.max_running_per_org:
+                continue
+
+            claimed_job = await self.job_queue.transition_job_async(
+                job.id,
+                JobStatus.QUEUED,
+                status=JobStatus.RUNNING,
+                attempts=job.attempts + 1,
+                worker_id=self.worker_id,
+                heartbeat_at=now,
+                updated_at=now,
+            )
+            if not claimed_job:
+                continue
+
+            running_count += 1
+            org_running_counts[job.org_id] += 1
+            await self._launch_async(claimed_job)
+
+    async def _launch_async(self, job: Job):
+        try:
+            execution_id = await self.job_executor.launch_async(job, parse_job_request(job.request))
+            await self.job_queue.update_job_async(job.id, execution_id=execution_id, updated_at=_now())
+            logger.info(f"Launched job {job.id} ({job.job_type.value}) as {execution_id}, attempt {job.attempts}")
+        except Exception as e:
+            logger.error(f"Failed to launch job {job.id}: {e}")
+            await self._retry_or_fail_async(job, str(e))
+
+    async def _finish_async(self, job: Job, status: JobStatus, error: str):
+        await self.job_queue.transition_job_async(
+            job.id, JobStatus.RUNNING, status=status, error=error, updated_at=_now()
+        )
+        logger.info(f"Job {job.id} ({job.job_type.value}) finished with status {status.value}")
+
+    async def _retry_or_fail_async(self, job: Job, error: str):
+        if job.attempts >= job.max_attempts:
+            await self.job_queue.transition_job_async(
+                job.id, JobStatus.RUNNING, status=JobStatus.FAILED, error=error, updated_at=_now()
+            )
+            logger.error(f"Job {job.id} ({job.job_type.value}) failed after {job.attempts} attempts: {error}")
+            return
+
+        delay_seconds = JOB_RETRY_BACKOFF_SECONDS * 2 ** max(job.attempts - 1, 0)
+        await self.job_queue.transition_job_async(
+            job.id,
+            JobStatus.RUNNING,
+            status=JobStatus.QUEUED,
+            next_attempt_at=_now() + timedelta(seconds=delay_seconds),
+            execution_id="",
+            worker_id="",
+            error=error,
+            updated_at=_now(),
+        )
+
+
+def create_job_executor(backend: JobExecutorBackend, is_dev: bool) -> JobExecutor:
+    if backend == JobExecutorBackend.LOCAL:
+        return LocalJobExecutor(is_dev)
+    return GcrJobExecutor()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
@@ -0,0 +1,49 @@
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Optional
+
+from src.api.task import ScheduleJobRequest
+from src.model.job import Job, JobStatus
+
+
+class JobExecutorBackend(str, Enum):
+    GCR = "gcr"
+    LOCAL = "local"
+
+
+class JobExecutor(ABC):
+    """
+    Runs the jobs launched by the job dispatcher and reports when they finish.
+    """
+
+    needs_heartbeat: bool = False
+    """
+    Whether executions live only as long as this process, so the dispatcher must keep their lease alive
+    """
+
+    def has_capacity(self, running_count: int) -> bool:
+        return True
+
+    @abstractmethod
+    async def launch_async(self, job: Job, request: ScheduleJobRequest) -> str:
+        """
+        Start running the job and return the ID of its execution.
+        """
+        pass
+
+    @abstractmethod
+    def is_tracking(self, job: Job) -> bool:
+        """
+        Whether this executor can report on the execution of the job.
+        """
+        pass
+
+    @abstractmethod
+    async def poll_async(self, job: Job) -> Optional[tuple[JobStatus, str]]:
+        """
+        Returns the final status and error of the job, or None while it is still running.
+        """
+        pass
+
+    async def close_async(self):
+        pass
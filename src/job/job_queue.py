@@ -0,0 +1,143 @@
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Optional
+
+from src.firebase import FirestoreClient
+from src.model.job import Job, JobStatus
+
+
+class JobQueueBackend(str, Enum):
+    FIRESTORE = "firestore"
+    SQLITE = "sqlite"
+
+
+class JobQueue(ABC):
+    """
+    Durable store of scheduled jobs, shared by the endpoints that enqueue jobs and the dispatcher that runs them.
+
+    Jobs are created once per ID, so a job scheduled again with the same idempotency key resolves to the existing
+    job. Status changes that claim a job go through `transition_job_async`, which only applies them to a job that is
+    still in the expected status.
+    """
+
+    def __init__(self):
+        self.enqueued = asyncio.Event()
+
+    async def enqueue_async(self, job: Job) -> tuple[Job, bool]:
+        """
+        Store the job unless it exists and wake up the dispatcher. Returns the stored job and whether it was created.
+        """
+        job, created = await self.create_job_async(job)
+        if created:
+            self.enqueued.set()
+        return job, created
+
+    @abstractmethod
+    async def create_job_async(self, job: Job) -> tuple[Job, bool]:
+        pass
+
+    @abstractmethod
+    async def get_job_async(self, job_id: str) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    async def get_jobs_async(self, status: JobStatus) -> list[Job]:
+        pass
+
+    @abstractmethod
+    async def update_job_async(self, job_id: str, **kwargs) -> None:
+        pass
+
+    @abstractmethod
+    async def transition_job_async(self, job_id: str, from_status: JobStatus, **kwargs) -> Optional[Job]:
+        pass
+
+
+class FirestoreJobQueue(JobQueue):
+    """
+    Job queue in the `jobs` Firestore collection, shared by every server instance.
+    """
+
+    def __init__(self, firestore_client: FirestoreClient):
+        super().__init__()
+        self.firestore_client = firestore_client
+
+    async def create_job_async(self, job: Job) -> tuple[Job, bool]:
+        return await self.firestore_client.create_job_async(job)
+
+    async def get_job_async(self, job_id: str) -> Optional[Job]:
+        return await self.firestore_client.get_job_async(job_id)
+
+    async def get_jobs_async(self, status: JobStatus) -> list[Job]:
+        return await self.firestore_client.get_jobs_async(status)
+
+    async def update_job_async(self, job_id: str, **kwargs) -> None:
+        await self.firestore_client.update_job_async(job_id, **kwargs)
+
+    async def transition_job_async(self, job_id: str, from_status: JobStatus, **kwargs) -> Optional[Job]:
+        return await self.firestore_client.transition_job_async(job_id, from_status, **kwargs)
+
+
+class SqliteJobQueue(JobQueue):
+    """
+    Job queue in a SQLite database for local development, in memory by default.
+    """
+
+    def __init__(self, database_path: str = ":memory:"):
+        super().__init__()
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, data TEXT)")
+        self.lock = threading.Lock()
+
+    async def create_job_async(self, job: Job) -> tuple[Job, bool]:
+        return await asyncio.to_thread(self._create_job, job)
+
+    async def get_job_async(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self._get_job_locked, job_id)
+
+    async def get_jobs_async(self, status: JobStatus) -> list[Job]:
+        return await asyncio.to_thread(self._get_jobs, status)
+
+    async def update_job_async(self, job_id: str, **kwargs) -> None:
+        await asyncio.to_thread(self._transition_job, job_id, None, kwargs)
+
+    async def transition_job_async(self, job_id: str, from_status: JobStatus, **kwargs) -> Optional[Job]:
+        return await asyncio.to_thread(self._transition_job, job_id, from_status, kwargs)
+
+    def _create_job(self, job: Job) -> tuple[Job, bool]:
+        with self.lock, self.connection:
+            existing_job = self._get_job(job.id)
+            if existing_job:
+                return existing_job, False
+            self.connection.execute(
+                "INSERT INTO jobs (id, status, data) VALUES (?, ?, ?)",
+                (job.id, job.status.value, job.model_dump_json()),
+            )
+            return job, True
+
+    def _get_job_locked(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self._get_job(job_id)
+
+    def _get_job(self, job_id: str) -> Optional[Job]:
+        row = self.connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def _get_jobs(self, status: JobStatus) -> list[Job]:
+        with self.lock:
+            rows = self.connection.execute("SELECT data FROM jobs WHERE status = ?", (status.value,)).fetchall()
+        return [Job.model_validate_json(row[0]) for row in rows]
+
+    def _transition_job(self, job_id: str, from_status: Optional[JobStatus], fields: dict) -> Optional[Job]:
+        with self.lock, self.connection:
+            job = self._get_job(job_id)
+            if job is None or (from_status is not None and job.status != from_status):
+                return None
+            job = Job(**{**job.model_dump(), **fields})
+            self.connection.execute(
+                "UPDATE jobs SET status = ?, data = ? WHERE id = ?", (job.status.value, job.model_dump_json(), job.id)
+            )
+            return job
@@ -0,0 +1,34 @@
+from pydantic import TypeAdapter
+
+from src.api.task import (
+    ExecuteTaskJobRequest,
+    IndexProjectJobRequest,
+    ResearchTaskJobRequest,
+    ReviseTaskJobRequest,
+    ScheduleJobRequest,
+)
+from src.execute_task import execute_task_async
+from src.index_project import index_project_async
+from src.research_task import research_task_async
+from src.revise_task import revise_task_async
+
+_schedule_job_request_adapter = TypeAdapter(ScheduleJobRequest)
+
+
+def parse_job_request(request: dict) -> ScheduleJobRequest:
+    return _schedule_job_request_adapter.validate_python(request)
+
+
+async def run_job_async(request: ScheduleJobRequest):
+    """
+    Run the job in this process, which must have been bootstrapped.
+    """
+    match request:
+        case IndexProjectJobRequest():
+            await index_project_async(request.org_id, request.project_id, request.is_dev)
+        case ResearchTaskJobRequest():
+            await research_task_async(request.org_id, request.task_id, request.is_dev)
+        case ExecuteTaskJobRequest():
+            await execute_task_async(request.org_id, request.task_id, request.is_dev)
+        case ReviseTaskJobRequest():
+            await revise_task_async(request.org_id, request.task_id, request.is_dev)
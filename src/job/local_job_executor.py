@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import resource
+import time
+from multiprocessing.connection import Connection
+from typing import Optional
+
+from src.api.task import ScheduleJobRequest
+from src.job.job_executor import JobExecutor
+from src.job.job_runner import parse_job_request, run_job_async
+from src.model.job import Job, JobStatus
+from src.utils.bootstrap_utils import bootstrap_application_async, create_bootstrap_config
+from src.utils.workspace_pool import defer_refills, pop_deferred_refills, schedule_refill_workspaces
+
+LOCAL_JOB_WORKERS = int(os.getenv("LOCAL_JOB_WORKERS", str(os.cpu_count() or 1)))
+LOCAL_JOB_TIMEOUT_SECONDS = float(os.getenv("LOCAL_JOB_TIMEOUT_SECONDS", str(2 * 60 * 60)))
+
+# address space limit of every worker process and the tools it starts, 0 for no limit
+LOCAL_JOB_MEMORY_LIMIT_BYTES = int(os.getenv("LOCAL_JOB_MEMORY_LIMIT_BYTES", "0"))
+
+# workers are replaced after this many jobs, so leaks in one job do not pile up
+LOCAL_JOB_MAX_JOBS_PER_WORKER = int(os.getenv("LOCAL_JOB_MAX_JOBS_PER_WORKER", "20"))
+
+# workers run at a lower CPU priority than the server process
+LOCAL_JOB_NICENESS = 10
+
+# running jobs may finish for this long when the executor is closed
+SHUTDOWN_GRACE_SECONDS = 10
+
+logger = logging.getLogger(__name__)
+
+# event loop of a worker process, the bootstrapped clients are bound to it
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class LocalJobExecutor(JobExecutor):
+    """
+    Runs jobs in a pool of warm worker processes on this machine instead of a cold container per job.
+
+    Every worker bootstraps the application once and then runs one job at a time on its own event loop. Workers are
+    spawned rather than forked, run at a lower CPU priority, may have a memory limit, and are replaced after a number
+    of jobs. Jobs are cancelled after a timeout.
+    """
+
+    needs_heartbeat = True
+
+    def __init__(
+        self,
+        is_dev: bool,
+        max_workers: int = LOCAL_JOB_WORKERS,
+        timeout_seconds: float = LOCAL_JOB_TIMEOUT_SECONDS,
+        memory_limit_bytes: int = LOCAL_JOB_MEMORY_LIMIT_BYTES,
+        max_jobs_per_worker: int = LOCAL_JOB_MAX_JOBS_PER_WORKER,
+    ):
+        self.max_workers = max_workers
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.worker_args = (is_dev, memory_limit_bytes, timeout_seconds)
+        # every worker starts and bootstraps now rather than on its first job
+        self.idle_workers = [self._start_worker() for _ in range(max_workers)]
+        self.running_workers: dict[str, _Worker] = {}
+        # jobs whose worker was stopped before they finished, they can be queued again
+        self.interrupted_job_ids: set[str] = set()
+        self.closed = False
+
+    def has_capacity(self, running_count: int) -> bool:
+        return len(self.running_workers) < self.max_workers
+
+    async def launch_async(self, job: Job, request: ScheduleJobRequest) -> str:
+        worker = self.idle_workers.pop()
+        if not worker.process.is_alive():
+            worker = self._start_worker()
+        worker.run(request.model_dump())
+        self.running_workers[job.id] = worker
+        return f"local:{job.worker_id}:{job.id}"
+
+    def is_tracking(self, job: Job) -> bool:
+        return job.id in self.running_workers
+
+    async def poll_async(self, job: Job) -> Optional[tuple[JobStatus, str]]:
+        worker = self.running_workers.get(job.id)
+        if worker is None or job.id in self.interrupted_job_ids or not worker.poll():
+            return None
+
+        del self.running_workers[job.id]
+        await self._release_worker_async(worker)
+        if worker.result is None:
+            # the worker process died, e.g. when it ran out of memory
+            return JobStatus.FAILED, f"Worker failed with exit code {worker.process.exitcode}"
+
+        status, error, refills = worker.result
+        # workspace pools are refilled by this process, whose event loop keeps running, so the worker is free
+        if not self.closed:
+            for installation_id, full_repo_name in refills:
+                schedule_refill_workspaces(installation_id, full_repo_name)
+        return status, error
+
+    async def close_async(self):
+        """
+        Let running jobs finish for a grace period, then stop the workers of the jobs that are still running, so they
+        can be queued again without running twice.
+        """
+        self.closed = True
+        running_workers = dict(self.running_workers)
+        if running_workers:
+            await asyncio.to_thread(_wait_for_workers, list(running_workers.values()), SHUTDOWN_GRACE_SECONDS)
+        await asyncio.to_thread(_stop_workers, self.idle_workers + list(running_workers.values()))
+        self.idle_workers = []
+        # jobs that finished while their worker was stopped keep their result
+        for job_id, worker in running_workers.items():
+            if not worker.poll() or worker.result is None:
+                self.interrupted_job_ids.add(job_id)
+
+    def _start_worker(self) -> "_Worker":
+        return _Worker(*self.worker_args)
+
+    async def _release_worker_async(self, worker: "_Worker"):
+        if not self.closed and worker.process.is_alive() and worker.job_count < self.max_jobs_per_worker:
+            self.idle_workers.append(worker)
+            return
+        await asyncio.to_thread(_stop_workers, [worker])
+        if not self.closed:
+            self.idle_workers.append(self._start_worker())
+
+
+class _Worker:
+    """
+    A worker process and the pipe it receives jobs on and returns their results on.
+    """
+
+    def __init__(self, is_dev: bool, memory_limit_bytes: int, timeout_seconds: float):
+        context = multiprocessing.get_context("spawn")
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(
+            target=_run_worker, args=(worker_connection, is_dev, memory_limit_bytes, timeout_seconds)
+        )
+        self.process.start()
+        # the pipe reports the end of the process once this process no longer holds the other end
+        worker_connection.close()
+        self.job_count = 0
+        self.finished = True
+        self.result: Optional[tuple[JobStatus, str, list[tuple[int, str]]]] = None
+
+    def run(self, request: dict):
+        self.job_count += 1
+        self.finished, self.result = False, None
+        self.connection.send(request)
+
+    def poll(self) -> bool:
+        """
+        Whether the job has finished, receiving its result. The result is None when the process died before sending it.
+        """
+        if not self.finished and self.connection.poll():
+            try:
+                self.result = self.connection.recv()
+            except EOFError:
+                pass
+            self.finished = True
+        return self.finished
+
+
+def _wait_for_workers(workers: list[_Worker], timeout_seconds: float):
+    deadline = time.monotonic() + timeout_seconds
+    connections = [worker.connection for worker in workers]
+    while connections and (remaining_seconds := deadline - time.monotonic()) > 0:
+        ready_connections = multiprocessing.connection.wait(connections, remaining_seconds)
+        connections = [connection for connection in connections if connection not in ready_connections]
+
+
+def _stop_workers(workers: list[_Worker]):
+    """
+    Ask idle workers to exit and terminate the ones still running a job.
+    """
+    for worker in workers:
+        if not worker.poll():
+            worker.process.terminate()
+            continue
+        try:
+            worker.connection.send(None)
+        except OSError:
+            # the process already exited
+            pass
+    for worker in workers:
+        worker.process.join(SHUTDOWN_GRACE_SECONDS)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+
+
+def _run_worker(connection: Connection, is_dev: bool, memory_limit_bytes: int, timeout_seconds: float):
+    _initialize_worker(is_dev, memory_limit_bytes)
+    try:
+        while (request := connection.recv()) is not None:
+            connection.send(_run_job_in_worker(request, timeout_seconds))
+    except EOFError:
+        # the executor process exited
+        pass
+
+
+def _initialize_worker(is_dev: bool, memory_limit_bytes: int):
+    global _worker_loop
+
+    os.nice(LOCAL_JOB_NICENESS)
+    if memory_limit_bytes:
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, hard_limit))
+
+    defer_refills()
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    _worker_loop.run_until_complete(
+        bootstrap_application_async(create_bootstrap_config(is_dev, initialize_db_pool=True))
+    )
+
+
+def _run_job_in_worker(request: dict, timeout_seconds: float) -> tuple[JobStatus, str, list[tuple[int, str]]]:
+    """
+    Returns the status of the job, its error and the workspace pools it asked to refill. The worker's event loop is
+    idle between jobs, so the refills are left to the executor.
+    """
+    try:
+        _worker_loop.run_until_complete(asyncio.wait_for(run_job_async(parse_job_request(request)), timeout_seconds))
+        status, error = JobStatus.SUCCEEDED, ""
+    except asyncio.TimeoutError:
+        status, error = JobStatus.FAILED, f"Job timed out after {timeout_seconds:.0f}s"
+    except (Exception, SystemExit) as e:
+        # jobs exit the process on failure, since they normally run as their own container
+        status, error = JobStatus.FAILED, str(e) or type(e).__name__
+    return status, error, pop_deferred_refills()
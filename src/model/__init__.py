@@ -1,3 +1,4 @@
+import hashlib
 import re
 import secrets
 
@@ -35,3 +36,11 @@ def compute_pull_request_doc_id(pull_request_url: str) -> str:
 
 def compute_repository_doc_id(repo_full_name: str) -> str:
     return repo_full_name.replace("/", "::::")
+
+
+def compute_job_doc_id(org_id: str, job_type: str, idempotency_key: str) -> str:
+    """
+    Derives the job ID from an idempotency key, so scheduling the same job twice finds the existing document. Keys are
+    scoped to the org and the job type, so different callers reusing a key do not collide
+    """
+    return hashlib.sha256("\0".join([org_id, job_type, idempotency_key]).encode("utf-8")).hexdigest()[:20]
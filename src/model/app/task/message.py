@@ -32,6 +32,7 @@ class Message(BaseModel):
     title: Optional[str] = None
     text: str = ""
     is_streaming: bool = False
+    stream_offset: int = 0
     metadata: dict[str, Any] = {}
     actions: list[MessageAction] = []
     status: MessageStatus = MessageStatus.COMPLETED
@@ -69,6 +69,9 @@ class Task(BaseModel):
     questions: list[TaskQuestion] = []
     answers: list[str] = []
 
+    # timing fields, seconds spent in each phase of research (phases may overlap)
+    research_timings: dict[str, float] = {}
+
     # pull request fields
     base_commit: str = ""
     diff_files: list[DiffFile] = []
@@ -7,7 +7,7 @@ from src.model.github.organization import Organization
 from src.model.github.pull_request import PullRequest, PullRequestFile
 from src.model.github.pull_request_comment import PullRequestComment
 from src.model.github.pull_request_event import PullRequestEvent, PullRequestEventAction
-from src.model.github.push_event import PushEvent
+from src.model.github.push_event import PushCommit, PushEvent
 from src.model.github.repository import Repository
 
 __all__ = [
@@ -23,6 +23,7 @@ __all__ = [
     "PullRequestEvent",
     "PullRequestEventAction",
     "PullRequestFile",
+    "PushCommit",
     "PushEvent",
     "Repository",
 ]
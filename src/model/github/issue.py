@@ -13,4 +13,5 @@ class Issue(BaseModel):
     body: str
     user: Account
     assignee: Optional[Account]
+    comments: int = 0
     created_at: datetime
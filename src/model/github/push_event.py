@@ -5,10 +5,20 @@ from src.model.github.organization import Organization
 from src.model.github.repository import Repository
 
 
+class PushCommit(BaseModel):
+    id: str
+    added: list[str] = []
+    removed: list[str] = []
+    modified: list[str] = []
+
+
 class PushEvent(BaseModel):
     ref: str
     before: str
     after: str
+    forced: bool = False
+    deleted: bool = False
+    commits: list[PushCommit] = []
     sender: Account
     repository: Repository
     organization: Organization
@@ -0,0 +1,6 @@
+from src.model.job.job import Job, JobStatus
+
+__all__ = [
+    "Job",
+    "JobStatus",
+]
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+from src.model import generate_id
+from src.model.google import JobType
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(BaseModel):
+    id: str = Field(default_factory=generate_id)
+    org_id: str
+    job_type: JobType
+    request: dict[str, Any]
+    status: JobStatus = JobStatus.QUEUED
+
+    # Retries
+    attempts: int = 0
+    max_attempts: int = 3
+    next_attempt_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    error: str = ""
+
+    # Execution
+    execution_id: str = ""
+    worker_id: str = ""
+    heartbeat_at: Optional[datetime] = None
+
+    # Date
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -2,38 +2,65 @@ import asyncio
 import logging
 import os
 import sys
+import time
 import traceback
 from datetime import datetime, timezone
+from typing import Awaitable, TypeVar
 
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from psycopg import AsyncConnection
-from psycopg.rows import dict_row
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph.graph import CompiledGraph
+from langgraph.types import Checkpointer
 
 from src.agent import ResearchAgentMetadata, SummaryAgentMetadata
-from src.clients import get_firestore_client
+from src.clients import cleanup_clients_async, get_firestore_client
 from src.execute_task import execute_task_async
+from src.github import ClonePolicy
 from src.model.agent import AsyncConfig
 from src.model.agent.response import TaskResearchOutput, TaskSummary
 from src.model.app.task import TaskQuestion, TaskStatus
+from src.tools.tool_result_cache import log_tool_result_cache_stats
 from src.utils.bootstrap_utils import bootstrap_application_async, create_bootstrap_config
-from src.utils.filesystem_utils import cleanup_directory_async
-from src.utils.setup_utils import setup_ephemeral_repo_async
+from src.utils.checkpointer_utils import create_checkpointer
+from src.utils.symbol_index import schedule_symbol_index_build
+from src.utils.workspace_pool import acquire_workspace_async, release_workspace_async
+
+T = TypeVar("T")
+
+# node of the research agent that gives its structured response, after which the agent ends
+RESEARCH_AGENT_LAST_NODE = "generate_structured_response"
 
 logger = logging.getLogger(__name__)
 
 
 async def research_task_async(org_id: str, task_id: str, is_dev: bool):
     task_directory = None
+    start_time = time.perf_counter()
+    timings: dict[str, float] = {}
     try:
         firestore_client = get_firestore_client()
-        await firestore_client.update_task_async(
-            org_id, task_id, status=TaskStatus.RESEARCHING, last_updated=datetime.now(timezone.utc)
+        (org, task, project, _), _ = await _measure_async(
+            timings,
+            "fetch",
+            asyncio.gather(
+                firestore_client.load_task_async(org_id, task_id),
+                firestore_client.update_task_async(
+                    org_id, task_id, status=TaskStatus.RESEARCHING, last_updated=datetime.now(timezone.utc)
+                ),
+            ),
         )
 
-        org = await firestore_client.get_org_async(org_id)
-        task = await firestore_client.get_task_async(org_id, task_id)
-        project = await firestore_client.get_project_async(org_id, task.project_id)
-        task_directory, repo_directory = await setup_ephemeral_repo_async(org.github_installation_id, project.repo)
+        # the agents are built in a thread while the workspace is cloned, their checkpointer only borrows pooled
+        # connections once the research agent runs
+        agents = asyncio.create_task(
+            _measure_async(timings, "agent_setup", asyncio.to_thread(_create_agents, create_checkpointer()))
+        )
+        task_directory, repo_directory = await _measure_async(
+            timings,
+            "workspace",
+            acquire_workspace_async(org.github_installation_id, project.repo, ClonePolicy.SHALLOW),
+        )
+        schedule_symbol_index_build(repo_directory)
+        research_agent, summary_agent = await agents
 
         config = AsyncConfig(
             thread_id=task.id,
@@ -43,9 +70,13 @@ async def research_task_async(org_id: str, task_id: str, is_dev: bool):
             task=task,
             is_dev=is_dev,
         )
-        research_output = await _research_async(config)
-        task_summary = await _summarize_async(config)
-        await _update_task_async(config, research_output, task_summary)
+        research_output, task_summary = await _research_and_summarize_async(
+            config, research_agent, summary_agent, timings
+        )
+
+        timings["total"] = round(time.perf_counter() - start_time, 3)
+        logger.info(f"Research phase timings of task {task_id}: {timings}")
+        await _update_task_async(config, research_output, task_summary, timings)
 
         if not research_output.clarifying_questions and org.credits > 0:
             logger.info(f"Task is ready to execute: {task_id}")
@@ -60,40 +91,79 @@ async def research_task_async(org_id: str, task_id: str, is_dev: bool):
         )
         sys.exit(1)
     finally:
-        await cleanup_directory_async(task_directory)
-
-
-async def _research_async(config: AsyncConfig) -> TaskResearchOutput:
-    async with await AsyncConnection.connect(
-        os.getenv("DB_URI"), autocommit=True, prepare_threshold=None, row_factory=dict_row
-    ) as conn:
-        async with conn.pipeline() as pipe:
-            agent_metadata = ResearchAgentMetadata(config)
-            checkpointer = AsyncPostgresSaver(conn, pipe)
-            agent = agent_metadata.create_agent(checkpointer)
-            response = await agent.ainvoke(
-                input={"messages": agent_metadata.get_input_message()},
-                config={"configurable": config, "recursion_limit": 500},
-            )
-            return response["structured_response"]
-
-
-async def _summarize_async(config: AsyncConfig) -> TaskSummary:
-    async with await AsyncConnection.connect(
-        os.getenv("DB_URI"), autocommit=True, prepare_threshold=None, row_factory=dict_row
-    ) as conn:
-        async with conn.pipeline() as pipe:
-            agent_metadata = SummaryAgentMetadata(config)
-            checkpointer = AsyncPostgresSaver(conn, pipe)
-            agent = agent_metadata.create_agent(checkpointer)
-            response = await agent.ainvoke(
-                input={"messages": agent_metadata.get_input_message()},
-                config={"configurable": config, "recursion_limit": 5},
-            )
-            return response["structured_response"]
-
-
-async def _update_task_async(config: AsyncConfig, research_output: TaskResearchOutput, task_summary: TaskSummary):
+        await release_workspace_async(task_directory)
+
+
+def _create_agents(checkpointer: Checkpointer) -> tuple[CompiledGraph, CompiledGraph]:
+    """
+    Only the research agent runs on the task's thread, the summary agent is given the research messages instead.
+    """
+    return ResearchAgentMetadata().create_agent(checkpointer), SummaryAgentMetadata().create_agent()
+
+
+async def _research_and_summarize_async(
+    config: AsyncConfig, research_agent: CompiledGraph, summary_agent: CompiledGraph, timings: dict[str, float]
+) -> tuple[TaskResearchOutput, TaskSummary]:
+    """
+    The summary only needs the research messages, so it starts as soon as the research agent gives its final answer,
+    while the research agent turns that answer into its structured response.
+    """
+    research_config = {"configurable": config, "recursion_limit": 500}
+    summary_input = HumanMessage(content=SummaryAgentMetadata(config).get_input_message())
+    summary_task = None
+    start_time = time.perf_counter()
+    state = {}
+    try:
+        async for state in research_agent.astream(
+            input={"messages": ResearchAgentMetadata(config).get_input_message()},
+            config=research_config,
+            stream_mode="values",
+        ):
+            messages = state["messages"]
+            if summary_task is None and isinstance(messages[-1], AIMessage) and not messages[-1].tool_calls:
+                timings["research"] = round(time.perf_counter() - start_time, 3)
+                summary_task = asyncio.create_task(
+                    _measure_async(
+                        timings,
+                        "summary",
+                        summary_agent.ainvoke(
+                            input={"messages": [*messages, summary_input]},
+                            config={"configurable": config, "recursion_limit": 5},
+                        ),
+                    )
+                )
+        timings["research_response"] = round(time.perf_counter() - start_time - timings.get("research", 0), 3)
+        log_tool_result_cache_stats(config["thread_id"])
+
+        if summary_task is None:
+            raise RuntimeError("Research agent finished without a final answer")
+        summary_state = await summary_task
+    except BaseException:
+        if summary_task:
+            summary_task.cancel()
+        raise
+
+    # the summary is kept on the task's thread, as if the summary agent had run on it. It is written as the last node
+    # of the research agent, so the thread has no pending node
+    await research_agent.aupdate_state(
+        research_config,
+        {"messages": [summary_input, summary_state["messages"][-1]]},
+        as_node=RESEARCH_AGENT_LAST_NODE,
+    )
+    return state["structured_response"], summary_state["structured_response"]
+
+
+async def _measure_async(timings: dict[str, float], phase: str, awaitable: Awaitable[T]) -> T:
+    start_time = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[phase] = round(time.perf_counter() - start_time, 3)
+
+
+async def _update_task_async(
+    config: AsyncConfig, research_output: TaskResearchOutput, task_summary: TaskSummary, timings: dict[str, float]
+):
     firestore_client = get_firestore_client()
     questions = [
         TaskQuestion(
@@ -110,19 +180,23 @@ async def _update_task_async(config: AsyncConfig, research_output: TaskResearchO
         requirements=task_summary.requirements,
         status=TaskStatus.PENDING_FEEDBACK if research_output.clarifying_questions else TaskStatus.READY,
         questions=[question.model_dump() for question in questions],
+        research_timings=timings,
         last_updated=datetime.now(timezone.utc),
     )
 
 
 async def main(org_id: str, task_id: str, is_dev: bool):
-    await bootstrap_application_async(create_bootstrap_config(is_dev))
+    await bootstrap_application_async(create_bootstrap_config(is_dev, initialize_db_pool=True))
 
     logger.info("Starting research_task job with params:")
     logger.info(f"  org_id={org_id}")
     logger.info(f"  task_id={task_id}")
     logger.info(f"  is_dev={is_dev}")
 
-    await research_task_async(org_id, task_id, is_dev)
+    try:
+        await research_task_async(org_id, task_id, is_dev)
+    finally:
+        await cleanup_clients_async()
 
 
 if __name__ == "__main__":
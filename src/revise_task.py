@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 
 from src.agent import ClaudeCodeAgent
 from src.clients import get_firestore_client, get_github_client
+from src.firebase.firestore_batch import FirestoreBatch
 from src.model.app import Org
 from src.model.app.project import Project
 from src.model.app.task import Subtask, SubtaskStatus, Task, TaskStatus
@@ -14,9 +15,8 @@ from src.prompt.execute_task_prompt import REMOVE_COMMENTS_PROMPT
 from src.prompt.revise_task_prompt import REVISE_TASK_PROMPT
 from src.utils.bootstrap_utils import bootstrap_application_async, create_bootstrap_config
 from src.utils.diff_utils import generate_diff_files_async
-from src.utils.filesystem_utils import cleanup_directory_async
 from src.utils.git_utils import add_and_commit_changes, checkout_branch, get_parent_commit
-from src.utils.setup_utils import setup_ephemeral_repo_async
+from src.utils.workspace_pool import acquire_workspace_async, release_workspace_async
 
 logger = logging.getLogger(__name__)
 
@@ -25,12 +25,10 @@ async def revise_task_async(org_id: str, task_id: str, is_dev: bool):
     task_directory = None
     try:
         firestore_client = get_firestore_client()
-        org = await firestore_client.get_org_async(org_id)
-        task = await firestore_client.get_task_async(org_id, task_id)
-        project = await firestore_client.get_project_async(org_id, task.project_id)
-        feedback_subtask = await firestore_client.get_latest_subtask_async(org_id, task.id)
+        org, task, project, subtasks = await firestore_client.load_task_async(org_id, task_id, include_subtasks=True)
+        feedback_subtask = subtasks[-1]
 
-        task_directory, repo_directory = await setup_ephemeral_repo_async(org.github_installation_id, project.repo)
+        task_directory, repo_directory = await acquire_workspace_async(org.github_installation_id, project.repo)
         checkout_branch(repo_directory, task.pull_request_branch)
 
         await firestore_client.update_task_async(
@@ -39,19 +37,19 @@ async def revise_task_async(org_id: str, task_id: str, is_dev: bool):
             status=TaskStatus.EXECUTING,
             last_updated=datetime.now(timezone.utc),
         )
-        await _run_subtask_async(org, project, task, feedback_subtask, repo_directory, is_dev)
-        feedback_subtask = await firestore_client.get_subtask_async(org_id, task_id, feedback_subtask.id)
-
-        diff_files = await generate_diff_files_async(
-            repo_directory, feedback_subtask.pull_request_commit, task.base_commit
-        )
-        await firestore_client.update_task_async(
-            org_id=org_id,
-            task_id=task_id,
+        # the subtask completion and the task update are written together
+        batch = firestore_client.batch()
+        commit_hash = await _run_subtask_async(batch, org, project, task, feedback_subtask, repo_directory, is_dev)
+
+        diff_files = await generate_diff_files_async(repo_directory, commit_hash, task.base_commit)
+        batch.update_task(
+            org_id,
+            task_id,
             diff_files=[diff_file.model_dump() for diff_file in diff_files],
             status=TaskStatus.PENDING_REVIEW,
-            ast_updated=datetime.now(timezone.utc),
+            last_updated=datetime.now(timezone.utc),
         )
+        await firestore_client.commit_batch_async(batch)
 
         logger.info(f"Finished revising task: {task_id}")
     except Exception:
@@ -60,16 +58,16 @@ async def revise_task_async(org_id: str, task_id: str, is_dev: bool):
             org_id=org_id,
             task_id=task_id,
             status=TaskStatus.FAILED,
-            ast_updated=datetime.now(timezone.utc),
+            last_updated=datetime.now(timezone.utc),
         )
         sys.exit(1)
     finally:
-        await cleanup_directory_async(task_directory)
+        await release_workspace_async(task_directory)
 
 
 async def _run_subtask_async(
-    org: Org, project: Project, task: Task, subtask: Subtask, repo_directory: str, is_dev: bool
-):
+    batch: FirestoreBatch, org: Org, project: Project, task: Task, subtask: Subtask, repo_directory: str, is_dev: bool
+) -> str:
     firestore_client = get_firestore_client()
     try:
         await firestore_client.update_subtask_async(
@@ -88,15 +86,16 @@ async def _run_subtask_async(
 
         base_commit = get_parent_commit(repo_directory, commit_hash)
         diff_files = await generate_diff_files_async(repo_directory, commit_hash, base_commit)
-        await firestore_client.update_subtask_async(
-            org_id=org.id,
-            task_id=task.id,
-            subtask_id=subtask.id,
+        batch.update_subtask(
+            org.id,
+            task.id,
+            subtask.id,
             pull_request_commit=commit_hash,
             diff_files=[diff_file.model_dump() for diff_file in diff_files],
             status=SubtaskStatus.COMPLETED,
             last_updated=datetime.now(timezone.utc),
         )
+        return commit_hash
     except Exception:
         logger.error(f"Failed to run subtask: {subtask.id}")
         await firestore_client.update_subtask_async(
@@ -17,5 +17,7 @@ async def auth_with_github_async(request: AuthGithubRequest) -> AuthGithubRespon
     await secret_client.create_user_github_token_secret_async(request.user_id, access_token)
 
     github_id, github_login = await github_client.get_user_information_async(access_token)
-    await get_firestore_client().update_user_async(request.user_id, github_id=github_id, github_login=github_login)
+    await get_firestore_client().update_user_async(
+        request.user_id, read_back=False, github_id=github_id, github_login=github_login
+    )
     return AuthGithubResponse()
@@ -14,9 +14,9 @@ router = APIRouter()
 @router.post("/submit-review", status_code=status.HTTP_200_OK)
 async def submit_review_async(request: SubmitReviewRequest) -> SubmitReviewResponse:
     firestore_client = get_firestore_client()
-    task = await firestore_client.get_task_async(request.org_id, request.task_id)
-    subtasks = await firestore_client.get_subtasks_async(request.org_id, task.id)
-    project = await firestore_client.get_project_async(request.org_id, task.project_id)
+    _, task, project, subtasks = await firestore_client.load_task_async(
+        request.org_id, request.task_id, include_subtasks=True
+    )
 
     for comment in request.comments:
         if not comment.commit_id:
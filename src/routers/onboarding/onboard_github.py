@@ -1,12 +1,31 @@
+import asyncio
+import logging
+import os
+import time
+
 from fastapi import APIRouter, BackgroundTasks, status
+from firebase_admin import firestore
 
 from src.api.onboarding import OnboardingGithubRequest, OnboardingGithubResponse
 from src.clients import get_async_client, get_firestore_client, get_github_client, get_secret_client
+from src.firebase.firestore_client import MAX_WRITES_PER_BATCH
+from src.github import RequestPriority
 from src.model.app import Org, OrgType, Profile, User, UserRole
 from src.model.app.project import Project
 from src.model.app.project import Repository as AsyncRepository
 from src.model.app.task import Task, TaskComment, TaskSource
-from src.model.github import Installation, Repository
+from src.model.github import Installation, Issue, Repository
+
+# issues whose comments are fetched at the same time, on top of the GitHub client's own request limit
+ISSUE_IMPORT_CONCURRENCY = int(os.getenv("ISSUE_IMPORT_CONCURRENCY", "8"))
+
+# imported tasks are written once this many are pending, leaving room for the user update in the same write batch
+ISSUE_IMPORT_BATCH_SIZE = MAX_WRITES_PER_BATCH - 1
+
+# or this long after the previous write, so the UI keeps up with small imports
+ISSUE_IMPORT_FLUSH_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -30,7 +49,9 @@ async def onboard_github_async(
     await secret_client.create_user_github_token_secret_async(request.user_id, user_access_token)
 
     github_id, github_login = await github_client.get_user_information_async(user_access_token)
-    await firestore_client.update_user_async(request.user_id, github_id=github_id, github_login=github_login)
+    await firestore_client.update_user_async(
+        request.user_id, read_back=False, github_id=github_id, github_login=github_login
+    )
 
     access_token = await github_client.generate_app_access_token_async(request.installation_id)
     async for repo in github_client.list_installation_repos_async(access_token):
@@ -85,34 +106,80 @@ async def _create_repository_async(org_id: str, project: Project):
 
 
 async def _process_repository_issues_async(access_token: str, user_id: str, org_id: str, project: Project):
+    """
+    Import the open issues of the repository as tasks subscribed by the user who created the org.
+
+    Comments of many issues are fetched concurrently and tasks are written in batches, together with the user's
+    subscriptions so the UI shows the imported tasks as they arrive.
+    """
     firestore_client = get_firestore_client()
-    task_ids = []
-    async for github_issue in get_github_client().list_repository_open_issues_async(access_token, project.repo):
-        task_comments = []
-        async for github_issue_comment in get_github_client().list_issue_comments_async(
-            access_token, project.repo, github_issue.number
+    semaphore = asyncio.Semaphore(ISSUE_IMPORT_CONCURRENCY)
+    start_time = time.monotonic()
+
+    issue_imports = []
+    async for github_issue in get_github_client().list_repository_open_issues_async(
+        access_token, project.repo, RequestPriority.BACKGROUND
+    ):
+        issue_imports.append(asyncio.create_task(_import_issue_async(semaphore, access_token, project, github_issue)))
+
+    imported_count = 0
+    pending_task_ids = []
+    batch = firestore_client.batch()
+    last_flush_time = time.monotonic()
+    for issue_import in asyncio.as_completed(issue_imports):
+        task = await issue_import
+        batch.create_task(org_id, task)
+        pending_task_ids.append(task.id)
+
+        is_last = imported_count + len(pending_task_ids) == len(issue_imports)
+        if (
+            is_last
+            or len(batch) >= ISSUE_IMPORT_BATCH_SIZE
+            or time.monotonic() - last_flush_time >= ISSUE_IMPORT_FLUSH_SECONDS
         ):
-            task_comments.append(
-                TaskComment(
-                    author=github_issue_comment.user.login,
-                    body=github_issue_comment.body,
-                    created_at=github_issue_comment.created_at,
-                )
+            # repositories are imported concurrently, so subscriptions are appended rather than replaced
+            batch.update_user(user_id, subscribed_tasks=firestore.ArrayUnion(pending_task_ids))
+            await firestore_client.commit_batch_async(batch)
+            imported_count += len(pending_task_ids)
+            pending_task_ids = []
+            last_flush_time = time.monotonic()
+
+            elapsed_seconds = time.monotonic() - start_time
+            logger.info(
+                f"Imported {imported_count}/{len(issue_imports)} issues of {project.repo} "
+                f"({imported_count / elapsed_seconds:.1f} issues/s)"
             )
-        task = Task(
-            title=github_issue.title,
-            body=github_issue.body,
-            author=github_issue.user.login,
-            source=TaskSource.GITHUB,
-            comments=task_comments,
-            github_issue_id=github_issue.id,
-            github_issue_number=github_issue.number,
-            project_id=project.id,
-            created_at=github_issue.created_at,
-        )
-        await firestore_client.create_task_async(org_id, task)
-
-        # Auto subsribe all ingested tasks to the user who created the org.
-        # Update user doc for each task so the UI can dynamically show the update.
-        task_ids.append(task.id)
-        await firestore_client.update_user_async(user_id, subscribed_tasks=task_ids)
+
+
+async def _import_issue_async(
+    semaphore: asyncio.Semaphore, access_token: str, project: Project, github_issue: Issue
+) -> Task:
+    task_comments = []
+    if github_issue.comments:
+        try:
+            async with semaphore:
+                async for github_issue_comment in get_github_client().list_issue_comments_async(
+                    access_token, project.repo, github_issue.number, RequestPriority.BACKGROUND
+                ):
+                    task_comments.append(
+                        TaskComment(
+                            author=github_issue_comment.user.login,
+                            body=github_issue_comment.body,
+                            created_at=github_issue_comment.created_at,
+                        )
+                    )
+        except Exception as e:
+            logger.error(f"Failed to fetch comments of {project.repo}#{github_issue.number}, importing without: {e}")
+            task_comments = []
+
+    return Task(
+        title=github_issue.title,
+        body=github_issue.body,
+        author=github_issue.user.login,
+        source=TaskSource.GITHUB,
+        comments=task_comments,
+        github_issue_id=github_issue.id,
+        github_issue_number=github_issue.number,
+        project_id=project.id,
+        created_at=github_issue.created_at,
+    )
@@ -1,24 +1,24 @@
 import json
 import logging
-import os
 import traceback
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from fastapi.websockets import WebSocketState
 from langchain_core.messages import AIMessage, AIMessageChunk
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from psycopg import AsyncConnection
-from psycopg.rows import dict_row
 
 from src.agent import ChatAgentMetadata
 from src.clients import get_async_client, get_firestore_client
 from src.model.agent import AsyncConfig
 from src.model.app.task import Message, MessageStatus, TaskStatus
+from src.tools.tool_result_cache import log_tool_result_cache_stats
 from src.utils.chat_utils import handle_ai_message_chunk, parse_options_block, trim_options_block
+from src.utils.checkpointer_utils import create_checkpointer_async
+from src.utils.message_persister import StreamingMessagePersister, get_live_persister
 from src.utils.message_utils import get_message_chunk_text, get_message_text
-from src.utils.setup_utils import setup_repo_async
+from src.utils.setup_utils import acquire_repo_snapshot_async, release_repo_snapshot_async
+from src.utils.symbol_index import schedule_symbol_index_build
 from src.utils.task_utils import summarize_task_async
+from src.utils.websocket_writer import WebSocketWriter
 
 END_OF_MESSAGE = "<end>"
 
@@ -35,15 +35,20 @@ async def chat_async(
     project_id: str,
     task_id: str,
     is_dev: bool = False,
+    stream_offset: int = 0,
 ):
+    writer = WebSocketWriter(websocket)
+    repo_directory = None
     try:
         await websocket.accept()
+        writer.start()
 
         firestore_client = get_firestore_client()
         org = await firestore_client.get_org_async(org_id)
         project = await firestore_client.get_project_async(org_id, project_id)
         task = await firestore_client.get_task_async(org_id, task_id)
-        repo_directory = await setup_repo_async(org, project)
+        repo_directory = await acquire_repo_snapshot_async(org, project)
+        schedule_symbol_index_build(repo_directory)
 
         config = AsyncConfig(
             thread_id=task_id,
@@ -56,6 +61,11 @@ async def chat_async(
         )
         user_turns = 1
 
+        # a client reconnecting while a reply streams continues it from the offset of the text it has
+        live_persister = get_live_persister(task_id)
+        if live_persister:
+            await _follow_stream_async(writer, live_persister, stream_offset)
+
         while True:
             try:
                 user_message = await websocket.receive_text()
@@ -64,8 +74,8 @@ async def chat_async(
 
                 config["user_message"] = user_message
                 config["user_turns"] = user_turns
-                await _run_agent_async(websocket, config)
-                await _send_text_async(websocket)
+                await _run_agent_async(writer, config)
+                await writer.end_message_async(END_OF_MESSAGE)
 
                 user_turns += 1
             except WebSocketDisconnect as e:
@@ -75,89 +85,94 @@ async def chat_async(
                 break
             except Exception:
                 traceback.print_exc()
-                await _send_text_async(websocket)
+                await writer.end_message_async(END_OF_MESSAGE)
     except WebSocketDisconnect as e:
         logger.debug(f"WebSocket disconnected: {e.code}")
+    finally:
+        await writer.close_async()
+        await release_repo_snapshot_async(repo_directory)
 
 
-async def _send_text_async(websocket: WebSocket, message: str = END_OF_MESSAGE):
-    try:
-        if websocket and websocket.client_state == WebSocketState.CONNECTED:
-            await websocket.send_text(message)
-    except Exception:
-        # ignore and let execution finishes
-        pass
-
-
-async def _run_agent_async(websocket: WebSocket, config: AsyncConfig):
-    async with await AsyncConnection.connect(
-        os.getenv("DB_URI"), autocommit=True, prepare_threshold=None, row_factory=dict_row
-    ) as conn:
-        async with conn.pipeline() as pipe:
-            agent_metadata = ChatAgentMetadata(config)
-            checkpointer = AsyncPostgresSaver(conn, pipe)
-            agent = agent_metadata.create_agent(checkpointer)
-
-            parent_message = await _create_streaming_message_async(
-                config=config,
-                author=agent.name,
-                title=agent_metadata.get_default_title(),
-            )
+async def _run_agent_async(writer: WebSocketWriter, config: AsyncConfig):
+    async with create_checkpointer_async() as checkpointer:
+        agent_metadata = ChatAgentMetadata(config)
+        agent = agent_metadata.create_agent(checkpointer)
 
-            partial_match = ""
-            options_block = None
-
-            firestore_client = get_firestore_client()
+        parent_message = await _create_streaming_message_async(
+            config=config,
+            author=agent.name,
+            title=agent_metadata.get_default_title(),
+        )
 
-            try:
-                async for mode, event in agent.astream(
-                    input={"messages": agent_metadata.get_input_message()},
-                    config={"configurable": config, "recursion_limit": 200},
-                    stream_mode=["messages", "updates", "custom"],
-                ):
-                    if mode == "messages" and isinstance(event[0], AIMessageChunk):
-                        content = get_message_chunk_text(event[0])
-                        if not content:
+        partial_match = ""
+        options_block = None
+
+        persister = StreamingMessagePersister(config["org"].id, config["task"].id, parent_message.id)
+        persister.start()
+
+        try:
+            async for mode, event in agent.astream(
+                input={"messages": agent_metadata.get_input_message()},
+                config={"configurable": config, "recursion_limit": 200},
+                stream_mode=["messages", "updates", "custom"],
+            ):
+                if mode == "messages" and isinstance(event[0], AIMessageChunk):
+                    content = get_message_chunk_text(event[0])
+                    if not content:
+                        continue
+
+                    chunk, partial_match, options_block = handle_ai_message_chunk(content, partial_match, options_block)
+                    if chunk:
+                        persister.append(chunk)
+                        await writer.send_text_async(chunk)
+                elif mode == "updates" and "agent" in event:
+                    for message in event["agent"]["messages"]:
+                        if not isinstance(message, AIMessage):
                             continue
-
-                        chunk, partial_match, options_block = handle_ai_message_chunk(
-                            content, partial_match, options_block
-                        )
-                        if chunk:
-                            await _send_text_async(websocket, chunk)
-                    elif mode == "updates" and "agent" in event:
-                        for message in event["agent"]["messages"]:
-                            if not isinstance(message, AIMessage):
-                                continue
-                            parent_message.text = trim_options_block(get_message_text(message))
-                    elif mode == "custom":
-                        tool_message = f"<tool_call>{event.model_dump_json(exclude={'created_at'})}</tool_call>"
-                        await _send_text_async(websocket, tool_message)
-
-                message_actions = parse_options_block(options_block)
-                if message_actions:
-                    if any(message_action["label"] == "Execute" for message_action in message_actions):
-                        config["task_summary"] = await summarize_task_async(parent_message.text)
-                    await _send_text_async(websocket, f"<actions>{json.dumps(message_actions)}</actions>")
-
-                await firestore_client.update_message_async(
-                    config["org"].id,
-                    config["task"].id,
-                    message_id=parent_message.id,
-                    status=MessageStatus.COMPLETED,
-                    text=parent_message.text,
-                    is_streaming=False,
-                    actions=message_actions,
-                )
-            except Exception:
-                await firestore_client.update_message_async(
-                    config["org"].id,
-                    config["task"].id,
-                    message_id=parent_message.id,
-                    status=MessageStatus.FAILED,
-                    is_streaming=False,
-                )
-                raise
+                        parent_message.text = trim_options_block(get_message_text(message))
+                elif mode == "custom":
+                    tool_message = f"<tool_call>{event.model_dump_json(exclude={'created_at'})}</tool_call>"
+                    persister.append_control(tool_message)
+                    await writer.send_control_async(tool_message)
+
+            message_actions = parse_options_block(options_block)
+            if message_actions:
+                if any(message_action["label"] == "Execute" for message_action in message_actions):
+                    config["task_summary"] = await summarize_task_async(parent_message.text)
+                actions_message = f"<actions>{json.dumps(message_actions)}</actions>"
+                persister.append_control(actions_message)
+                await writer.send_control_async(actions_message)
+
+            await persister.finish_async(
+                status=MessageStatus.COMPLETED,
+                text=parent_message.text,
+                is_streaming=False,
+                actions=message_actions,
+            )
+        except Exception:
+            await persister.finish_async(status=MessageStatus.FAILED, is_streaming=False)
+            raise
+        finally:
+            log_tool_result_cache_stats(config["thread_id"])
+
+
+async def _follow_stream_async(writer: WebSocketWriter, persister: StreamingMessagePersister, stream_offset: int):
+    """
+    Send the text a reply streamed after the offset, then the rest of its stream as it comes.
+    """
+    text, queue = persister.subscribe(stream_offset)
+    try:
+        if text:
+            await writer.send_text_async(text)
+        while frame := await queue.get():
+            frame_text, is_control = frame
+            if is_control:
+                await writer.send_control_async(frame_text)
+            else:
+                await writer.send_text_async(frame_text)
+        await writer.end_message_async(END_OF_MESSAGE)
+    finally:
+        persister.unsubscribe(queue)
 
 
 async def _create_streaming_message_async(config: AsyncConfig, author: str, title: str) -> Message:
@@ -1,70 +1,31 @@
-from fastapi import APIRouter, BackgroundTasks, status
+from typing import Optional
 
-from src.api.task import (
-    ExecuteTaskJobRequest,
-    IndexProjectJobRequest,
-    ReviseTaskJobRequest,
-    ScheduleJobRequest,
-    ScheduleJobResponse,
-)
-from src.api.task.schedule_job_api import ResearchTaskJobRequest
-from src.clients import get_firestore_client, get_gcr_client
-from src.execute_task import execute_task_async
-from src.index_project import index_project_async
-from src.model.app.project import Project
+from fastapi import APIRouter, Header, HTTPException, status
+
+from src.api.task import ExecuteTaskJobRequest, ScheduleJobRequest, ScheduleJobResponse
+from src.clients import get_job_queue
+from src.model import compute_job_doc_id
+from src.model.job import Job
 from src.payment.payment_utils import decrement_credit_async
-from src.research_task import research_task_async
-from src.revise_task import revise_task_async
 
 router = APIRouter()
 
 
 @router.post("/schedule-job", status_code=status.HTTP_200_OK)
-async def schedule_job_async(request: ScheduleJobRequest, background_tasks: BackgroundTasks) -> ScheduleJobResponse:
-    if request.is_dev:
-        match request:
-            case IndexProjectJobRequest():
-                background_tasks.add_task(
-                    index_project_async,
-                    request.org_id,
-                    request.project_id,
-                    request.is_dev,
-                )
-            case ResearchTaskJobRequest():
-                background_tasks.add_task(
-                    research_task_async,
-                    request.org_id,
-                    request.task_id,
-                    request.is_dev,
-                )
-            case ExecuteTaskJobRequest():
-                background_tasks.add_task(
-                    execute_task_async,
-                    request.org_id,
-                    request.task_id,
-                    request.is_dev,
-                )
-            case ReviseTaskJobRequest():
-                background_tasks.add_task(
-                    revise_task_async,
-                    request.org_id,
-                    request.task_id,
-                    request.is_dev,
-                )
-        return ScheduleJobResponse()
-
-    if isinstance(request, ExecuteTaskJobRequest):
+async def schedule_job_async(
+    request: ScheduleJobRequest, idempotency_key: Optional[str] = Header(default=None)
+) -> ScheduleJobResponse:
+    """
+    Queue the job for the job dispatcher. Requests with the same `Idempotency-Key` header schedule the job only once,
+    and reusing a key for a different request is rejected.
+    """
+    job = Job(org_id=request.org_id, job_type=request.job_type, request=request.model_dump())
+    if idempotency_key:
+        job.id = compute_job_doc_id(request.org_id, request.job_type.value, idempotency_key)
+
+    job, created = await get_job_queue().enqueue_async(job)
+    if not created and job.request != request.model_dump(mode="json"):
+        raise HTTPException(status_code=409, detail="Idempotency key already used for a different request")
+    if created and not request.is_dev and isinstance(request, ExecuteTaskJobRequest):
         await decrement_credit_async(request.org_id)
-
-    project = await _get_project_async(request)
-    await get_gcr_client().run_job_async(request, project.languages)
-    return ScheduleJobResponse()
-
-
-async def _get_project_async(request: ScheduleJobRequest) -> Project:
-    firestore_client = get_firestore_client()
-    if hasattr(request, "project_id") and request.project_id:
-        return await firestore_client.get_project_async(request.org_id, request.project_id)
-
-    task = await firestore_client.get_task_async(request.org_id, request.task_id)
-    return await firestore_client.get_project_async(request.org_id, task.project_id)
+    return ScheduleJobResponse(job_id=job.id)
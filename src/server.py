@@ -5,7 +5,9 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.clients import cleanup_clients_async
+from src.clients import cleanup_clients_async, get_job_queue
+from src.job.job_dispatcher import JobDispatcher, create_job_executor
+from src.job.job_executor import JobExecutorBackend
 from src.routers.auth import auth_with_github, invite_people, redeem_email_code, redeem_invite_code, verify_email
 from src.routers.github import handle_github_events, submit_review
 from src.routers.onboarding import onboard_github
@@ -13,15 +15,29 @@ from src.routers.payment import create_checkout_session, create_portal_session,
 from src.routers.support import handle_contact_us
 from src.routers.task import chat_ws, schedule_job
 from src.utils.bootstrap_utils import bootstrap_application_async, create_bootstrap_config
+from src.utils.index_executor import close_index_executor_async
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    bootstrap_config = create_bootstrap_config(os.getenv("IS_DEV", "False") == "True")
+    is_dev = os.getenv("IS_DEV", "False") == "True"
+    bootstrap_config = create_bootstrap_config(
+        is_dev,
+        initialize_db_pool=True,
+        enable_firestore_cache=True,
+        initialize_job_queue=True,
+    )
     await bootstrap_application_async(bootstrap_config)
+    job_executor_backend = JobExecutorBackend(
+        os.getenv("JOB_EXECUTOR", JobExecutorBackend.LOCAL.value if is_dev else JobExecutorBackend.GCR.value)
+    )
+    job_dispatcher = JobDispatcher(get_job_queue(), create_job_executor(job_executor_backend, is_dev))
+    job_dispatcher.start()
 
     yield
 
+    await job_dispatcher.stop_async()
+    await close_index_executor_async()
     await cleanup_clients_async()
 
 
@@ -1,11 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import final
+from typing import ClassVar, Optional, final
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import ArgsSchema, BaseTool
 from langgraph.config import get_stream_writer
 
 from src.model.app.task import MessageEvent
+from src.tools.tool_result_cache import get_tool_result_cache, get_workspace_state_async
 
 
 class AsyncTool(BaseTool, ABC):
@@ -13,12 +14,28 @@ class AsyncTool(BaseTool, ABC):
     Base tool class for async application
     """
 
+    cacheable: ClassVar[bool] = False
+    """
+    Whether results only depend on the input and the workspace's contents, so they are cached until the workspace
+    changes
+    """
+
     @final
     async def _arun(self, config: RunnableConfig, *args: any, **kwargs: any) -> any:
         try:
             tool_input = self.args_schema(**kwargs)
             await self._validate_input_async(tool_input, config)
-            response = await self._call_async(tool_input, config)
+
+            cache = get_tool_result_cache()
+            cache_key = await self._get_cache_key_async(tool_input, config) if self.cacheable else None
+            hit, response = cache.get(cache_key) if cache_key else (False, None)
+            if not hit:
+                response = await self._call_async(tool_input, config)
+                if cache_key:
+                    cache.put(cache_key, response)
+            if cache_key:
+                cache.record(config["configurable"].get("thread_id", ""), self.name, hit)
+
             await self._on_tool_completed_async(tool_input, response, config)
         except Exception as e:
             # re-raise so LLM can see the error
@@ -26,6 +43,15 @@ class AsyncTool(BaseTool, ABC):
         else:
             return response
 
+    async def _get_cache_key_async(self, tool_input: ArgsSchema, config: RunnableConfig) -> Optional[str]:
+        repo_directory = config.get("configurable", {}).get("repo_directory")
+        if not repo_directory:
+            return None
+        workspace_state = await get_workspace_state_async(repo_directory)
+        if not workspace_state:
+            return None
+        return f"{self.name}:{repo_directory}:{workspace_state}:{tool_input.model_dump_json()}"
+
     def _run(self, *args: any, **kwargs: any) -> any:
         raise NotImplementedError("AsyncTool only supports async execution. Use arun() instead of run().")
 
@@ -0,0 +1,5 @@
+from src.tools.code.find_symbol import FindSymbol
+
+__all__ = [
+    "FindSymbol",
+]
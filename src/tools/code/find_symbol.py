@@ -0,0 +1,91 @@
+import re
+from typing import ClassVar, Type
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel, Field
+
+from src.tools.async_tool import AsyncTool
+from src.utils.code_search import git_grep_async
+from src.utils.symbol_index import get_symbol_index_async
+
+DEFAULT_MAX_RESULTS = 100
+MAX_RESULTS_LIMIT = 1000
+
+SYMBOL_NAME_PATTERN = re.compile(r"^[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*$")
+
+# "path:line" of a "path:line:text" line of git grep output
+REFERENCE_LOCATION_PATTERN = re.compile(r"^(.*?:\d+):")
+
+
+class FindSymbolInput(BaseModel):
+    name: str = Field(description="Name of the class, function, method, type or constant, e.g. Server or Server.start")
+    include_references: bool = Field(
+        default=False, description="Also return the lines of tracked files that use the name as a whole word"
+    )
+    max_results: int = Field(
+        default=DEFAULT_MAX_RESULTS,
+        ge=1,
+        le=MAX_RESULTS_LIMIT,
+        description="Maximum number of definitions and of references to return",
+    )
+
+
+class FindSymbol(AsyncTool):
+    name: str = "find_symbol"
+    description: str = (
+        "Find where a symbol is defined, from an index of the declarations in the repository's source files. "
+        "Definitions are returned as path:line: kind name, optionally followed by the lines referencing the symbol. "
+        "Prefer this over git_grep to locate a definition"
+    )
+    args_schema: Type[BaseModel] = FindSymbolInput
+    cacheable: ClassVar[bool] = True
+
+    async def _validate_input_async(self, tool_input: FindSymbolInput, config: RunnableConfig):
+        if not SYMBOL_NAME_PATTERN.match(tool_input.name):
+            raise ValueError(f"{tool_input.name} is not a symbol name, use git_grep to search for text")
+
+    async def _call_async(self, tool_input: FindSymbolInput, config: RunnableConfig) -> list[str]:
+        repo_directory = config.get("configurable").get("repo_directory")
+        index = await get_symbol_index_async(repo_directory)
+        if index is None:
+            return ["The symbol index is not available, use git_grep to find definitions"]
+
+        definitions = index.find_definitions(tool_input.name)
+        lines = [f"{len(definitions)} definitions of {tool_input.name}"]
+        lines.extend(
+            f"{path}:{line_number}: {kind} {qualified_name}"
+            for path, line_number, kind, qualified_name in definitions[: tool_input.max_results]
+        )
+        if len(definitions) > tool_input.max_results:
+            lines.append(f"... {len(definitions) - tool_input.max_results} more definitions were cut off")
+
+        if tool_input.include_references:
+            short_name = tool_input.name.rsplit(".", 1)[-1]
+            references, truncated = await git_grep_async(
+                repo_directory,
+                short_name.replace("$", "\\$"),
+                tool_input.max_results + len(definitions),
+                whole_word=True,
+                ignore_case=False,
+            )
+            definition_locations = {f"{path}:{line_number}" for path, line_number, _, _ in definitions}
+            references = [
+                reference
+                for reference in references
+                if (match := REFERENCE_LOCATION_PATTERN.match(reference)) is None
+                or match.group(1) not in definition_locations
+            ]
+            lines.append(f"References to {short_name}:")
+            lines.extend(references[: tool_input.max_results])
+            if truncated or len(references) > tool_input.max_results:
+                lines.append("... more references were cut off, use git_grep with a path filter to see them")
+        return lines
+
+    def _get_in_progress_title(self, tool_input: FindSymbolInput, config: RunnableConfig) -> str:
+        return f"Looking up '{tool_input.name}'"
+
+    def _get_completed_title(self, tool_input: FindSymbolInput, config: RunnableConfig) -> str:
+        return f"Looked up '{tool_input.name}'"
+
+    def _get_text(self, tool_input: FindSymbolInput, response: list[str], config: RunnableConfig) -> str:
+        return "\n".join(response)
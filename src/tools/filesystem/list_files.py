@@ -1,21 +1,52 @@
 import asyncio
+import fnmatch
 import os
-from typing import Type
+from typing import ClassVar, Optional, Type
 
 from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, Field
 
 from src.tools.async_tool import AsyncTool
+from src.utils.git_utils import get_ignored_paths_async
+
+DEFAULT_MAX_DEPTH = 3
+MAX_DEPTH_LIMIT = 10
+DEFAULT_MAX_RESULTS = 500
+MAX_RESULTS_LIMIT = 5000
+
+# never descended into, whatever the .gitignore files say
+SKIPPED_DIRECTORY_NAMES = {".git"}
 
 
 class ListFilesInput(BaseModel):
     directory_path: str = Field(description="Absolute path to the directory")
+    recursive: bool = Field(default=False, description="List the contents of subdirectories too, up to max_depth")
+    max_depth: int = Field(
+        default=DEFAULT_MAX_DEPTH,
+        ge=1,
+        le=MAX_DEPTH_LIMIT,
+        description="Number of directory levels to list when recursive, 1 lists only the directory itself",
+    )
+    pattern: Optional[str] = Field(
+        default=None,
+        description="Only list files whose name or path relative to the directory matches this glob, e.g. test_*.py",
+    )
+    extensions: Optional[list[str]] = Field(
+        default=None, description="Only list files with one of these extensions, e.g. ['.py', '.ts']"
+    )
+    max_results: int = Field(
+        default=DEFAULT_MAX_RESULTS, ge=1, le=MAX_RESULTS_LIMIT, description="Maximum number of entries to return"
+    )
 
 
 class ListFiles(AsyncTool):
     name: str = "list_files"
-    description: str = "List all files in a directory"
+    description: str = (
+        "List the files in a directory with their sizes, directories end with a slash. "
+        "Can list recursively, filtered by glob pattern or extensions. Files ignored by .gitignore are left out"
+    )
     args_schema: Type[BaseModel] = ListFilesInput
+    cacheable: ClassVar[bool] = True
 
     async def _validate_input_async(self, tool_input: ListFilesInput, config: RunnableConfig):
         repo_directory = config.get("configurable").get("repo_directory")
@@ -27,11 +58,46 @@ class ListFiles(AsyncTool):
             raise NotADirectoryError(f"{tool_input.directory_path} is not a directory")
 
     async def _call_async(self, tool_input: ListFilesInput, config: RunnableConfig) -> list[str]:
+        """
+        Walks the directory one level at a time, so each level takes a single `git check-ignore` call and ignored
+        directories are never descended into.
+        """
+        directory_path = tool_input.directory_path.rstrip("/")
+        max_depth = tool_input.max_depth if tool_input.recursive else 1
+        extensions = {f".{extension.lstrip('.').lower()}" for extension in tool_input.extensions or []}
+
+        entries: list[tuple[str, Optional[int]]] = []
+        omitted_count = 0
+        level = [""]
+        for _ in range(max_depth):
+            level_entries = await asyncio.to_thread(_scan_directories, directory_path, level)
+            ignored_paths = await get_ignored_paths_async(directory_path, [path for path, _ in level_entries])
+            level = []
+            for path, is_directory in level_entries:
+                if path in ignored_paths:
+                    continue
+                if is_directory:
+                    level.append(path)
+                if not _matches_filters(path, is_directory, tool_input.pattern, extensions):
+                    continue
+                if len(entries) >= tool_input.max_results:
+                    omitted_count += 1
+                    continue
+                entries.append((path, None if is_directory else -1))
+            if not level:
+                break
+
         file_list = []
-        items = await asyncio.to_thread(os.listdir, tool_input.directory_path)
-        for item in items:
-            item_path = os.path.join(tool_input.directory_path, item)
-            file_list.append(item_path)
+        sizes = await asyncio.to_thread(
+            _get_sizes, directory_path, [path for path, size in entries if size is not None]
+        )
+        for path, size in sorted(entries):
+            if size is None:
+                file_list.append(f"{directory_path}/{path}/")
+            else:
+                file_list.append(f"{directory_path}/{path} ({sizes.get(path, 0)} bytes)")
+        if omitted_count:
+            file_list.append(f"... {omitted_count} more entries were left out, narrow the listing or raise max_results")
         return file_list
 
     def _get_in_progress_title(self, tool_input: ListFilesInput, config: RunnableConfig) -> str:
@@ -46,3 +112,47 @@ class ListFiles(AsyncTool):
 
     def _get_text(self, tool_input: ListFilesInput, response: list[str], config: RunnableConfig) -> str:
         return "\n".join([self._sanitize_path(file_path, config) for file_path in response])
+
+
+def _scan_directories(directory_path: str, relative_paths: list[str]) -> list[tuple[str, bool]]:
+    """
+    Returns the entries of the directories as paths relative to the listed directory, and whether they are
+    directories. Symlinks to directories are listed but not followed.
+    """
+    entries = []
+    for relative_path in relative_paths:
+        try:
+            with os.scandir(f"{directory_path}/{relative_path}" if relative_path else directory_path) as iterator:
+                for entry in iterator:
+                    if entry.name in SKIPPED_DIRECTORY_NAMES:
+                        continue
+                    path = f"{relative_path}/{entry.name}" if relative_path else entry.name
+                    entries.append((path, entry.is_dir(follow_symlinks=False)))
+        except (PermissionError, FileNotFoundError):
+            continue
+    return entries
+
+
+def _get_sizes(directory_path: str, relative_paths: list[str]) -> dict[str, int]:
+    sizes = {}
+    for relative_path in relative_paths:
+        try:
+            sizes[relative_path] = os.lstat(f"{directory_path}/{relative_path}").st_size
+        except OSError:
+            continue
+    return sizes
+
+
+def _matches_filters(path: str, is_directory: bool, pattern: Optional[str], extensions: set[str]) -> bool:
+    if not pattern and not extensions:
+        return True
+    # with filters, only matching files are listed
+    if is_directory:
+        return False
+    if extensions and os.path.splitext(path)[1].lower() not in extensions:
+        return False
+    if pattern:
+        name = os.path.basename(path)
+        pattern = pattern.replace("**/", "*").replace("**", "*")
+        return fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, pattern)
+    return True
@@ -1,21 +1,46 @@
+import asyncio
+import mmap
 import os
-from typing import Type
+from typing import ClassVar, Type
 
-import aiofiles
 from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, Field
 
 from src.tools.async_tool import AsyncTool
+from src.utils.file_outline import get_file_outline, get_large_file_outline
+
+DEFAULT_LINE_LIMIT = 2000
+
+# at most this much of a file is returned by one read, whatever the line limit
+MAX_READ_BYTES = 256 * 1024
+
+# larger files are memory mapped, so only the read range is loaded
+MMAP_THRESHOLD_BYTES = 1024 * 1024
+
+# like git, files with a NUL byte in their first bytes are binary
+BINARY_CHECK_BYTES = 8000
+
+MAX_OUTLINE_SYMBOLS = 500
 
 
 class ReadFileInput(BaseModel):
     file_path: str = Field(description="Absolute path to the file to read")
+    offset: int = Field(default=1, ge=1, description="Line number to start reading from, starting at 1")
+    limit: int = Field(default=DEFAULT_LINE_LIMIT, ge=1, description="Maximum number of lines to read")
+    outline: bool = Field(
+        default=False,
+        description="Return the line count and the top-level symbols with their line numbers instead of the contents",
+    )
 
 
 class ReadFile(AsyncTool):
     name: str = "read_file"
-    description: str = "Read complete contents of a file using UTF-8 encoding"
+    description: str = (
+        "Read the contents of a file using UTF-8 encoding, by default its first 2000 lines. "
+        "Use offset and limit to read other lines of large files, or outline to see their structure first"
+    )
     args_schema: Type[BaseModel] = ReadFileInput
+    cacheable: ClassVar[bool] = True
 
     async def _validate_input_async(self, tool_input: ReadFileInput, config: RunnableConfig):
         repo_directory = config.get("configurable").get("repo_directory")
@@ -23,11 +48,11 @@ class ReadFile(AsyncTool):
             raise ValueError(f"The given path is not absolute. It must start with {repo_directory}.")
         if not os.path.exists(tool_input.file_path):
             raise FileNotFoundError()
+        if os.path.isdir(tool_input.file_path):
+            raise IsADirectoryError(f"{tool_input.file_path} is a directory")
 
     async def _call_async(self, tool_input: ReadFileInput, config: RunnableConfig) -> str:
-        async with aiofiles.open(tool_input.file_path, mode="r", encoding="utf-8") as file:
-            contents = await file.read()
-            return contents
+        return await asyncio.to_thread(_read_file, tool_input)
 
     def _get_in_progress_title(self, tool_input: ReadFileInput, config: RunnableConfig) -> str:
         sanitized_path = self._sanitize_path(tool_input.file_path, config)
@@ -36,3 +61,94 @@ class ReadFile(AsyncTool):
     def _get_completed_title(self, tool_input: ReadFileInput, config: RunnableConfig) -> str:
         sanitized_path = self._sanitize_path(tool_input.file_path, config)
         return f"Read {sanitized_path}"
+
+
+def _read_file(tool_input: ReadFileInput) -> str:
+    size = os.path.getsize(tool_input.file_path)
+    if size == 0:
+        return ""
+
+    with open(tool_input.file_path, "rb") as file:
+        if b"\0" in file.read(BINARY_CHECK_BYTES):
+            return f"Binary file ({size} bytes), its contents are not shown"
+        file.seek(0)
+
+        if size <= MMAP_THRESHOLD_BYTES:
+            return _read_buffer(tool_input, file.read())
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _read_buffer(tool_input, buffer)
+
+
+def _read_buffer(tool_input: ReadFileInput, buffer: bytes | mmap.mmap) -> str:
+    size = len(buffer)
+    line_count = _count_lines(buffer)
+    if tool_input.outline:
+        return _get_outline(tool_input.file_path, buffer, line_count)
+
+    start = _find_line_start(buffer, tool_input.offset)
+    if start is None:
+        return f"The file has {line_count} lines, there is nothing to read from line {tool_input.offset}"
+
+    end = start
+    last_line = tool_input.offset - 1
+    while last_line < tool_input.offset - 1 + tool_input.limit and end < size:
+        newline = buffer.find(b"\n", end)
+        line_end = newline + 1 if newline != -1 else size
+        if line_end - start > MAX_READ_BYTES:
+            break
+        end = line_end
+        last_line += 1
+
+    truncated_line = False
+    if end == start:
+        # a single line longer than the byte cap, e.g. minified code
+        end = start + MAX_READ_BYTES
+        truncated_line = True
+
+    contents = buffer[start:end].decode("utf-8", errors="replace")
+    if tool_input.offset == 1 and end == size:
+        return contents
+
+    shown_lines = f"line {tool_input.offset}" if truncated_line else f"lines {tool_input.offset}-{last_line}"
+    marker = f"[Showing {shown_lines} of {line_count} ({end - start} of {size} bytes)"
+    if truncated_line:
+        marker += ", the line is cut off"
+    elif last_line < line_count:
+        marker += f", continue with offset={last_line + 1}"
+    contents = contents.rstrip("\n")
+    return f"{contents}\n{marker}]"
+
+
+def _count_lines(buffer: bytes | mmap.mmap) -> int:
+    if isinstance(buffer, bytes):
+        newline_count = buffer.count(b"\n")
+    else:
+        newline_count = 0
+        for position in range(0, len(buffer), MMAP_THRESHOLD_BYTES):
+            newline_count += buffer[position : position + MMAP_THRESHOLD_BYTES].count(b"\n")
+    return newline_count + (0 if buffer[-1:] == b"\n" else 1)
+
+
+def _find_line_start(buffer: bytes | mmap.mmap, line_number: int) -> int | None:
+    position = 0
+    for _ in range(line_number - 1):
+        newline = buffer.find(b"\n", position)
+        if newline == -1 or newline + 1 >= len(buffer):
+            return None
+        position = newline + 1
+    return position
+
+
+def _get_outline(file_path: str, buffer: bytes | mmap.mmap, line_count: int) -> str:
+    if isinstance(buffer, bytes):
+        outline = get_file_outline(file_path, buffer.decode("utf-8", errors="replace"))
+    else:
+        # memory mapped files are too large to be decoded and parsed at once
+        outline = get_large_file_outline(file_path, buffer)
+    lines = [f"{line_count} lines, {len(buffer)} bytes"]
+    lines.extend(f"{line_number}: {symbol}" for line_number, symbol in outline[:MAX_OUTLINE_SYMBOLS])
+    if len(outline) > MAX_OUTLINE_SYMBOLS:
+        lines.append(f"... {len(outline) - MAX_OUTLINE_SYMBOLS} more symbols")
+    elif not outline:
+        lines.append("No top-level symbols found")
+    return "\n".join(lines)
@@ -1,42 +1,59 @@
-import asyncio
-from typing import Type
+from typing import ClassVar, Optional, Type
 
 from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, Field
 
 from src.tools.async_tool import AsyncTool
+from src.utils.code_search import git_grep_async
+
+DEFAULT_MAX_RESULTS = 200
+MAX_RESULTS_LIMIT = 2000
+MAX_CONTEXT_LINES = 10
 
 
 class GitGrepInput(BaseModel):
-    pattern: str = Field(description="The search pattern to grep for")
+    pattern: str = Field(description="The search pattern to grep for, a basic regular expression")
+    max_results: int = Field(
+        default=DEFAULT_MAX_RESULTS,
+        ge=1,
+        le=MAX_RESULTS_LIMIT,
+        description="Maximum number of output lines to return",
+    )
+    path_filter: Optional[str] = Field(
+        default=None,
+        description="Only search files under this directory or matching this glob, relative to the repository root",
+    )
+    context_lines: int = Field(
+        default=0, ge=0, le=MAX_CONTEXT_LINES, description="Number of lines to show before and after each match"
+    )
 
 
 class GitGrep(AsyncTool):
     name: str = "git_grep"
-    description: str = "Search for patterns (case-insensitive) in files tracked by Git using grep"
+    description: str = (
+        "Search for patterns (case-insensitive) in files tracked by Git using grep. "
+        "Matches are returned as path:line:text"
+    )
     args_schema: Type[BaseModel] = GitGrepInput
+    cacheable: ClassVar[bool] = True
 
     async def _validate_input_async(self, tool_input: GitGrepInput, config: RunnableConfig):
         pass
 
     async def _call_async(self, tool_input: GitGrepInput, config: RunnableConfig) -> list[str]:
         repo_directory = config.get("configurable").get("repo_directory")
-        process = await asyncio.create_subprocess_exec(
-            "git",
-            "grep",
-            "-i",
-            "-I",
+        lines, truncated = await git_grep_async(
+            repo_directory,
             tool_input.pattern,
-            cwd=repo_directory,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            tool_input.max_results,
+            tool_input.path_filter,
+            tool_input.context_lines,
         )
-        stdout, _ = await process.communicate()
-
-        if process.returncode == 0:
-            return stdout.decode().splitlines()
-        else:
-            return []
+        if truncated:
+            lines.append(
+                f"... more matches were cut off after {tool_input.max_results} lines, narrow the pattern or path filter"
+            )
+        return lines
 
     def _get_in_progress_title(self, tool_input: GitGrepInput, config: RunnableConfig) -> str:
         return f"Searching for '{tool_input.pattern}'"
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Optional
+
+from src.utils.git_utils import run_git_async
+
+TOOL_RESULT_CACHE_MAX_BYTES = int(os.getenv("TOOL_RESULT_CACHE_MAX_BYTES", str(64 * 2**20)))
+
+# the state of a workspace is reused for this long, so the parallel tool calls of an agent share one check
+WORKSPACE_STATE_TTL_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+# state of each workspace and when it was checked, and the checks in progress
+_workspace_states: dict[str, tuple[float, Optional[str]]] = {}
+_workspace_state_checks: dict[str, asyncio.Task] = {}
+
+
+class ToolResultCache:
+    """
+    Least recently used cache of tool results, bounded by the approximate size of the results.
+
+    Hits and misses are counted per agent run, identified by the thread ID of the agent's config.
+    """
+
+    def __init__(self, max_bytes: int = TOOL_RESULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, tuple[Any, int]] = OrderedDict()
+        self.size_bytes = 0
+        self.run_stats: dict[str, Counter] = {}
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return False, None
+        self.entries.move_to_end(key)
+        response = entry[0]
+        # callers may extend the results they get, e.g. list_files responses
+        return True, list(response) if isinstance(response, list) else response
+
+    def put(self, key: str, response: Any):
+        size_bytes = len(key) + _get_size_bytes(response)
+        if size_bytes > self.max_bytes:
+            return
+        if key in self.entries:
+            self.size_bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (list(response) if isinstance(response, list) else response, size_bytes)
+        self.size_bytes += size_bytes
+        while self.size_bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self.entries.popitem(last=False)
+            self.size_bytes -= evicted_bytes
+
+    def record(self, run_id: str, tool_name: str, hit: bool):
+        stats = self.run_stats.setdefault(run_id, Counter())
+        stats["hits" if hit else "misses"] += 1
+        stats[f"{tool_name}_hits" if hit else f"{tool_name}_misses"] += 1
+
+    def pop_run_stats(self, run_id: str) -> dict[str, int]:
+        return dict(self.run_stats.pop(run_id, Counter()))
+
+
+_tool_result_cache = ToolResultCache()
+
+
+def get_tool_result_cache() -> ToolResultCache:
+    return _tool_result_cache
+
+
+def log_tool_result_cache_stats(run_id: str):
+    """
+    Log and reset the cache hit rate of an agent run, once the run is over.
+    """
+    stats = _tool_result_cache.pop_run_stats(run_id)
+    calls = stats.get("hits", 0) + stats.get("misses", 0)
+    if not calls:
+        return
+    logger.info(
+        f"Tool result cache of run {run_id}: {stats.get('hits', 0)}/{calls} hits "
+        f"({stats.get('hits', 0) / calls:.0%}), {stats}"
+    )
+
+
+async def get_workspace_state_async(repo_directory: str) -> Optional[str]:
+    """
+    Returns an identifier of the workspace's contents: the HEAD commit and the modification time of the git index.
+    None when the directory is not a git repository.
+
+    Cached tools read snapshots and leased workspaces, which only change through git, moving HEAD or rewriting the
+    index. Code changing a workspace otherwise must call `invalidate_workspace_state`. A state is reused for
+    `WORKSPACE_STATE_TTL_SECONDS`, and calls made while a check is in progress share its result.
+    """
+    checked_at, state = _workspace_states.get(repo_directory, (None, None))
+    if checked_at is not None and time.monotonic() - checked_at < WORKSPACE_STATE_TTL_SECONDS:
+        return state
+
+    check = _workspace_state_checks.get(repo_directory)
+    if check is None:
+        check = asyncio.create_task(_check_workspace_state_async(repo_directory))
+        _workspace_state_checks[repo_directory] = check
+        check.add_done_callback(lambda _: _complete_workspace_state_check(repo_directory, check))
+    # a cancelled caller does not cancel the check of the other callers
+    return await asyncio.shield(check)
+
+
+def invalidate_workspace_state(repo_directory: str):
+    """
+    Forget the state of a workspace once it changed, so its next tool calls do not reuse results of its old contents.
+    """
+    _workspace_states.pop(repo_directory, None)
+    _workspace_state_checks.pop(repo_directory, None)
+
+
+async def _check_workspace_state_async(repo_directory: str) -> Optional[str]:
+    try:
+        output = await run_git_async(repo_directory, "rev-parse", "HEAD", "--git-path", "index")
+    except RuntimeError:
+        return None
+    head, index_path = output.decode().splitlines()
+    try:
+        index_mtime = os.stat(os.path.join(repo_directory, index_path)).st_mtime_ns
+    except FileNotFoundError:
+        index_mtime = 0
+    return f"{head}:{index_mtime}"
+
+
+def _complete_workspace_state_check(repo_directory: str, check: asyncio.Task):
+    # checks started before the workspace was invalidated are not kept
+    if _workspace_state_checks.get(repo_directory) is not check:
+        return
+    del _workspace_state_checks[repo_directory]
+    if not check.cancelled() and check.exception() is None:
+        _workspace_states[repo_directory] = (time.monotonic(), check.result())
+
+
+def _get_size_bytes(response: Any) -> int:
+    if isinstance(response, str):
+        return len(response)
+    if isinstance(response, list):
+        return sum(len(item) if isinstance(item, str) else 64 for item in response)
+    return 64
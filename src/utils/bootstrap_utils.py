@@ -1,10 +1,12 @@
 import logging
+import os
 from dataclasses import dataclass
 
 from dotenv import load_dotenv
 from firebase_admin import credentials, initialize_app
 
-from src.clients import initialize_clients_async
+from src.clients import initialize_clients_async, initialize_db_pool_async, initialize_job_queue
+from src.job import JobQueueBackend
 
 
 @dataclass
@@ -15,6 +17,13 @@ class BootstrapConfig:
     load_env: bool = True
     initialize_firebase: bool = True
     initialize_clients: bool = True
+    enable_firestore_cache: bool = False
+    initialize_db_pool: bool = False
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_pool_timeout: float = 30.0
+    initialize_job_queue: bool = False
+    job_queue_backend: JobQueueBackend = JobQueueBackend.FIRESTORE
 
 
 async def bootstrap_application_async(config: BootstrapConfig = BootstrapConfig()) -> None:
@@ -31,8 +40,28 @@ async def bootstrap_application_async(config: BootstrapConfig = BootstrapConfig(
         initialize_app(cred)
 
     if config.initialize_clients:
-        await initialize_clients_async()
+        await initialize_clients_async(config.enable_firestore_cache)
 
+    if config.initialize_db_pool:
+        await initialize_db_pool_async(config.db_pool_min_size, config.db_pool_max_size, config.db_pool_timeout)
 
-def create_bootstrap_config(is_dev: bool = False) -> BootstrapConfig:
-    return BootstrapConfig(log_level=logging.DEBUG if is_dev else logging.INFO)
+    if config.initialize_job_queue:
+        initialize_job_queue(config.job_queue_backend)
+
+
+def create_bootstrap_config(
+    is_dev: bool = False,
+    initialize_db_pool: bool = False,
+    enable_firestore_cache: bool = False,
+    initialize_job_queue: bool = False,
+) -> BootstrapConfig:
+    return BootstrapConfig(
+        log_level=logging.DEBUG if is_dev else logging.INFO,
+        enable_firestore_cache=enable_firestore_cache,
+        initialize_db_pool=initialize_db_pool,
+        db_pool_min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        db_pool_max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        initialize_job_queue=initialize_job_queue,
+        job_queue_backend=JobQueueBackend(os.getenv("JOB_QUEUE_BACKEND", JobQueueBackend.FIRESTORE.value)),
+    )
@@ -0,0 +1,35 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+from src.clients import get_db_pool
+
+logger = logging.getLogger(__name__)
+
+
+def create_checkpointer() -> AsyncPostgresSaver:
+    """
+    Create a Postgres checkpointer backed by the shared connection pool.
+
+    A pooled connection is only borrowed for each checkpoint read or write, so the checkpointer holds none while its
+    agent does not run, and concurrent runs are not limited by the size of the pool.
+    """
+    return AsyncPostgresSaver(get_db_pool())
+
+
+@asynccontextmanager
+async def create_checkpointer_async() -> AsyncIterator[AsyncPostgresSaver]:
+    """
+    Create a checkpointer for one agent run, and log the pool metrics once the run is over.
+    """
+    yield create_checkpointer()
+    logger.debug(f"Postgres pool stats: {get_db_pool_stats()}")
+
+
+def get_db_pool_stats() -> dict[str, int]:
+    """
+    Returns the pool metrics, e.g. pool_size, pool_available, requests_waiting, requests_num and usage_ms.
+    """
+    return get_db_pool().get_stats()
@@ -0,0 +1,224 @@
+import asyncio
+import fnmatch
+import logging
+from typing import Optional
+
+from src.utils.git_utils import run_git_async
+from src.utils.trigram_index import get_trigram_index_async
+
+# candidate files are passed to git grep in chunks of this many paths, to stay within the argument limit
+PATHSPEC_CHUNK_SIZE = 1000
+
+# the index is only used when it rules out at least this share of the files
+MAX_CANDIDATE_RATIO = 0.5
+
+# longer lines of output are cut, e.g. lines of minified code
+MAX_LINE_LENGTH = 500
+
+# regex characters after which the preceding character is optional in a basic regular expression
+OPTIONAL_QUANTIFIERS = ("*", "\\?", "\\{")
+
+logger = logging.getLogger(__name__)
+
+
+async def git_grep_async(
+    repo_directory: str,
+    pattern: str,
+    max_results: int,
+    path_filter: Optional[str] = None,
+    context_lines: int = 0,
+    use_index: bool = True,
+    whole_word: bool = False,
+    ignore_case: bool = True,
+) -> tuple[list[str], bool]:
+    """
+    Search the tracked files of the repository with `git grep -i -I -n` and the same basic regular expression syntax.
+
+    When the trigram index of the HEAD commit is ready, git grep only searches the files that contain the literals the
+    pattern requires, plus the files changed in the working tree. Returns at most `max_results` lines of output, and
+    whether more output was cut off.
+
+    Matches can be restricted to whole words, as with `git grep -w`, and to the case of the pattern.
+    """
+    args = ["grep", "-I", "-n", "--no-color"]
+    if ignore_case:
+        args.append("-i")
+    if whole_word:
+        args.append("-w")
+    if context_lines:
+        args.append(f"--context={context_lines}")
+    args.extend(["-e", pattern, "--"])
+
+    candidate_paths = await _get_candidate_paths_async(repo_directory, pattern, path_filter) if use_index else None
+    if candidate_paths is None:
+        return await _run_git_grep_async(repo_directory, [*args, *([path_filter] if path_filter else [])], max_results)
+
+    lines: list[str] = []
+    for i in range(0, len(candidate_paths), PATHSPEC_CHUNK_SIZE):
+        pathspecs = [f":(literal){path}" for path in candidate_paths[i : i + PATHSPEC_CHUNK_SIZE]]
+        chunk_lines, truncated = await _run_git_grep_async(
+            repo_directory, [*args, *pathspecs], max_results - len(lines)
+        )
+        if lines and chunk_lines and context_lines:
+            lines.append("--")
+        lines.extend(chunk_lines)
+        if truncated:
+            return lines, True
+    return lines, False
+
+
+def get_required_literals(pattern: str) -> Optional[list[str]]:
+    """
+    Returns substrings that every match of the basic regular expression contains, or None for alternations.
+
+    The extraction is conservative: characters made optional by a quantifier, escapes other than escaped special
+    characters, bracket expressions and non-ASCII characters, whose case folding differs from the index, end a literal.
+    Groups made optional by a quantifier contribute no literals.
+    """
+    if "\\|" in pattern:
+        return None
+
+    literals = []
+    current: list[str] = []
+    # number of literals found before each open group
+    group_starts: list[int] = []
+
+    def end_literal():
+        if len(current) >= 3:
+            literals.append("".join(current))
+        current.clear()
+
+    i = 0
+    while i < len(pattern):
+        character = pattern[i]
+        if pattern.startswith(OPTIONAL_QUANTIFIERS, i):
+            if current:
+                current.pop()
+            end_literal()
+            i = _skip_quantifier(pattern, i)
+        elif pattern.startswith("\\(", i):
+            end_literal()
+            group_starts.append(len(literals))
+            i += 2
+        elif pattern.startswith("\\)", i):
+            end_literal()
+            group_start = group_starts.pop() if group_starts else 0
+            i += 2
+            # a group made optional by a quantifier requires none of its literals
+            if pattern.startswith(OPTIONAL_QUANTIFIERS, i):
+                del literals[group_start:]
+                i = _skip_quantifier(pattern, i)
+        elif character == "\\" and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            if escaped in ".[]*^$\\":
+                current.append(escaped)
+            else:
+                end_literal()
+            i += 2
+        elif character == "[":
+            end_literal()
+            i = _skip_bracket_expression(pattern, i)
+        elif character in ".^$" or not character.isascii():
+            end_literal()
+            i += 1
+        else:
+            current.append(character)
+            i += 1
+    end_literal()
+    return literals
+
+
+async def _get_candidate_paths_async(
+    repo_directory: str, pattern: str, path_filter: Optional[str]
+) -> Optional[list[str]]:
+    """
+    Returns the files that may match, or None when the index is not ready or would not rule out enough files.
+    """
+    literals = get_required_literals(pattern)
+    if not literals:
+        return None
+    try:
+        index = await get_trigram_index_async(repo_directory)
+    except Exception as e:
+        logger.warning(f"Failed to get trigram index of {repo_directory}: {e}")
+        return None
+    if index is None:
+        return None
+
+    candidate_paths = index.get_candidate_paths(literals)
+    if len(candidate_paths) > len(index.file_paths) * MAX_CANDIDATE_RATIO:
+        return None
+
+    # the index is of the HEAD commit, files changed since then are always searched
+    output = await run_git_async(repo_directory, "diff", "--name-only", "-z", "HEAD")
+    changed_paths = [path for path in output.decode("utf-8", errors="replace").split("\0") if path]
+    candidate_paths = sorted(set(candidate_paths).union(changed_paths))
+    if path_filter:
+        candidate_paths = [path for path in candidate_paths if _matches_path_filter(path, path_filter)]
+    return candidate_paths
+
+
+async def _run_git_grep_async(repo_directory: str, args: list[str], max_results: int) -> tuple[list[str], bool]:
+    """
+    Returns up to `max_results` lines of git grep output, stopping git grep once they are read.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "git",
+        *args,
+        cwd=repo_directory,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        limit=2**20,
+    )
+    lines = []
+    truncated = False
+    try:
+        while True:
+            try:
+                line = await process.stdout.readline()
+            except ValueError:
+                # a line longer than the stream limit, e.g. in minified code, is dropped
+                continue
+            if not line:
+                break
+            if len(lines) >= max_results:
+                truncated = True
+                break
+            line = line.decode("utf-8", errors="replace").rstrip("\n")
+            lines.append(line if len(line) <= MAX_LINE_LENGTH else f"{line[:MAX_LINE_LENGTH]}...")
+    finally:
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+    return lines, truncated
+
+
+def _skip_bracket_expression(pattern: str, start: int) -> int:
+    """
+    Returns the index after the bracket expression starting at `start`, where a leading "]" is part of the set.
+    """
+    i = start + 1
+    if i < len(pattern) and pattern[i] == "^":
+        i += 1
+    if i < len(pattern) and pattern[i] == "]":
+        i += 1
+    closing = pattern.find("]", i)
+    return closing + 1 if closing != -1 else len(pattern)
+
+
+def _matches_path_filter(path: str, path_filter: str) -> bool:
+    """
+    Matches like a git pathspec without magic: a directory prefix or a wildcard pattern where "*" also matches "/".
+    """
+    path_filter = path_filter.rstrip("/")
+    return path == path_filter or path.startswith(f"{path_filter}/") or fnmatch.fnmatchcase(path, path_filter)
+
+
+def _skip_quantifier(pattern: str, i: int) -> int:
+    if pattern.startswith("\\{", i):
+        closing = pattern.find("\\}", i)
+        return closing + 2 if closing != -1 else len(pattern)
+    return i + (1 if pattern[i] == "*" else 2)
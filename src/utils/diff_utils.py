@@ -1,13 +1,10 @@
 import difflib
 import logging
-import os
 import re
 from typing import Iterator
 
-import aiofiles
-
 from src.model.app.task import DiffFile
-from src.utils.git_utils import get_changed_files_from_commit, get_file_content_at_commit
+from src.utils.git_utils import EMPTY_TREE_HASH, get_changed_files_from_commit, run_git_async
 
 EXCLUDE_FILES = [
     "package-lock.json",
@@ -51,10 +48,21 @@ EXCLUDE_FILES = [
     "*.egg-info/",
 ]
 
-DIFF_HEADER_RE = re.compile(r"^diff --git a/(.+?) b/(.+)$")
+DIFF_HEADER_PREFIX = "diff --git "
 HUNK_HEADER_RE = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@(?: (.*))?")
 INDEX_HEADER_RE = re.compile(r"^index\s+\w+\.\.\w+")
 MODE_HEADER_RE = re.compile(r"^(new|deleted) file mode \d+$")
+NO_NEWLINE_MARKER = "\\ No newline at end of file"
+
+# escapes git uses in quoted paths, besides octal escapes of other control characters
+PATH_ESCAPES = {"a": 7, "b": 8, "t": 9, "n": 10, "v": 11, "f": 12, "r": 13, '"': 34, "\\": 92}
+
+# without a base commit, the changed files are passed to git diff in chunks of this many paths, to stay within the
+# argument limit, since git diff cannot read pathspecs from a file
+PATHSPEC_CHUNK_SIZE = 1000
+
+# large enough that git emits every line of a file as context, matching the "whole file" diff body
+FULL_CONTEXT_LINES = 2**31 - 1
 
 logger = logging.getLogger(__name__)
 
@@ -65,22 +73,24 @@ async def generate_diff_files_async(
     base_commit: str | None,
 ) -> list[DiffFile]:
     try:
-        diff_files = []
         changed_file_paths = get_changed_files_from_commit(repo_directory, head_commit, base_commit)
+        if not changed_file_paths:
+            return []
+
+        diff_bodies = {}
+        if base_commit:
+            diff_bodies = await _get_diff_bodies_async(repo_directory, base_commit, head_commit, [])
+        else:
+            # every changed file is diffed against nothing, so limit the diff to those files
+            for i in range(0, len(changed_file_paths), PATHSPEC_CHUNK_SIZE):
+                pathspecs = [f":(literal){file_path}" for file_path in changed_file_paths[i : i + PATHSPEC_CHUNK_SIZE]]
+                diff_bodies.update(
+                    await _get_diff_bodies_async(repo_directory, EMPTY_TREE_HASH, head_commit, pathspecs)
+                )
+
+        diff_files = []
         for file_path in changed_file_paths:
-            old_content = get_file_content_at_commit(repo_directory, file_path, base_commit)
-
-            full_file_path = os.path.join(repo_directory, file_path)
-            if os.path.exists(full_file_path):
-                try:
-                    async with aiofiles.open(full_file_path, mode="r", encoding="utf-8") as file:
-                        new_content = await file.read()
-                except UnicodeDecodeError as e:
-                    logger.error(f"UnicodeDecodeError: Unable to decode file '{full_file_path}': {e}")
-            else:
-                new_content = ""
-
-            diff_body = generate_diff(old_content, new_content)
+            diff_body = diff_bodies.get(file_path, "")
             if diff_body.strip():
                 diff_files.append(DiffFile(file_path=file_path, body=diff_body))
         return diff_files
@@ -89,6 +99,97 @@ async def generate_diff_files_async(
         raise
 
 
+async def _get_diff_bodies_async(
+    repo_directory: str, base_commit: str, head_commit: str, pathspecs: list[str]
+) -> dict[str, str]:
+    diff_output = await run_git_async(
+        repo_directory,
+        "-c",
+        "core.quotePath=false",
+        "diff",
+        "--no-color",
+        "--no-ext-diff",
+        "--no-renames",
+        "--src-prefix=a/",
+        "--dst-prefix=b/",
+        f"-U{FULL_CONTEXT_LINES}",
+        base_commit,
+        head_commit,
+        "--",
+        *pathspecs,
+    )
+    return parse_full_context_diff(diff_output.decode("utf-8", errors="replace"))
+
+
+def parse_full_context_diff(diff_output: str) -> dict[str, str]:
+    """
+    Split a full context `git diff` output into a diff body per file path.
+
+    Each body has the same shape as `generate_diff`: headers are dropped, unchanged lines lose their leading
+    space and changed lines keep their +/- marker. Binary files have no hunks and therefore no body.
+
+    Paths are read from the `---` and `+++` lines, whose paths git quotes when they contain special characters, rather
+    than from the `diff --git` line, which is ambiguous for paths containing " b/".
+    """
+    diff_bodies = {}
+    file_path = None
+    lines = []
+    in_hunk = False
+    for line in diff_output.splitlines():
+        if line.startswith(DIFF_HEADER_PREFIX):
+            if file_path is not None:
+                diff_bodies[file_path] = "\n".join(lines)
+            file_path = None
+            lines = []
+            in_hunk = False
+        elif not in_hunk and line.startswith("--- "):
+            file_path = _parse_header_path(line[4:], "a/")
+        elif not in_hunk and line.startswith("+++ "):
+            file_path = _parse_header_path(line[4:], "b/") or file_path
+        elif HUNK_HEADER_RE.match(line):
+            in_hunk = True
+        elif in_hunk and not line.startswith(NO_NEWLINE_MARKER):
+            lines.append(line[1:] if line.startswith(" ") else line)
+
+    if file_path is not None:
+        diff_bodies[file_path] = "\n".join(lines)
+    return diff_bodies
+
+
+def _parse_header_path(header_path: str, prefix: str) -> str | None:
+    """
+    Returns the path of a `---` or `+++` line, or None for /dev/null.
+    """
+    if header_path == "/dev/null":
+        return None
+    if header_path.startswith('"') and header_path.endswith('"'):
+        header_path = _unquote_path(header_path[1:-1])
+    else:
+        # git ends paths containing spaces with a tab
+        header_path = header_path.removesuffix("\t")
+    return header_path.removeprefix(prefix)
+
+
+def _unquote_path(quoted_path: str) -> str:
+    """
+    Undo the C-style quoting of a path by git.
+    """
+    path = bytearray()
+    i = 0
+    while i < len(quoted_path):
+        character = quoted_path[i]
+        if character != "\\" or i + 1 == len(quoted_path):
+            path.extend(character.encode("utf-8"))
+            i += 1
+        elif quoted_path[i + 1] in PATH_ESCAPES:
+            path.append(PATH_ESCAPES[quoted_path[i + 1]])
+            i += 2
+        else:
+            path.append(int(quoted_path[i + 1 : i + 4], 8))
+            i += 4
+    return path.decode("utf-8", errors="replace")
+
+
 def generate_diff(from_file: str, to_file: str) -> str:
     # split with keepends to preserve multiple newlines, then strip each line
     from_lines = [line.rstrip("\n") for line in from_file.splitlines(keepends=True)]
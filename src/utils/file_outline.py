@@ -0,0 +1,92 @@
+import itertools
+import mmap
+import os
+import re
+from typing import Iterable, Iterator
+
+from src.utils.symbol_tagger import Symbol, tag_file
+
+MARKDOWN_HEADING_PATTERN = re.compile(r"^(#{1,3})\s+(.+)$")
+
+MARKDOWN_EXTENSIONS = (".md", ".mdx", ".rst")
+
+# files too large to be parsed are read in chunks of at most this size
+OUTLINE_CHUNK_BYTES = 1024 * 1024
+
+
+def get_file_outline(file_path: str, content: str) -> list[tuple[int, str]]:
+    """
+    Returns the top-level symbols of a source file as 1-based line numbers and descriptions, e.g. (12, "class Foo").
+
+    Symbols are tagged like the symbol index does, and only the unindented ones and the methods of top-level Python
+    classes are kept.
+    """
+    lines = content.split("\n")
+    if _is_markdown(file_path):
+        return _get_markdown_outline(lines)
+    return _get_symbol_outline(tag_file(file_path, content), lines)
+
+
+def get_large_file_outline(file_path: str, buffer: mmap.mmap) -> list[tuple[int, str]]:
+    """
+    Returns the top-level symbols of a file too large to be decoded and parsed at once, matching the declaration
+    patterns of its language while it is read in chunks.
+    """
+    if _is_markdown(file_path):
+        return _get_markdown_outline(itertools.chain.from_iterable(_iter_line_chunks(buffer)))
+
+    outline = []
+    line_offset = 0
+    for lines in _iter_line_chunks(buffer):
+        symbols = tag_file(file_path, "\n".join(lines), parse=False)
+        outline.extend(
+            (line_offset + line_number, description) for line_number, description in _get_symbol_outline(symbols, lines)
+        )
+        line_offset += len(lines)
+    return outline
+
+
+def _is_markdown(file_path: str) -> bool:
+    return os.path.splitext(file_path)[1].lower() in MARKDOWN_EXTENSIONS
+
+
+def _iter_line_chunks(buffer: mmap.mmap) -> Iterator[list[str]]:
+    """
+    Yields the lines of the buffer, decoding one chunk of whole lines at a time. Only the start of lines longer than
+    a chunk is decoded, which is enough to match declarations.
+    """
+    position, size = 0, len(buffer)
+    while position < size:
+        end = buffer.rfind(b"\n", position, position + OUTLINE_CHUNK_BYTES)
+        if end == -1:
+            yield [buffer[position : position + OUTLINE_CHUNK_BYTES].decode("utf-8", errors="replace")]
+            newline = buffer.find(b"\n", position + OUTLINE_CHUNK_BYTES)
+            position = size if newline == -1 else newline + 1
+            continue
+        yield buffer[position:end].decode("utf-8", errors="replace").split("\n")
+        position = end + 1
+
+
+def _get_symbol_outline(symbols: list[Symbol], lines: list[str]) -> list[tuple[int, str]]:
+    outline = []
+    for name, kind, line_number, qualified_name in symbols:
+        if kind == "method" and qualified_name.count(".") == 1:
+            # only parsed Python files qualify the names of methods with their class
+            outline.append((line_number, f"    def {name}"))
+        elif "." in qualified_name or lines[line_number - 1][:1].isspace():
+            continue
+        elif kind == "variable":
+            if name.isupper():
+                outline.append((line_number, name))
+        else:
+            outline.append((line_number, f"{kind} {name}"))
+    return outline
+
+
+def _get_markdown_outline(lines: Iterable[str]) -> list[tuple[int, str]]:
+    outline = []
+    for line_number, line in enumerate(lines, start=1):
+        match = MARKDOWN_HEADING_PATTERN.match(line)
+        if match:
+            outline.append((line_number, line.strip()))
+    return outline
@@ -1,7 +1,15 @@
 import asyncio
+import fnmatch
 import os
 import shutil
-from pathlib import Path
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from src.utils.git_cat_file import close_cat_file_readers_async
+from src.utils.git_utils import run_git_async
+
+BASE_DIRECTORY = "/tmp/async"
 
 IGNORE_PATTERNS = {
     ".git",
@@ -27,51 +35,174 @@ IGNORE_PATTERNS = {
     ".tmp",
     "tmp",
 }
+IGNORE_GLOBS = [pattern for pattern in IGNORE_PATTERNS if "*" in pattern]
+
+# project trees are pasted into prompts, deeper directories are collapsed into summaries to stay within this length
+PROJECT_TREE_MAX_LENGTH = int(os.getenv("PROJECT_TREE_MAX_LENGTH", "40000"))
+
+# directories with more files than this summarize their files instead of listing them
+PROJECT_TREE_MAX_FILES_PER_DIRECTORY = 100
+
+# number of most common file extensions named in a summary
+SUMMARY_EXTENSION_COUNT = 3
+
+TRUNCATED_LINE = "... (truncated)"
 
 
 async def create_directory_async(directory_path: str):
-    assert directory_path.startswith("/tmp/async/")
+    assert directory_path.startswith(f"{BASE_DIRECTORY}/")
     await asyncio.to_thread(os.makedirs, directory_path)
 
 
 async def cleanup_directory_async(directory_path: str | None):
     if not directory_path or not os.path.exists(directory_path):
         return
+    await close_cat_file_readers_async(directory_path)
     await asyncio.to_thread(shutil.rmtree, directory_path)
 
 
-async def generate_project_tree_async(repo_directory: str) -> str:
+async def generate_project_tree_async(repo_directory: str, max_length: int = PROJECT_TREE_MAX_LENGTH) -> str:
+    """
+    Render the tree of the files tracked in the repository, so ignored and untracked files are left out.
+    """
     if not repo_directory or not os.path.exists(repo_directory) or not os.path.isdir(repo_directory):
         raise ValueError(f"Repository is not cloned: {repo_directory}")
-    return await asyncio.to_thread(_generate_project_tree, repo_directory)
 
+    output = await run_git_async(repo_directory, "ls-files", "-z")
+    file_paths = [file_path for file_path in output.decode("utf-8", errors="replace").split("\0") if file_path]
+    return await asyncio.to_thread(
+        render_project_tree, os.path.basename(os.path.normpath(repo_directory)), file_paths, max_length
+    )
 
-def _generate_project_tree(repo_directory: str) -> str:
-    repo_dir = Path(repo_directory)
-    lines = [repo_dir.name]
-    lines.extend(_build_tree_structure(repo_dir))
-    return "\n".join(lines)
 
+def render_project_tree(root_name: str, file_paths: Iterable[str], max_length: int = PROJECT_TREE_MAX_LENGTH) -> str:
+    """
+    Render the tree of the files at the relative paths, e.g. the files tracked at a commit.
+
+    Directories are expanded breadth first while the tree fits in the maximum length, the others are collapsed into a
+    summary of their files such as `fixtures (412 files, *.json)`. Directories with many files summarize their files
+    the same way below their subdirectories.
+    """
+    root = _build_tree_node(file_paths)
+    _expand_tree_nodes(root, len(root_name) + 1, max_length)
+
+    lines = [root_name]
+    lines.extend(_render_tree_node(root))
+    tree = "\n".join(lines)
+    if len(tree) <= max_length:
+        return tree
+
+    # directories right below the root did not fit, keep the lines that do
+    length = 0
+    for i, line in enumerate(lines):
+        length += len(line) + 1
+        if length + len(TRUNCATED_LINE) > max_length:
+            return "\n".join(lines[:i] + [TRUNCATED_LINE])
+    return tree
+
+
+@dataclass
+class _TreeNode:
+    directories: dict[str, "_TreeNode"] = field(default_factory=dict)
+    files: list[str] = field(default_factory=list)
+    file_count: int = 0
+    extension_counts: Counter = field(default_factory=Counter)
+    expanded: bool = False
+
+
+def _build_tree_node(file_paths: Iterable[str]) -> _TreeNode:
+    root = _TreeNode()
+    for file_path in file_paths:
+        parts = file_path.split("/")
+        if any(_should_ignore_name(part) for part in parts):
+            continue
+
+        extension = os.path.splitext(parts[-1])[1]
+        node = root
+        node.file_count += 1
+        node.extension_counts[extension] += 1
+        for part in parts[:-1]:
+            node = node.directories.setdefault(part, _TreeNode())
+            node.file_count += 1
+            node.extension_counts[extension] += 1
+        node.files.append(parts[-1])
+    return root
 
-def _build_tree_structure(directory: Path, prefix: str = "", is_last: bool = True) -> list[str]:
-    lines = []
-    items = sorted(directory.iterdir(), key=lambda p: (p.is_file(), p.name.lower()))
-    items = [item for item in items if not _should_ignore(item)]
-    for i, item in enumerate(items):
-        is_last_item = i == len(items) - 1
 
-        if is_last_item:
+def _expand_tree_nodes(root: _TreeNode, length: int, max_length: int):
+    """
+    Expand directories breadth first while the tree stays within the maximum length.
+    """
+    root.expanded = True
+    length += _get_children_length(root, 0)
+
+    queue = deque((node, 1) for node in root.directories.values())
+    while queue:
+        node, depth = queue.popleft()
+        expanded_length = length - len(_get_summary(node)) + _get_children_length(node, depth)
+        if expanded_length > max_length:
+            continue
+        node.expanded = True
+        length = expanded_length
+        queue.extend((child, depth + 1) for child in node.directories.values())
+
+
+def _get_children_length(node: _TreeNode, depth: int) -> int:
+    """
+    Returns the length of the lines below an expanded directory, with its subdirectories collapsed.
+    """
+    prefix_length = 4 * (depth + 1)
+    length = sum(prefix_length + len(name) + len(_get_summary(child)) + 1 for name, child in node.directories.items())
+    if len(node.files) > PROJECT_TREE_MAX_FILES_PER_DIRECTORY:
+        return length + prefix_length + len(_get_files_summary(node.files)) + 1
+    return length + sum(prefix_length + len(name) + 1 for name in node.files)
+
+
+def _render_tree_node(node: _TreeNode, prefix: str = "") -> list[str]:
+    items = [(name, child) for name, child in sorted(node.directories.items(), key=lambda item: item[0].lower())]
+    if len(node.files) > PROJECT_TREE_MAX_FILES_PER_DIRECTORY:
+        items.append((_get_files_summary(node.files), None))
+    else:
+        items.extend((name, None) for name in sorted(node.files, key=str.lower))
+
+    lines = []
+    for i, (name, child) in enumerate(items):
+        if i == len(items) - 1:
             current_prefix = "└── "
             next_prefix = prefix + "    "
         else:
             current_prefix = "├── "
             next_prefix = prefix + "│   "
 
-        lines.append(f"{prefix}{current_prefix}{item.name}")
-        if item.is_dir():
-            lines.extend(_build_tree_structure(item, next_prefix, is_last_item))
+        if child is None:
+            lines.append(f"{prefix}{current_prefix}{name}")
+        elif child.expanded:
+            lines.append(f"{prefix}{current_prefix}{name}")
+            lines.extend(_render_tree_node(child, next_prefix))
+        else:
+            lines.append(f"{prefix}{current_prefix}{name}{_get_summary(child)}")
     return lines
 
 
-def _should_ignore(path: Path) -> bool:
-    return path.name in IGNORE_PATTERNS or path.name.startswith(".")
+def _get_summary(node: _TreeNode) -> str:
+    return f" ({_format_file_count(node.file_count, node.extension_counts)})"
+
+
+def _get_files_summary(file_names: list[str]) -> str:
+    extension_counts = Counter(os.path.splitext(file_name)[1] for file_name in file_names)
+    return f"({_format_file_count(len(file_names), extension_counts)})"
+
+
+def _format_file_count(file_count: int, extension_counts: Counter) -> str:
+    extensions = [
+        f"*{extension}" for extension, _ in extension_counts.most_common(SUMMARY_EXTENSION_COUNT + 1) if extension
+    ][:SUMMARY_EXTENSION_COUNT]
+    return ", ".join([f"{file_count} files", *extensions])
+
+
+def _should_ignore_name(name: str) -> bool:
+    return (
+        name in IGNORE_PATTERNS
+        or name.startswith(".")
+        or any(fnmatch.fnmatch(name, pattern) for pattern in IGNORE_GLOBS)
+    )
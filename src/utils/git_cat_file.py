@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# one long-lived `git cat-file --batch` process per repository directory
+_readers: dict[str, "CatFileReader"] = {}
+
+
+class CatFileReader:
+    """
+    Streams objects out of a repository's object database through a single `git cat-file --batch` process.
+
+    Object names use git's revision syntax, e.g. "<commit>:<path>" for a file at a commit. Requests are written
+    while responses are read, so a batch of any size never blocks on a full pipe.
+
+    The trigram and symbol index builds read the files of a commit through it. Diff generation does not, since
+    `generate_diff_files_async` reads both sides of every changed file with a single `git diff`.
+    """
+
+    def __init__(self, repo_directory: str):
+        self.repo_directory = repo_directory
+        self.process: asyncio.subprocess.Process | None = None
+        self.lock = asyncio.Lock()
+
+    async def read_objects_async(self, object_names: list[str]) -> list[bytes | None]:
+        """
+        Returns the contents of each object in order, or None when the object does not exist.
+        """
+        if not object_names:
+            return []
+
+        async with self.lock:
+            process = await self._get_process_async()
+            writer = asyncio.create_task(self._write_requests_async(process, object_names))
+            try:
+                contents = [await self._read_response_async(process) for _ in object_names]
+                await writer
+                return contents
+            except BaseException:
+                # a batch cut short, e.g. by a cancelled tool call, leaves responses in the pipe that the next batch
+                # would read, so the process is discarded
+                writer.cancel()
+                self._kill()
+                raise
+
+    async def close_async(self):
+        async with self.lock:
+            await self._terminate_async()
+
+    async def _get_process_async(self) -> asyncio.subprocess.Process:
+        if self.process is None or self.process.returncode is not None:
+            self.process = await asyncio.create_subprocess_exec(
+                "git",
+                "cat-file",
+                "--batch",
+                cwd=self.repo_directory,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=2**20,
+            )
+        return self.process
+
+    async def _write_requests_async(self, process: asyncio.subprocess.Process, object_names: list[str]):
+        for object_name in object_names:
+            process.stdin.write(f"{object_name}\n".encode("utf-8"))
+            await process.stdin.drain()
+
+    async def _read_response_async(self, process: asyncio.subprocess.Process) -> bytes | None:
+        header = await process.stdout.readline()
+        if not header:
+            raise RuntimeError(f"git cat-file exited unexpectedly in {self.repo_directory}")
+
+        # "<oid> <type> <size>" for found objects, "<name> missing" or "<name> ambiguous" otherwise
+        parts = header.decode("utf-8", errors="replace").rstrip("\n").rsplit(" ", 2)
+        if len(parts) != 3 or not parts[2].isdigit():
+            return None
+        content = await process.stdout.readexactly(int(parts[2]) + 1)
+        return content[:-1]
+
+    def _kill(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+        self.process = None
+
+    async def _terminate_async(self):
+        if self.process is None or self.process.returncode is not None:
+            self.process = None
+            return
+        self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        self.process = None
+
+
+def get_cat_file_reader(repo_directory: str) -> CatFileReader:
+    repo_directory = os.path.abspath(repo_directory)
+    if repo_directory not in _readers:
+        _readers[repo_directory] = CatFileReader(repo_directory)
+    return _readers[repo_directory]
+
+
+async def close_cat_file_readers_async(directory_path: str):
+    """
+    Close the readers of every repository inside the given directory, e.g. before it is deleted.
+    """
+    directory_path = os.path.abspath(directory_path)
+    for repo_directory in list(_readers):
+        if repo_directory == directory_path or repo_directory.startswith(f"{directory_path}/"):
+            reader = _readers.pop(repo_directory)
+            await reader.close_async()
@@ -1,3 +1,5 @@
+import asyncio
+import os
 import re
 import uuid
 from urllib.parse import urlparse
@@ -6,6 +8,9 @@ from git import Repo
 
 BRANCH_NAME_PREFIX = "async"
 
+# well-known hash of the empty tree, used as the base when a commit is diffed against nothing
+EMPTY_TREE_HASH = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
 # file names that should not be commited
 EXCLUDED_FILES = ["CLAUDE.md", "ASYNC_PLAN_BREAKDOWN.json"]
 
@@ -73,31 +78,85 @@ def get_changed_files_from_commit(
     repo_directory: str, head_commit_hash: str, base_commit_hash: str | None = None
 ) -> list[str]:
     repo = Repo(repo_directory)
+    # -z keeps paths with special characters unquoted so they match the paths in the diff output
     if base_commit_hash:
-        changed_files = repo.git.diff("--name-only", base_commit_hash, head_commit_hash).splitlines()
+        changed_files = repo.git.diff("--name-only", "-z", base_commit_hash, head_commit_hash).split("\0")
     else:
-        changed_files = repo.git.show("--name-only", "--format=", head_commit_hash).splitlines()
+        changed_files = repo.git.show("--name-only", "-z", "--format=", head_commit_hash).split("\0")
     return [f for f in changed_files if f.strip()]
 
 
-def get_file_content_at_commit(repo_directory: str, file_path: str, commit_hash: str | None) -> str:
-    if not commit_hash:
-        return ""
-
-    repo = Repo(repo_directory)
-    try:
-        blob = repo.commit(commit_hash).tree[file_path]
-        return blob.data_stream.read().decode("utf-8")
-    except KeyError:
-        return ""
-
-
 def get_commit_message(repo_directory: str, commit_hash: str) -> str:
     repo = Repo(repo_directory)
     commit = repo.commit(commit_hash)
     return commit.message.strip()
 
 
+async def get_object_bytes_async(repo_directory: str) -> int:
+    """
+    Returns the size of the objects stored in the repository itself, excluding objects borrowed from alternates.
+    """
+    output = await run_git_async(repo_directory, "count-objects", "-v")
+    stats = dict(line.split(": ", 1) for line in output.decode().splitlines() if ": " in line)
+    return (int(stats.get("size", 0)) + int(stats.get("size-pack", 0))) * 1024
+
+
+async def run_git_async(repo_directory: str, *args: str) -> bytes:
+    process = await asyncio.create_subprocess_exec(
+        "git",
+        *args,
+        cwd=repo_directory,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {stderr.decode(errors='replace')}")
+    return stdout
+
+
+async def get_ignored_paths_async(directory: str, paths: list[str]) -> set[str]:
+    """
+    Returns the paths, relative to the directory, that are ignored by .gitignore files. Nothing is ignored outside of
+    a repository.
+    """
+    if not paths:
+        return set()
+
+    process = await asyncio.create_subprocess_exec(
+        "git",
+        "check-ignore",
+        "--stdin",
+        "-z",
+        cwd=directory,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    stdout, _ = await process.communicate(b"".join(os.fsencode(path) + b"\0" for path in paths))
+    # 1 when no path is ignored, 128 outside of a repository
+    if process.returncode != 0:
+        return set()
+    return {os.fsdecode(path) for path in stdout.split(b"\0") if path}
+
+
+async def is_ancestor_async(repo_directory: str, ancestor: str, descendant: str) -> bool:
+    """
+    Returns whether the first commit is the second one or one of its ancestors. False when either commit is missing.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "git",
+        "merge-base",
+        "--is-ancestor",
+        ancestor,
+        descendant,
+        cwd=repo_directory,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    return await process.wait() == 0
+
+
 def parse_pull_request_number(pull_request_url: str) -> int:
     parsed = urlparse(pull_request_url)
     parts = parsed.path.strip("/").split("/")
@@ -0,0 +1,74 @@
+import logging
+import os
+import pickle
+import time
+import uuid
+from typing import Any, Optional
+
+from src.utils.filesystem_utils import BASE_DIRECTORY
+
+INDEX_DIRECTORY = f"{BASE_DIRECTORY}/indexes"
+
+# total disk budget of the stored indexes of all commits, least recently used indexes are deleted beyond it
+INDEX_CACHE_MAX_BYTES = int(os.getenv("INDEX_CACHE_MAX_BYTES", str(2**30)))
+
+# temporary files of indexes being written are only deleted once they are this old
+STALE_TEMPORARY_FILE_SECONDS = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def load_index_file(index_path: str) -> Any:
+    """
+    Load a stored index, marking it as recently used.
+    """
+    with open(index_path, "rb") as file:
+        index = pickle.load(file)
+    try:
+        os.utime(index_path)
+    except FileNotFoundError:
+        # evicted by another process in the meantime
+        pass
+    return index
+
+
+def store_index_file(index: Any, index_path: str):
+    """
+    Store an index, then delete the least recently used indexes until the stored indexes fit in the disk budget.
+    """
+    # written under a temporary name first, so concurrent readers never see a partial index
+    os.makedirs(INDEX_DIRECTORY, exist_ok=True)
+    temporary_path = f"{index_path}.{uuid.uuid4()}.tmp"
+    with open(temporary_path, "wb") as file:
+        pickle.dump(index, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, index_path)
+    evict_index_files(exclude=index_path)
+
+
+def evict_index_files(max_bytes: int = INDEX_CACHE_MAX_BYTES, exclude: Optional[str] = None):
+    files = []
+    stale_before = time.time() - STALE_TEMPORARY_FILE_SECONDS
+    for entry in os.scandir(INDEX_DIRECTORY):
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        if entry.name.endswith(".tmp") and stat.st_mtime > stale_before:
+            continue
+        files.append((entry.path, stat.st_mtime, stat.st_size))
+
+    total_bytes = sum(size for _, _, size in files)
+    for index_path, _, size in sorted(files, key=lambda file: file[1]):
+        if total_bytes <= max_bytes:
+            break
+        if index_path == exclude:
+            continue
+        try:
+            os.unlink(index_path)
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+        logger.info(f"Evicted stored index {index_path} ({size} bytes)")
+
+    if total_bytes > max_bytes:
+        logger.warning(f"Stored indexes use {total_bytes} bytes, above the {max_bytes} bytes budget")
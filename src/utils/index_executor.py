@@ -0,0 +1,28 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+# number of processes building the trigram and symbol indexes, shared by all builds
+INDEX_WORKERS = int(os.getenv("INDEX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor: Optional[Executor] = None
+
+
+def get_index_executor() -> Optional[Executor]:
+    """
+    Index builds run in a process pool, so they do not hold the GIL of the server, or in the default thread pool when
+    this process is itself a worker process, e.g. of the local job executor.
+    """
+    global _executor
+    if _executor is None and multiprocessing.parent_process() is None and INDEX_WORKERS > 1:
+        _executor = ProcessPoolExecutor(max_workers=INDEX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def close_index_executor_async():
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        await asyncio.to_thread(executor.shutdown)
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Optional
+
+from src.clients import get_firestore_client
+
+# streamed text is written to the message at most this often, or sooner once this much of it is pending
+MESSAGE_FLUSH_INTERVAL_SECONDS = 0.5
+MESSAGE_FLUSH_BYTES = 2048
+
+logger = logging.getLogger(__name__)
+
+# persisters of the messages streaming in this process, by task
+_live_persisters: dict[str, "StreamingMessagePersister"] = {}
+
+
+class StreamingMessagePersister:
+    """
+    Writes the text streamed so far to a streaming message at a bounded rate, so a client that reconnects mid-stream
+    sees it, and relays the live stream to the connections that reattach to it.
+
+    While streaming, the message's `stream_offset` is the length of the streamed text it holds, in UTF-16 code units as
+    a JavaScript client slices strings. A client that reconnects to the same process shows the persisted text and
+    continues from that offset with `subscribe`. Writes go through a `FirestoreBatch`, so a failed write is folded into
+    the next one instead of being retried on its own.
+    """
+
+    def __init__(self, org_id: str, task_id: str, message_id: str):
+        self.org_id = org_id
+        self.task_id = task_id
+        self.message_id = message_id
+        self.chunks: list[str] = []
+        self.pending_bytes = 0
+        self.write_count = 0
+        self.batch = get_firestore_client().batch()
+        self.flush_requested = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        # frames of the live stream as (text, is_control), None once it is over
+        self.subscribers: list[asyncio.Queue[Optional[tuple[str, bool]]]] = []
+
+    def start(self):
+        self.task = asyncio.create_task(self._flush_periodically_async())
+        _live_persisters[self.task_id] = self
+
+    def append(self, text: str):
+        self.chunks.append(text)
+        self.pending_bytes += len(text)
+        if self.pending_bytes >= MESSAGE_FLUSH_BYTES:
+            self.flush_requested.set()
+        self._publish((text, False))
+
+    def append_control(self, text: str):
+        """
+        Relay a control frame, e.g. a tool call, to the reattached connections. Control frames are not persisted.
+        """
+        self._publish((text, True))
+
+    def subscribe(self, stream_offset: int) -> tuple[str, asyncio.Queue[Optional[tuple[str, bool]]]]:
+        """
+        Returns the streamed text after the offset, in UTF-16 code units, and a queue of the frames streamed from now
+        on, which ends with None. The queue must be handed back with `unsubscribe`.
+        """
+        text = "".join(self.chunks).encode("utf-16-le")[2 * stream_offset :].decode("utf-16-le", errors="replace")
+        queue: asyncio.Queue[Optional[tuple[str, bool]]] = asyncio.Queue()
+        self.subscribers.append(queue)
+        return text, queue
+
+    def unsubscribe(self, queue: asyncio.Queue[Optional[tuple[str, bool]]]):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+
+    async def finish_async(self, **kwargs):
+        """
+        Stop the periodic writes and write the streamed text once more together with the final fields of the message,
+        which may replace its text.
+        """
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if _live_persisters.get(self.task_id) is self:
+            del _live_persisters[self.task_id]
+        for queue in self.subscribers:
+            queue.put_nowait(None)
+        await self._flush_async(**kwargs)
+        logger.debug(f"Persisted streaming message {self.message_id} in {self.write_count} writes")
+
+    async def _flush_periodically_async(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_requested.wait(), MESSAGE_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_requested.clear()
+            if not self.pending_bytes:
+                continue
+            try:
+                await self._flush_async()
+            except Exception as e:
+                logger.warning(f"Failed to persist streaming message {self.message_id}: {e}")
+
+    async def _flush_async(self, **kwargs):
+        text = "".join(self.chunks)
+        self.chunks = [text]
+        self.pending_bytes = 0
+        fields = {"text": text, "stream_offset": len(text.encode("utf-16-le")) // 2}
+        fields.update(kwargs)
+        self.batch.update_message(self.org_id, self.task_id, self.message_id, **fields)
+        await get_firestore_client().commit_batch_async(self.batch)
+        self.write_count += 1
+
+    def _publish(self, frame: tuple[str, bool]):
+        for queue in self.subscribers:
+            queue.put_nowait(frame)
+
+
+def get_live_persister(task_id: str) -> Optional[StreamingMessagePersister]:
+    """
+    Returns the persister of the task's message streaming in this process, if any.
+    """
+    return _live_persisters.get(task_id)
@@ -0,0 +1,156 @@
+import asyncio
+import fcntl
+import logging
+import os
+import shutil
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from src.clients import get_github_client
+from src.model import compute_repository_doc_id
+from src.utils.filesystem_utils import BASE_DIRECTORY
+from src.utils.git_utils import run_git_async
+
+MIRROR_DIRECTORY = f"{BASE_DIRECTORY}/mirrors"
+
+# total disk budget of all mirrors, least recently used mirrors are evicted beyond it
+MIRROR_CACHE_MAX_BYTES = int(os.getenv("MIRROR_CACHE_MAX_BYTES", str(20 * 2**30)))
+
+# workspaces borrow objects from their mirror, so a mirror used this recently is never evicted
+MIRROR_EVICTION_GRACE_SECONDS = int(os.getenv("MIRROR_EVICTION_GRACE_SECONDS", str(6 * 60 * 60)))
+
+LAST_USED_FILE_NAME = "async-last-used"
+
+# size of the mirror recorded after each fetch, so eviction does not walk every mirror
+SIZE_FILE_NAME = "async-size"
+
+logger = logging.getLogger(__name__)
+
+_mirror_locks: dict[str, asyncio.Lock] = {}
+
+
+async def get_mirror_async(access_token: str, full_repo_name: str, create: bool = True) -> str | None:
+    """
+    Returns the bare mirror of the repository, creating it or fetching new objects into it first.
+
+    The mirror is shared by every workspace of the repository on this machine through `git clone --reference`.
+    Without `create`, None is returned when the repository has no mirror yet.
+    """
+    mirror_directory = get_mirror_directory(full_repo_name)
+    if not create and not os.path.exists(mirror_directory):
+        return None
+
+    async with _lock_mirror_async(mirror_directory):
+        if not os.path.exists(mirror_directory):
+            await asyncio.to_thread(os.makedirs, mirror_directory)
+            await run_git_async(mirror_directory, "init", "--bare", "--quiet")
+
+        await get_github_client().fetch_mirror_async(access_token, full_repo_name, mirror_directory)
+        size = await _get_mirror_size_async(mirror_directory)
+        await asyncio.to_thread(_record_usage, mirror_directory, size)
+
+    await evict_mirrors_async(exclude=mirror_directory)
+    return mirror_directory
+
+
+def get_mirror_directory(full_repo_name: str) -> str:
+    return f"{MIRROR_DIRECTORY}/{compute_repository_doc_id(full_repo_name)}.git"
+
+
+async def evict_mirrors_async(max_bytes: int = MIRROR_CACHE_MAX_BYTES, exclude: str | None = None):
+    """
+    Delete least recently used mirrors until the cache fits in the disk budget.
+    """
+    mirrors = await asyncio.to_thread(_list_mirrors)
+    total_bytes = sum(size for _, _, size in mirrors)
+    if total_bytes <= max_bytes:
+        return
+
+    evictable_before = time.time() - MIRROR_EVICTION_GRACE_SECONDS
+    for mirror_directory, last_used, size in sorted(mirrors, key=lambda mirror: mirror[1]):
+        if total_bytes <= max_bytes:
+            break
+        if mirror_directory == exclude or last_used > evictable_before:
+            continue
+
+        async with _lock_mirror_async(mirror_directory):
+            await asyncio.to_thread(shutil.rmtree, mirror_directory, True)
+        total_bytes -= size
+        logger.info(f"Evicted repository mirror {mirror_directory} ({size} bytes)")
+
+    if total_bytes > max_bytes:
+        logger.warning(f"Repository mirrors use {total_bytes} bytes, above the {max_bytes} bytes budget")
+
+
+@asynccontextmanager
+async def _lock_mirror_async(mirror_directory: str) -> AsyncIterator[None]:
+    """
+    Serializes access to a mirror within this process (asyncio lock) and across processes (file lock).
+    """
+    if mirror_directory not in _mirror_locks:
+        _mirror_locks[mirror_directory] = asyncio.Lock()
+
+    async with _mirror_locks[mirror_directory]:
+        await asyncio.to_thread(os.makedirs, MIRROR_DIRECTORY, exist_ok=True)
+        lock_file = await asyncio.to_thread(open, f"{mirror_directory}.lock", "a")
+        try:
+            await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+            yield
+        finally:
+            lock_file.close()
+
+
+async def _get_mirror_size_async(mirror_directory: str) -> int:
+    """
+    Returns the size of the objects of the mirror, which git reports from the pack files without reading them.
+    """
+    output = await run_git_async(mirror_directory, "count-objects", "-v")
+    size_kib = 0
+    for line in output.decode().splitlines():
+        key, _, value = line.partition(":")
+        if key in ("size", "size-pack", "size-garbage"):
+            size_kib += int(value)
+    return size_kib * 1024
+
+
+def _record_usage(mirror_directory: str, size: int):
+    with open(f"{mirror_directory}/{SIZE_FILE_NAME}", "w") as size_file:
+        size_file.write(str(size))
+    with open(f"{mirror_directory}/{LAST_USED_FILE_NAME}", "a"):
+        pass
+    os.utime(f"{mirror_directory}/{LAST_USED_FILE_NAME}")
+
+
+def _list_mirrors() -> list[tuple[str, float, int]]:
+    if not os.path.exists(MIRROR_DIRECTORY):
+        return []
+
+    mirrors = []
+    for entry in os.scandir(MIRROR_DIRECTORY):
+        if not entry.is_dir() or not entry.name.endswith(".git"):
+            continue
+        last_used_path = f"{entry.path}/{LAST_USED_FILE_NAME}"
+        last_used = os.path.getmtime(last_used_path) if os.path.exists(last_used_path) else 0
+        mirrors.append((entry.path, last_used, _read_mirror_size(entry.path)))
+    return mirrors
+
+
+def _read_mirror_size(mirror_directory: str) -> int:
+    try:
+        with open(f"{mirror_directory}/{SIZE_FILE_NAME}") as size_file:
+            return int(size_file.read())
+    except (FileNotFoundError, ValueError):
+        # mirrors fetched before sizes were recorded, or being created
+        return _get_directory_size(mirror_directory)
+
+
+def _get_directory_size(directory_path: str) -> int:
+    size = 0
+    for root, _, file_names in os.walk(directory_path):
+        for file_name in file_names:
+            try:
+                size += os.lstat(os.path.join(root, file_name)).st_size
+            except FileNotFoundError:
+                continue
+    return size
@@ -0,0 +1,88 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.model.github import PushCommit
+from src.utils.filesystem_utils import render_project_tree
+from src.utils.git_utils import run_git_async
+
+# push events list at most this many commits, a push with more is indexed from scratch
+MAX_PUSH_EVENT_COMMITS = 2048
+
+# file lists of merge commits are not exact, so indexes are rebuilt after this many incremental updates
+MAX_INCREMENTAL_UPDATES = 100
+
+# indexes are kept for this many repositories, least recently used ones are dropped
+MAX_INDEXES = 64
+
+logger = logging.getLogger(__name__)
+
+_indexes: OrderedDict[str, "ProjectTreeIndex"] = OrderedDict()
+
+
+class ProjectTreeIndex:
+    """
+    Paths of the files tracked at a commit of a repository, built once with `git ls-tree` and then kept up to date
+    from the file lists of pushed commits, so pushes do not need a checkout or a walk of the working tree.
+    """
+
+    def __init__(self, commit: str, file_paths: set[str]):
+        self.commit = commit
+        self.file_paths = file_paths
+        self.incremental_updates = 0
+
+    def can_apply(self, before: str, commits: list[PushCommit]) -> bool:
+        return (
+            before == self.commit
+            and len(commits) < MAX_PUSH_EVENT_COMMITS
+            and self.incremental_updates < MAX_INCREMENTAL_UPDATES
+        )
+
+    def apply(self, after: str, commits: list[PushCommit]) -> tuple["ProjectTreeIndex", bool]:
+        """
+        Returns the index with the pushed commits applied in order, and whether files were added or removed. This index
+        is left as it is, so it can be kept until the new tree is stored.
+        """
+        file_paths = set(self.file_paths)
+        changed = False
+        for commit in commits:
+            for file_path in commit.removed:
+                if file_path in file_paths:
+                    file_paths.remove(file_path)
+                    changed = True
+            for file_path in commit.added + commit.modified:
+                if file_path not in file_paths:
+                    file_paths.add(file_path)
+                    changed = True
+        index = ProjectTreeIndex(after, file_paths)
+        index.incremental_updates = self.incremental_updates + 1
+        return index, changed
+
+    def render(self, root_name: str) -> str:
+        return render_project_tree(root_name, self.file_paths)
+
+
+async def build_project_tree_index_async(repo_directory: str, commit: str) -> ProjectTreeIndex:
+    """
+    Index the files tracked at the commit, the repository may be bare.
+    """
+    start_time = time.perf_counter()
+    output = await run_git_async(repo_directory, "ls-tree", "-r", "-z", "--name-only", commit)
+    file_paths = {file_path for file_path in output.decode("utf-8", errors="replace").split("\0") if file_path}
+    logger.info(f"Indexed {len(file_paths)} files at {commit} in {time.perf_counter() - start_time:.2f}s")
+    return ProjectTreeIndex(commit, file_paths)
+
+
+def get_project_tree_index(key: str) -> Optional[ProjectTreeIndex]:
+    index = _indexes.get(key)
+    if index:
+        _indexes.move_to_end(key)
+    return index
+
+
+def put_project_tree_index(key: str, index: ProjectTreeIndex):
+    _indexes[key] = index
+    _indexes.move_to_end(key)
+    while len(_indexes) > MAX_INDEXES:
+        _indexes.popitem(last=False)
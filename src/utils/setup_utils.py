@@ -1,35 +1,152 @@
+import asyncio
+import logging
 import os
+import time
 import uuid
 
 from src.clients import get_github_client
+from src.github import ClonePolicy
 from src.model.app import Org
 from src.model.app.project import Project
-from src.utils.filesystem_utils import create_directory_async
+from src.utils.filesystem_utils import BASE_DIRECTORY, cleanup_directory_async, create_directory_async
+from src.utils.git_cat_file import close_cat_file_readers_async
+from src.utils.git_utils import get_object_bytes_async, run_git_async
+from src.utils.mirror_utils import get_mirror_async
 
-BASE_DIRECTORY = "/tmp/async"
+# chats reuse the shared checkout of a project without pulling when it was updated this recently
+REPO_FRESHNESS_SECONDS = int(os.getenv("REPO_FRESHNESS_SECONDS", "30"))
 
+SNAPSHOT_DIRECTORY = f"{BASE_DIRECTORY}/snapshots"
+
+logger = logging.getLogger(__name__)
+
+# one lock per shared checkout, held while it is pulled and while its snapshots are added or removed
+_repo_locks: dict[str, asyncio.Lock] = {}
+_repo_updated_at: dict[str, float] = {}
+
+# references to each snapshot, the shared checkout it belongs to, and the latest snapshot of each shared checkout
+_snapshot_references: dict[str, int] = {}
+_snapshot_repos: dict[str, str] = {}
+_latest_snapshots: dict[str, str] = {}
+
+
+async def acquire_repo_snapshot_async(org: Org, project: Project) -> str:
+    """
+    Returns a worktree of the project's shared checkout, detached at its latest commit, that later pulls never change.
+
+    The shared checkout is pulled unless it was updated within `REPO_FRESHNESS_SECONDS`, and concurrent callers wait
+    for a single pull. Chats at the same commit share the snapshot. Every snapshot must be handed back with
+    `release_repo_snapshot_async`.
+    """
+    repo_directory = _get_repo_directory(org, project)
+    async with _get_repo_lock(repo_directory):
+        repo_directory = await _update_repo_async(org, project, repo_directory)
+        commit = (await run_git_async(repo_directory, "rev-parse", "HEAD")).decode().strip()
+        snapshot_directory = f"{SNAPSHOT_DIRECTORY}/{org.name}/{project.name}/{commit}"
+        if not os.path.exists(snapshot_directory):
+            await run_git_async(repo_directory, "worktree", "prune")
+            await run_git_async(repo_directory, "worktree", "add", "--detach", snapshot_directory, commit)
+            logger.info(f"Created snapshot of {project.repo} at {commit}")
+
+        _snapshot_references[snapshot_directory] = _snapshot_references.get(snapshot_directory, 0) + 1
+        _snapshot_repos[snapshot_directory] = repo_directory
+        previous_snapshot = _latest_snapshots.get(repo_directory)
+        _latest_snapshots[repo_directory] = snapshot_directory
+        if previous_snapshot and previous_snapshot != snapshot_directory:
+            await _remove_unreferenced_snapshot_async(previous_snapshot)
+    return snapshot_directory
+
+
+async def release_repo_snapshot_async(snapshot_directory: str | None):
+    """
+    Hand back a snapshot once the chat is done with it. Snapshots of older commits are removed with their last
+    reference, the latest one is kept for the next chat.
+    """
+    repo_directory = _snapshot_repos.get(snapshot_directory) if snapshot_directory else None
+    if not repo_directory:
+        return
+
+    async with _get_repo_lock(repo_directory):
+        _snapshot_references[snapshot_directory] -= 1
+        if _latest_snapshots.get(repo_directory) != snapshot_directory:
+            await _remove_unreferenced_snapshot_async(snapshot_directory)
+
+
+async def setup_ephemeral_repo_async(
+    installation_id: int, full_repo_name: str, clone_policy: ClonePolicy = ClonePolicy.FULL
+) -> tuple[str, str]:
+    start_time = time.perf_counter()
+    task_directory = f"{BASE_DIRECTORY}/{uuid.uuid4()}"
+    await create_directory_async(task_directory)
+
+    github_client = get_github_client()
+    access_token = await github_client.generate_app_access_token_async(installation_id)
+    # a full mirror would defeat shallow clones, so they only reuse a mirror that already exists
+    mirror_directory = await _get_mirror_or_none_async(
+        access_token, full_repo_name, create=clone_policy == ClonePolicy.FULL
+    )
+    repo_directory = await github_client.clone_repo_async(
+        access_token, full_repo_name, task_directory, mirror_directory, clone_policy
+    )
+
+    object_bytes = await get_object_bytes_async(repo_directory)
+    logger.info(
+        f"Cloned {full_repo_name} with {clone_policy.value} policy in {time.perf_counter() - start_time:.2f}s "
+        f"({object_bytes} bytes of objects, mirror: {mirror_directory is not None})"
+    )
+    return task_directory, repo_directory
+
+
+async def _get_mirror_or_none_async(access_token: str, full_repo_name: str, create: bool) -> str | None:
+    try:
+        return await get_mirror_async(access_token, full_repo_name, create)
+    except Exception as e:
+        # the mirror only speeds up the clone, fall back to a plain clone
+        logger.warning(f"Failed to update mirror of {full_repo_name}: {e}")
+        return None
+
+
+def _get_repo_directory(org: Org, project: Project) -> str:
+    return f"{BASE_DIRECTORY}/{org.name}/{project.name}"
+
+
+def _get_repo_lock(repo_directory: str) -> asyncio.Lock:
+    if repo_directory not in _repo_locks:
+        _repo_locks[repo_directory] = asyncio.Lock()
+    return _repo_locks[repo_directory]
+
+
+async def _update_repo_async(org: Org, project: Project, repo_directory: str) -> str:
+    updated_at = _repo_updated_at.get(repo_directory)
+    if updated_at and time.monotonic() - updated_at < REPO_FRESHNESS_SECONDS and os.path.exists(repo_directory):
+        return repo_directory
 
-async def setup_repo_async(org: Org, project: Project) -> str:
     org_directory = f"{BASE_DIRECTORY}/{org.name}"
     if not os.path.exists(org_directory):
         await create_directory_async(org_directory)
 
     github_client = get_github_client()
     access_token = await github_client.generate_app_access_token_async(org.github_installation_id)
-    repo_directory = f"{org_directory}/{project.name}"
     if os.path.exists(repo_directory):
         await github_client.pull_async(access_token, project.repo, repo_directory)
-        return repo_directory
-
-    repo_directory = await github_client.clone_repo_async(access_token, project.repo, org_directory)
+    else:
+        repo_directory = await github_client.clone_repo_async(access_token, project.repo, org_directory)
+    _repo_updated_at[repo_directory] = time.monotonic()
     return repo_directory
 
 
-async def setup_ephemeral_repo_async(installation_id: int, full_repo_name: str) -> tuple[str, str]:
-    task_directory = f"{BASE_DIRECTORY}/{uuid.uuid4()}"
-    await create_directory_async(task_directory)
-
-    github_client = get_github_client()
-    access_token = await github_client.generate_app_access_token_async(installation_id)
-    repo_directory = await github_client.clone_repo_async(access_token, full_repo_name, task_directory)
-    return task_directory, repo_directory
+async def _remove_unreferenced_snapshot_async(snapshot_directory: str):
+    """
+    Remove a snapshot nobody reads anymore. Called with the lock of its shared checkout held.
+    """
+    if _snapshot_references.get(snapshot_directory, 0) > 0:
+        return
+    repo_directory = _snapshot_repos.pop(snapshot_directory)
+    _snapshot_references.pop(snapshot_directory, None)
+    await close_cat_file_readers_async(snapshot_directory)
+    try:
+        await run_git_async(repo_directory, "worktree", "remove", "--force", snapshot_directory)
+    except RuntimeError as e:
+        logger.warning(f"Failed to remove snapshot {snapshot_directory}, deleting it: {e}")
+        await cleanup_directory_async(snapshot_directory)
+        await run_git_async(repo_directory, "worktree", "prune")
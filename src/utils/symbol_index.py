@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.utils.git_cat_file import get_cat_file_reader
+from src.utils.git_utils import run_git_async
+from src.utils.index_cache import INDEX_DIRECTORY, load_index_file, store_index_file
+from src.utils.index_executor import get_index_executor
+from src.utils.symbol_tagger import Symbol, get_file_language, tag_files
+
+SYMBOL_INDEX_ENABLED = os.getenv("SYMBOL_INDEX_ENABLED", "True") == "True"
+
+# larger files, mostly generated or minified, are not indexed
+MAX_INDEXED_FILE_BYTES = 2**20
+
+# files are read from the object database and tagged in batches of this many
+TAG_BATCH_SIZE = 256
+
+# indexes are kept in memory for this many commits
+MAX_LOADED_INDEXES = 4
+
+logger = logging.getLogger(__name__)
+
+_indexes: OrderedDict[str, "SymbolIndex"] = OrderedDict()
+_builds: dict[str, asyncio.Task] = {}
+_scheduled_builds: set[asyncio.Task] = set()
+
+
+class SymbolIndex:
+    """
+    Declarations of the source files tracked at a commit, by name.
+
+    Every name maps to its declarations as (path, line number, kind, qualified name), e.g.
+    ("src/app.py", 12, "method", "Server.start").
+    """
+
+    def __init__(self, commit: str, definitions: dict[str, list[tuple[str, int, str, str]]], file_count: int):
+        self.commit = commit
+        self.definitions = definitions
+        self.file_count = file_count
+
+    def find_definitions(self, name: str) -> list[tuple[str, int, str, str]]:
+        """
+        Returns the declarations of a name, optionally qualified by its classes, e.g. "Server.start". Names are
+        matched exactly, or ignoring case when nothing matches exactly.
+        """
+        short_name = name.rsplit(".", 1)[-1]
+        definitions = self.definitions.get(short_name)
+        if not definitions:
+            lowered_name = short_name.lower()
+            definitions = [
+                definition
+                for symbol_name, symbol_definitions in self.definitions.items()
+                if symbol_name.lower() == lowered_name
+                for definition in symbol_definitions
+            ]
+        if short_name != name:
+            lowered_name = name.lower()
+            definitions = [
+                definition
+                for definition in definitions
+                if definition[3].lower() == lowered_name or definition[3].lower().endswith(f".{lowered_name}")
+            ]
+        return sorted(definitions)
+
+
+async def get_symbol_index_async(repo_directory: str) -> Optional[SymbolIndex]:
+    """
+    Returns the index of the repository's HEAD commit, from memory or from disk, waiting for it to be built otherwise.
+    Returns None when the index is disabled or could not be built.
+    """
+    if not SYMBOL_INDEX_ENABLED:
+        return None
+
+    commit = (await run_git_async(repo_directory, "rev-parse", "HEAD")).decode().strip()
+    index = _indexes.get(commit)
+    if index:
+        _indexes.move_to_end(commit)
+        return index
+
+    build = _builds.get(commit)
+    if not build:
+        build = asyncio.create_task(_load_or_build_index_async(repo_directory, commit))
+        _builds[commit] = build
+        build.add_done_callback(lambda _: _builds.pop(commit, None))
+    # waiters that are cancelled, e.g. by a tool timeout, leave the build running for the others
+    return await asyncio.shield(build)
+
+
+def schedule_symbol_index_build(repo_directory: str):
+    """
+    Start building the index of the repository's HEAD commit in the background, so it is ready when an agent first
+    looks up a symbol.
+    """
+    if not SYMBOL_INDEX_ENABLED:
+        return
+    task = asyncio.create_task(get_symbol_index_async(repo_directory))
+    _scheduled_builds.add(task)
+    task.add_done_callback(_scheduled_builds.discard)
+
+
+async def build_symbol_index_async(repo_directory: str, commit: str) -> SymbolIndex:
+    """
+    Tag the source files tracked at the commit. Batches of files are tagged in worker processes while the next
+    batches are read.
+    """
+    output = await run_git_async(repo_directory, "ls-tree", "-r", "-z", "-l", commit)
+    entries = []
+    for line in output.decode("utf-8", errors="replace").split("\0"):
+        if not line:
+            continue
+        # "<mode> <type> <object> <size>\t<path>"
+        metadata, file_path = line.split("\t", 1)
+        _, object_type, object_name, size = metadata.split()
+        if object_type == "blob" and int(size) <= MAX_INDEXED_FILE_BYTES and get_file_language(file_path):
+            entries.append((file_path, object_name))
+
+    loop = asyncio.get_running_loop()
+    executor = get_index_executor()
+    reader = get_cat_file_reader(repo_directory)
+    futures = []
+    for i in range(0, len(entries), TAG_BATCH_SIZE):
+        batch = entries[i : i + TAG_BATCH_SIZE]
+        contents = await reader.read_objects_async([object_name for _, object_name in batch])
+        files = [(file_path, content) for (file_path, _), content in zip(batch, contents) if content is not None]
+        futures.append(loop.run_in_executor(executor, tag_files, files))
+
+    definitions: dict[str, list[tuple[str, int, str, str]]] = {}
+    for tagged_files in await asyncio.gather(*futures):
+        for file_path, symbols in tagged_files:
+            _add_symbols(definitions, file_path, symbols)
+    return SymbolIndex(commit, definitions, len(entries))
+
+
+async def _load_or_build_index_async(repo_directory: str, commit: str) -> Optional[SymbolIndex]:
+    index_path = f"{INDEX_DIRECTORY}/{commit}.symbols"
+    if os.path.exists(index_path):
+        try:
+            index = await asyncio.to_thread(load_index_file, index_path)
+            _add_loaded_index(index)
+            return index
+        except Exception as e:
+            logger.warning(f"Failed to load symbol index of {commit}, rebuilding it: {e}")
+
+    start_time = time.perf_counter()
+    try:
+        index = await build_symbol_index_async(repo_directory, commit)
+        await asyncio.to_thread(store_index_file, index, index_path)
+    except Exception as e:
+        logger.warning(f"Failed to build symbol index of {commit}: {e}")
+        return None
+    _add_loaded_index(index)
+    logger.info(
+        f"Built symbol index of {index.file_count} files with {len(index.definitions)} names at {commit} "
+        f"in {time.perf_counter() - start_time:.2f}s"
+    )
+    return index
+
+
+def _add_symbols(definitions: dict[str, list[tuple[str, int, str, str]]], file_path: str, symbols: list[Symbol]):
+    for name, kind, line_number, qualified_name in symbols:
+        definitions.setdefault(name, []).append((file_path, line_number, kind, qualified_name))
+
+
+def _add_loaded_index(index: SymbolIndex):
+    _indexes[index.commit] = index
+    _indexes.move_to_end(index.commit)
+    while len(_indexes) > MAX_LOADED_INDEXES:
+        _indexes.popitem(last=False)
@@ -0,0 +1,274 @@
+import ast
+import bisect
+import os
+import re
+from typing import Optional
+
+from src.model.app.project.language import Language
+
+# a symbol as (name, kind, 1-based line number, qualified name)
+Symbol = tuple[str, str, int, str]
+
+EXTENSION_LANGUAGES = {
+    ".py": Language.PYTHON,
+    ".pyi": Language.PYTHON,
+    ".js": Language.JAVASCRIPT,
+    ".jsx": Language.JAVASCRIPT,
+    ".mjs": Language.JAVASCRIPT,
+    ".cjs": Language.JAVASCRIPT,
+    ".ts": Language.TYPESCRIPT,
+    ".tsx": Language.TYPESCRIPT,
+    ".mts": Language.TYPESCRIPT,
+    ".java": Language.JAVA,
+    ".cs": Language.CSHARP,
+    ".cpp": Language.CPP,
+    ".cc": Language.CPP,
+    ".cxx": Language.CPP,
+    ".hpp": Language.CPP,
+    ".hh": Language.CPP,
+    ".c": Language.C,
+    ".h": Language.C,
+    ".go": Language.GO,
+    ".rs": Language.RUST,
+    ".php": Language.PHP,
+    ".rb": Language.RUBY,
+    ".swift": Language.SWIFT,
+    ".kt": Language.KOTLIN,
+    ".kts": Language.KOTLIN,
+    ".scala": Language.SCALA,
+    ".r": Language.R,
+    ".sh": Language.SHELL,
+    ".bash": Language.SHELL,
+    ".zsh": Language.SHELL,
+    ".sql": Language.SQL,
+    ".dart": Language.DART,
+    ".lua": Language.LUA,
+    ".pl": Language.PERL,
+    ".pm": Language.PERL,
+    ".hs": Language.HASKELL,
+    ".clj": Language.CLOJURE,
+    ".cljs": Language.CLOJURE,
+    ".cljc": Language.CLOJURE,
+    ".ex": Language.ELIXIR,
+    ".exs": Language.ELIXIR,
+    ".erl": Language.ERLANG,
+    ".hrl": Language.ERLANG,
+}
+
+# declarations introduced by a keyword, at any indentation
+KEYWORD_DECLARATION = (
+    r"^[ \t]*(?:@\w+[ \t]+)*(?:export[ \t]+)?(?:default[ \t]+)?"
+    r"(?:(?:public|private|protected|internal|open|static|abstract|final|sealed|data|inline|override|async|"
+    r"readonly|declare|partial|virtual|unsafe|pub(?:\([\w ]+\))?)[ \t]+)*"
+    r"(?P<kind>class|interface|type|enum|struct|trait|function|func|fn|def|const|let|var|val|module|object|record|"
+    r"protocol|extension|typealias|namespace|mod|union|macro_rules!)[ \t]+(?P<name>[A-Za-z_$][\w$]*)"
+)
+
+# functions and methods declared as a return type followed by a name and parameters, in C-like languages
+TYPED_FUNCTION_DECLARATION = (
+    r"^[ \t]*(?:(?:public|private|protected|internal|static|final|abstract|virtual|override|async|extern|inline|"
+    r"synchronized|native|unsafe|constexpr|explicit|friend)[ \t]+)*"
+    r"(?!(?:return|else|new|throw|await|case|goto)\b)[\w:<>,.\[\]*&?]+[ \t*&]+(?P<name>[A-Za-z_~][\w]*)[ \t]*\([^;\n]*$"
+)
+
+# methods and functions of classes and objects in JavaScript and TypeScript
+JAVASCRIPT_METHOD_DECLARATION = (
+    r"^[ \t]+(?:(?:public|private|protected|static|async|get|set|readonly|override)[ \t]+)*"
+    r"(?P<name>[A-Za-z_$][\w$]*)[ \t]*(?:<[^>\n]*>)?\([^)\n]*\)[ \t]*(?::[^{;\n]+)?\{[ \t]*$"
+)
+
+JAVASCRIPT_ARROW_DECLARATION = (
+    r"^[ \t]*(?:export[ \t]+)?(?:const|let|var)[ \t]+(?P<name>[A-Za-z_$][\w$]*)[ \t]*(?::[^=\n]+)?=[ \t]*"
+    r"(?:async[ \t]*)?(?:\([^)\n]*\)|[A-Za-z_$][\w$]*)[ \t]*(?::[^=\n]+)?=>"
+)
+
+LANGUAGE_PATTERNS: dict[Language, list[tuple[str, Optional[str]]]] = {
+    # Python files are parsed, the pattern only tags files that do not parse
+    Language.PYTHON: [(r"^[ \t]*(?:async[ \t]+)?(?P<kind>class|def)[ \t]+(?P<name>\w+)", None)],
+    Language.JAVASCRIPT: [
+        (JAVASCRIPT_ARROW_DECLARATION, "function"),
+        (KEYWORD_DECLARATION, None),
+        (JAVASCRIPT_METHOD_DECLARATION, "method"),
+    ],
+    Language.TYPESCRIPT: [
+        (JAVASCRIPT_ARROW_DECLARATION, "function"),
+        (KEYWORD_DECLARATION, None),
+        (JAVASCRIPT_METHOD_DECLARATION, "method"),
+    ],
+    Language.JAVA: [(KEYWORD_DECLARATION, None), (TYPED_FUNCTION_DECLARATION, "method")],
+    Language.CSHARP: [(KEYWORD_DECLARATION, None), (TYPED_FUNCTION_DECLARATION, "method")],
+    Language.CPP: [
+        (
+            r"^[ \t]*(?:template[ \t]*<[^>]*>[ \t]*)?(?P<kind>class|struct|enum|union|namespace)[ \t]+(?P<name>\w+)",
+            None,
+        ),
+        (r"^[ \t]*#define[ \t]+(?P<name>\w+)", "macro"),
+        (TYPED_FUNCTION_DECLARATION, "function"),
+    ],
+    Language.C: [
+        (r"^[ \t]*(?:typedef[ \t]+)?(?P<kind>struct|enum|union)[ \t]+(?P<name>\w+)", None),
+        (r"^[ \t]*#define[ \t]+(?P<name>\w+)", "macro"),
+        (r"^typedef[ \t].*?(?P<name>\w+)[ \t]*;[ \t]*$", "type"),
+        (TYPED_FUNCTION_DECLARATION, "function"),
+    ],
+    Language.GO: [
+        (r"^func[ \t]+(?:\([^)]*\)[ \t]*)?(?P<name>\w+)", "func"),
+        (r"^(?P<kind>type|var|const)[ \t]+(?P<name>\w+)", None),
+        (r"^[ \t]+(?P<name>[A-Z]\w*)[ \t]+(?:struct|interface)\b", "type"),
+    ],
+    Language.RUST: [(KEYWORD_DECLARATION, None)],
+    Language.PHP: [
+        (
+            r"^[ \t]*(?:(?:abstract|final|public|private|protected|static|readonly)[ \t]+)*"
+            r"(?P<kind>class|interface|trait|enum|function)[ \t]+&?(?P<name>\w+)",
+            None,
+        ),
+    ],
+    Language.RUBY: [(r"^[ \t]*(?P<kind>def|class|module)[ \t]+(?:self\.)?(?P<name>[\w:]*\w[?!=]?)", None)],
+    Language.SWIFT: [(KEYWORD_DECLARATION, None)],
+    Language.KOTLIN: [
+        (
+            r"^[ \t]*(?:\w+[ \t]+)*(?P<kind>class|interface|object|fun|val|var|typealias)[ \t]+"
+            r"(?:<[^>]*>[ \t]*)?(?:\w+\.)?(?P<name>\w+)",
+            None,
+        )
+    ],
+    Language.SCALA: [
+        (
+            r"^[ \t]*(?:\w+[ \t]+)*(?P<kind>class|trait|object|def|val|var|type|enum)[ \t]+"
+            r"(?P<name>\w+)",
+            None,
+        )
+    ],
+    Language.R: [(r"^[ \t]*(?P<name>[\w.]+)[ \t]*(?:<-|=)[ \t]*function\b", "function")],
+    Language.SHELL: [
+        (r"^[ \t]*function[ \t]+(?P<name>[\w:.-]+)", "function"),
+        (r"^[ \t]*(?P<name>[\w:.-]+)[ \t]*\(\)[ \t]*\{?", "function"),
+    ],
+    Language.SQL: [
+        (
+            r"(?i)^[ \t]*create[ \t]+(?:or[ \t]+replace[ \t]+)?(?:temp(?:orary)?[ \t]+)?"
+            r"(?P<kind>table|view|function|procedure|index|trigger|type|schema|sequence)[ \t]+"
+            r"(?:if[ \t]+not[ \t]+exists[ \t]+)?(?:[\w\"`]+\.)?[\"`]?(?P<name>\w+)",
+            None,
+        ),
+    ],
+    Language.DART: [(KEYWORD_DECLARATION, None), (TYPED_FUNCTION_DECLARATION, "function")],
+    Language.LUA: [(r"^[ \t]*(?:local[ \t]+)?function[ \t]+(?:[\w.]+[.:])?(?P<name>\w+)", "function")],
+    Language.PERL: [(r"^[ \t]*(?P<kind>sub|package)[ \t]+(?:[\w:]+::)?(?P<name>\w+)", None)],
+    Language.HASKELL: [
+        (r"^(?P<kind>data|newtype|type|class)[ \t]+(?:\([^)]*\)[ \t]*=>[ \t]*)?(?P<name>[A-Z][\w']*)", None),
+        (r"^(?P<name>[a-z_][\w']*)[ \t]*::", "function"),
+    ],
+    Language.CLOJURE: [
+        (
+            r"^[ \t]*\((?P<kind>defn-?|def|defmacro|defprotocol|defrecord|deftype|defmulti|ns)[ \t]+"
+            r"(?:\^\S+[ \t]+)?(?P<name>[^\s()\[\]]+)",
+            None,
+        ),
+    ],
+    Language.ELIXIR: [
+        (
+            r"^[ \t]*(?P<kind>defmodule|defprotocol|defimpl|def|defp|defmacro|defmacrop|defstruct)[ \t]+"
+            r"(?:[\w.]*\.)?(?P<name>[\w?!]+)",
+            None,
+        ),
+    ],
+    Language.ERLANG: [
+        (r"^-(?P<kind>record|type|define)\([ \t]*(?P<name>\w+)", None),
+        (r"^(?P<name>[a-z]\w*)\(.*\)[ \t]*(?:when[ \t].*)?->", "function"),
+    ],
+}
+
+# words that the typed function declarations match in statements such as "else if (...)"
+NON_DECLARATION_NAMES = {
+    "if", "for", "while", "switch", "catch", "return", "sizeof", "new", "delete", "throw", "else", "do", "case",
+    "using", "typeof", "await", "super", "this", "elif", "foreach", "lock", "when", "with", "function", "constructor",
+}  # fmt: skip
+
+_compiled_patterns: dict[Language, list[tuple[re.Pattern, Optional[str]]]] = {
+    language: [(re.compile(pattern, re.MULTILINE), kind) for pattern, kind in patterns]
+    for language, patterns in LANGUAGE_PATTERNS.items()
+}
+
+
+def get_file_language(file_path: str) -> Optional[Language]:
+    return EXTENSION_LANGUAGES.get(os.path.splitext(file_path)[1].lower())
+
+
+def tag_files(files: list[tuple[str, bytes]]) -> list[tuple[str, list[Symbol]]]:
+    """
+    Returns the symbols declared in each file, as (path, symbols). Run in worker processes, so it must stay cheap to
+    import.
+    """
+    return [(file_path, tag_file(file_path, content.decode("utf-8", errors="replace"))) for file_path, content in files]
+
+
+def tag_file(file_path: str, content: str, parse: bool = True) -> list[Symbol]:
+    """
+    Returns the symbols declared in a source file. Python files are parsed unless `parse` is False, e.g. for a chunk
+    of a file. Files of other languages and files that do not parse are matched against declaration patterns, which
+    can miss declarations or report some that are not.
+    """
+    language = get_file_language(file_path)
+    if language == Language.PYTHON and parse:
+        try:
+            return _tag_python(content)
+        except (SyntaxError, ValueError, RecursionError):
+            pass
+    if language in _compiled_patterns:
+        return _tag_with_patterns(content, _compiled_patterns[language])
+    return []
+
+
+def _tag_python(content: str) -> list[Symbol]:
+    symbols: list[Symbol] = []
+
+    def visit(nodes: list[ast.stmt], container: str, in_class: bool):
+        for node in nodes:
+            match node:
+                case ast.ClassDef():
+                    qualified_name = f"{container}{node.name}"
+                    symbols.append((node.name, "class", node.lineno, qualified_name))
+                    visit(node.body, f"{qualified_name}.", True)
+                case ast.FunctionDef() | ast.AsyncFunctionDef():
+                    qualified_name = f"{container}{node.name}"
+                    symbols.append((node.name, "method" if in_class else "def", node.lineno, qualified_name))
+                    # nested functions and classes are indexed, their local variables are not
+                    visit(
+                        [
+                            child
+                            for child in node.body
+                            if isinstance(child, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+                        ],
+                        f"{qualified_name}.",
+                        False,
+                    )
+                case ast.Assign() | ast.AnnAssign() if not container or in_class:
+                    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                    for target in targets:
+                        if isinstance(target, ast.Name):
+                            symbols.append((target.id, "variable", node.lineno, f"{container}{target.id}"))
+                case ast.If() | ast.Try():
+                    # declarations guarded by conditions or imports
+                    visit(node.body, container, in_class)
+                    visit(node.orelse, container, in_class)
+
+    visit(ast.parse(content).body, "", False)
+    return symbols
+
+
+def _tag_with_patterns(content: str, patterns: list[tuple[re.Pattern, Optional[str]]]) -> list[Symbol]:
+    line_starts = [0]
+    line_starts.extend(match.end() for match in re.finditer("\n", content))
+
+    symbols: dict[tuple[str, int], Symbol] = {}
+    for pattern, kind in patterns:
+        for match in pattern.finditer(content):
+            name = match.group("name")
+            if name in NON_DECLARATION_NAMES:
+                continue
+            line_number = bisect.bisect_right(line_starts, match.start("name"))
+            # the first pattern to match a declaration gives its kind
+            symbols.setdefault((name, line_number), (name, kind or match.group("kind"), line_number, name))
+    return sorted(symbols.values(), key=lambda symbol: symbol[2])
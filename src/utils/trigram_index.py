@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+import time
+from array import array
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from src.utils.git_cat_file import get_cat_file_reader
+from src.utils.git_utils import run_git_async
+from src.utils.index_cache import INDEX_DIRECTORY, load_index_file, store_index_file
+from src.utils.index_executor import INDEX_WORKERS, get_index_executor
+
+GIT_GREP_INDEX_ENABLED = os.getenv("GIT_GREP_INDEX_ENABLED", "True") == "True"
+
+# git grep is fast enough on smaller repositories, they are never indexed. Below about this many files, the git calls
+# every indexed search makes on top of git grep cost more than the files the index rules out
+GIT_GREP_INDEX_MIN_FILES = int(os.getenv("GIT_GREP_INDEX_MIN_FILES", "30000"))
+
+# larger files are not indexed and searched by every query instead
+MAX_INDEXED_FILE_BYTES = 2**20
+
+# files are read from the object database in batches of this many
+READ_BATCH_SIZE = 256
+
+# like git grep -I, files with a NUL byte in their first bytes are binary and never match
+BINARY_CHECK_BYTES = 8000
+
+# indexes are kept in memory for this many commits
+MAX_LOADED_INDEXES = 4
+
+logger = logging.getLogger(__name__)
+
+_indexes: OrderedDict[str, "TrigramIndex"] = OrderedDict()
+_builds: dict[str, asyncio.Task] = {}
+
+# commits of repositories too small to index
+_unindexed_commits: set[str] = set()
+
+
+class TrigramIndex:
+    """
+    Case-insensitive trigram index of the text files tracked at a commit.
+
+    Every trigram maps to the IDs of the files containing it, so the files that may match a query are the ones
+    containing every trigram of the query's required literals. Files too large to index are always candidates.
+    """
+
+    def __init__(self, commit: str, file_paths: list[str], postings: dict[bytes, array], unindexed_file_ids: list[int]):
+        self.commit = commit
+        self.file_paths = file_paths
+        self.postings = postings
+        self.unindexed_file_ids = unindexed_file_ids
+
+    def get_candidate_paths(self, literals: Iterable[str]) -> list[str]:
+        """
+        Returns the paths of the files that may contain all the literals, ignoring case.
+        """
+        candidate_ids: Optional[set[int]] = None
+        for literal in literals:
+            for trigram in _get_trigrams(literal.encode("utf-8").lower()):
+                file_ids = self.postings.get(trigram)
+                if file_ids is None:
+                    candidate_ids = set()
+                    break
+                candidate_ids = set(file_ids) if candidate_ids is None else candidate_ids.intersection(file_ids)
+            if candidate_ids is not None and not candidate_ids:
+                break
+
+        if candidate_ids is None:
+            candidate_ids = set(range(len(self.file_paths)))
+        candidate_ids.update(self.unindexed_file_ids)
+        return [self.file_paths[file_id] for file_id in sorted(candidate_ids)]
+
+
+async def get_trigram_index_async(repo_directory: str) -> Optional[TrigramIndex]:
+    """
+    Returns the index of the repository's HEAD commit when it is ready, from memory or from disk.
+
+    Otherwise None is returned and the index is built in the background, so searches use git grep until it is ready.
+    """
+    if not GIT_GREP_INDEX_ENABLED:
+        return None
+
+    commit = (await run_git_async(repo_directory, "rev-parse", "HEAD")).decode().strip()
+    if commit in _unindexed_commits:
+        return None
+    index = _indexes.get(commit)
+    if index:
+        _indexes.move_to_end(commit)
+        return index
+
+    index_path = f"{INDEX_DIRECTORY}/{commit}"
+    if os.path.exists(index_path):
+        try:
+            index = await asyncio.to_thread(load_index_file, index_path)
+            _add_loaded_index(index)
+            return index
+        except Exception as e:
+            logger.warning(f"Failed to load trigram index of {commit}, rebuilding it: {e}")
+
+    build = _builds.get(commit)
+    if not build or build.done():
+        _builds[commit] = asyncio.create_task(_build_and_store_index_async(repo_directory, commit, index_path))
+    return None
+
+
+async def build_trigram_index_async(repo_directory: str, commit: str) -> Optional[TrigramIndex]:
+    """
+    Index the text files tracked at the commit. Returns None when the repository is too small to be worth indexing.
+    """
+    output = await run_git_async(repo_directory, "ls-tree", "-r", "-z", "-l", commit)
+    entries = []
+    for line in output.decode("utf-8", errors="replace").split("\0"):
+        if not line:
+            continue
+        # "<mode> <type> <object> <size>\t<path>"
+        metadata, file_path = line.split("\t", 1)
+        _, object_type, object_name, size = metadata.split()
+        if object_type == "blob":
+            entries.append((file_path, object_name, int(size)))
+    if len(entries) < GIT_GREP_INDEX_MIN_FILES:
+        return None
+
+    file_paths = []
+    postings: dict[bytes, array] = {}
+    unindexed_file_ids = []
+    indexed_entries = []
+    for file_path, object_name, size in entries:
+        if size > MAX_INDEXED_FILE_BYTES:
+            unindexed_file_ids.append(len(file_paths))
+            file_paths.append(file_path)
+        else:
+            indexed_entries.append((file_path, object_name))
+
+    # batches are indexed in worker processes while the next batches are read, with a bounded number in flight
+    loop = asyncio.get_running_loop()
+    executor = get_index_executor()
+    reader = get_cat_file_reader(repo_directory)
+    futures: list[asyncio.Future] = []
+    for i in range(0, len(indexed_entries), READ_BATCH_SIZE):
+        batch = indexed_entries[i : i + READ_BATCH_SIZE]
+        contents = await reader.read_objects_async([object_name for _, object_name in batch])
+        first_file_id = len(file_paths)
+        text_contents = []
+        for (file_path, _), content in zip(batch, contents):
+            if content is not None and b"\0" not in content[:BINARY_CHECK_BYTES]:
+                file_paths.append(file_path)
+                text_contents.append(content)
+        futures.append(loop.run_in_executor(executor, _get_postings, first_file_id, text_contents))
+        if len(futures) > 2 * INDEX_WORKERS:
+            await asyncio.to_thread(_merge_postings, postings, await futures.pop(0))
+    for future in futures:
+        await asyncio.to_thread(_merge_postings, postings, await future)
+    return TrigramIndex(commit, file_paths, postings, unindexed_file_ids)
+
+
+async def _build_and_store_index_async(repo_directory: str, commit: str, index_path: str):
+    start_time = time.perf_counter()
+    try:
+        index = await build_trigram_index_async(repo_directory, commit)
+        if index is None:
+            _unindexed_commits.add(commit)
+            return
+        await asyncio.to_thread(store_index_file, index, index_path)
+        _add_loaded_index(index)
+        logger.info(
+            f"Built trigram index of {len(index.file_paths)} files at {commit} "
+            f"in {time.perf_counter() - start_time:.2f}s"
+        )
+    except Exception as e:
+        logger.warning(f"Failed to build trigram index of {commit}: {e}")
+    finally:
+        _builds.pop(commit, None)
+
+
+def _get_postings(first_file_id: int, contents: list[bytes]) -> dict[bytes, array]:
+    """
+    Returns the postings of a batch of files, whose IDs follow each other from the first file ID.
+    """
+    postings: dict[bytes, array] = {}
+    for file_id, content in enumerate(contents, start=first_file_id):
+        for trigram in _get_trigrams(content.lower()):
+            file_ids = postings.get(trigram)
+            if file_ids is None:
+                postings[trigram] = array("I", [file_id])
+            else:
+                file_ids.append(file_id)
+    return postings
+
+
+def _merge_postings(postings: dict[bytes, array], batch_postings: dict[bytes, array]):
+    for trigram, batch_file_ids in batch_postings.items():
+        file_ids = postings.get(trigram)
+        if file_ids is None:
+            postings[trigram] = batch_file_ids
+        else:
+            file_ids.extend(batch_file_ids)
+
+
+def _get_trigrams(content: bytes) -> set[bytes]:
+    return {content[i : i + 3] for i in range(len(content) - 2)}
+
+
+def _add_loaded_index(index: TrigramIndex):
+    _indexes[index.commit] = index
+    _indexes.move_to_end(index.commit)
+    while len(_indexes) > MAX_LOADED_INDEXES:
+        _indexes.popitem(last=False)
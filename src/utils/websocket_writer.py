@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.websockets import WebSocketState
+
+# streamed text is held for at most this long, or until this much of it is pending, before it is sent as one frame
+WEBSOCKET_FLUSH_INTERVAL_SECONDS = 0.016
+WEBSOCKET_MAX_FRAME_BYTES = 4096
+
+# writes wait while the queue is full, and the connection is closed when it stays full this long
+WEBSOCKET_QUEUE_SIZE = 1024
+WEBSOCKET_SEND_TIMEOUT_SECONDS = 10.0
+
+# "try again later", the client is too slow to keep up
+OVERFLOW_CLOSE_CODE = 1013
+
+logger = logging.getLogger(__name__)
+
+# frames and chunks sent by all connections of this process
+_totals: Counter = Counter()
+
+
+class WebSocketWriter:
+    """
+    Sends a websocket connection's messages from a single writer task, coalescing streamed text into fewer frames.
+
+    Text chunks are buffered for a short window and sent together. Control frames, such as tool calls and the end of
+    message marker, flush the pending text and are sent on their own, so the client sees every frame in order.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue[Optional[tuple[str, bool]]] = asyncio.Queue(maxsize=WEBSOCKET_QUEUE_SIZE)
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.message_stats: Counter = Counter()
+
+    def start(self):
+        self.task = asyncio.create_task(self._write_async())
+
+    async def send_text_async(self, text: str):
+        """
+        Queue streamed text, which may be sent together with the text around it.
+        """
+        await self._put_async((text, False))
+
+    async def send_control_async(self, text: str):
+        """
+        Queue a frame that is sent on its own, after the text queued before it.
+        """
+        await self._put_async((text, True))
+
+    async def end_message_async(self, end_of_message: str):
+        """
+        Send the end of message marker once everything queued before it is sent, and log how many frames the message
+        took.
+        """
+        await self.send_control_async(end_of_message)
+        await self.queue.join()
+        stats, self.message_stats = self.message_stats, Counter()
+        if stats["chunks"]:
+            logger.info(
+                f"Sent message of {stats['bytes']} bytes in {stats['frames']} frames: {stats['chunks']} text chunks "
+                f"in {stats['text_frames']} frames ({stats['chunks'] / stats['text_frames']:.1f} chunks per frame)"
+            )
+
+    async def close_async(self):
+        """
+        Send everything queued and stop the writer task.
+        """
+        if self.task is None:
+            return
+        if not self.closed:
+            try:
+                await asyncio.wait_for(self.queue.put(None), WEBSOCKET_SEND_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                self.closed = True
+        if self.closed:
+            # nothing more can be sent
+            self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+    async def _put_async(self, item: tuple[str, bool]):
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # backpressure, the agent waits for the client to catch up
+        try:
+            await asyncio.wait_for(self.queue.put(item), WEBSOCKET_SEND_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Closing websocket, the client did not read {self.queue.qsize()} queued frames in time")
+            await self._close_on_overflow_async()
+            raise WebSocketDisconnect(OVERFLOW_CLOSE_CODE)
+
+    async def _write_async(self):
+        pending: list[str] = []
+        pending_bytes = 0
+        deadline = 0.0
+        while True:
+            if pending:
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    await self._send_async("".join(pending), len(pending))
+                    pending, pending_bytes = [], 0
+                    continue
+            else:
+                item = await self.queue.get()
+
+            try:
+                if item is None:
+                    if pending:
+                        await self._send_async("".join(pending), len(pending))
+                    return
+
+                text, is_control = item
+                if is_control:
+                    if pending:
+                        await self._send_async("".join(pending), len(pending))
+                        pending, pending_bytes = [], 0
+                    await self._send_async(text, 0)
+                    continue
+
+                if not pending:
+                    deadline = time.monotonic() + WEBSOCKET_FLUSH_INTERVAL_SECONDS
+                pending.append(text)
+                pending_bytes += len(text)
+                if pending_bytes >= WEBSOCKET_MAX_FRAME_BYTES:
+                    await self._send_async("".join(pending), len(pending))
+                    pending, pending_bytes = [], 0
+            finally:
+                self.queue.task_done()
+
+    async def _send_async(self, text: str, chunk_count: int):
+        if self.closed:
+            return
+        try:
+            if self.websocket.client_state == WebSocketState.CONNECTED:
+                await self.websocket.send_text(text)
+        except Exception:
+            # the client is gone, what remains is dropped and execution finishes
+            self.closed = True
+            return
+        for stats in (self.message_stats, _totals):
+            stats["frames"] += 1
+            stats["bytes"] += len(text)
+            if chunk_count:
+                stats["text_frames"] += 1
+                stats["chunks"] += chunk_count
+
+    async def _close_on_overflow_async(self):
+        self.closed = True
+        if self.task:
+            self.task.cancel()
+        # unblock anything waiting on the queue
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+        try:
+            await self.websocket.close(code=OVERFLOW_CLOSE_CODE)
+        except Exception:
+            pass
+
+
+def get_websocket_writer_stats() -> dict[str, int]:
+    """
+    Frames, text frames, text chunks and bytes sent by all websocket writers of this process.
+    """
+    return dict(_totals)